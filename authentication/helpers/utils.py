@@ -4,6 +4,7 @@ import string
 from datetime import timedelta
 
 from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.core.mail import send_mail
 from django.utils import timezone
 
@@ -54,3 +55,12 @@ def valid_otp(user, otp_input, expiration_min):
 def get_email_from_payload_handler(payload):
     """Extract email from JWT payload."""
     return payload.get("email") or payload.get("email_id") or payload.get("sub")
+
+
+def get_user_by_email_handler(email):
+    """Load the JWT user together with their profile in a single query."""
+    User = get_user_model()
+    try:
+        return User.objects.select_related("profile").get(email=email)
+    except User.DoesNotExist:
+        return None
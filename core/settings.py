@@ -96,6 +96,13 @@ WSGI_APPLICATION = "core.wsgi.application"
 
 AUTH_USER_MODEL = "user.User"
 
+REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        "insights.rest.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+}
+
 GRAPHENE = {
     "SCHEMA": "core.schema.schema",
     "MIDDLEWARE": [
@@ -105,6 +112,7 @@ GRAPHENE = {
 
 GRAPHQL_JWT = {
     "JWT_PAYLOAD_GET_USERNAME_HANDLER": "authentication.helpers.utils.get_email_from_payload_handler",
+    "JWT_GET_USER_BY_NATURAL_KEY_HANDLER": "authentication.helpers.utils.get_user_by_email_handler",
     "JWT_AUTH_HEADER_PREFIX": "Bearer",
 }
 
@@ -118,6 +126,14 @@ DATABASES = {
     )
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Set CACHE_URL (e.g. redis://localhost:6379/1) to share the cache across workers
+
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -184,6 +200,8 @@ OTP_EXPIRATION_MINUTES = env.int("OTP_EXPIRATION_MINUTES")
 SERVER_EMAIL = env("SERVER_EMAIL")
 
 GEMINI_API_KEY = env("GEMINI_API_KEY")
+# Maximum number of concurrent in-flight Gemini requests per event loop
+GEMINI_MAX_CONCURRENCY = env.int("GEMINI_MAX_CONCURRENCY", default=16)
 
 # Unsplash API Configuration
 UNSPLASH_ACCESS_KEY = env("UNSPLASH_ACCESS_KEY")
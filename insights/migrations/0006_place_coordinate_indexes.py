@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-15 23:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("insights", "0005_place_theme_color_place_visual_tags"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="hiddengem",
+            index=models.Index(
+                fields=["latitude", "longitude"], name="insights_hi_latitud_bd0fca_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mostfamousplace",
+            index=models.Index(
+                fields=["latitude", "longitude"], name="insights_mo_latitud_87a9cd_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="thingtodo",
+            index=models.Index(
+                fields=["latitude", "longitude"], name="insights_th_latitud_84c286_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="touristtrap",
+            index=models.Index(
+                fields=["latitude", "longitude"], name="insights_to_latitud_8d5e94_idx"
+            ),
+        ),
+    ]
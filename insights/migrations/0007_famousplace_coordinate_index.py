@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-16 00:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("insights", "0006_place_coordinate_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="famousplace",
+            index=models.Index(
+                fields=["latitude", "longitude"], name="insights_fa_latitud_4bf551_idx"
+            ),
+        ),
+    ]
@@ -90,6 +90,11 @@ class MostFamousPlace(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["latitude", "longitude"]),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.place.city}"
 
@@ -107,6 +112,11 @@ class FamousPlace(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["latitude", "longitude"]),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.place.city}"
 
@@ -154,6 +164,11 @@ class TouristTrap(models.Model):
     reason = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["latitude", "longitude"]),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.place.city}"
 
@@ -185,6 +200,11 @@ class HiddenGem(models.Model):
     longitude = models.FloatField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["latitude", "longitude"]),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.place.city}"
 
@@ -220,6 +240,9 @@ class ThingToDo(models.Model):
 
     class Meta:
         verbose_name_plural = "Things To Do"
+        indexes = [
+            models.Index(fields=["latitude", "longitude"]),
+        ]
 
     def __str__(self):
         return f"{self.activity_type} at {self.location} - {self.place.city}"
@@ -0,0 +1,18 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Fallback for types orjson doesn't handle natively (Decimal, lazy strings, ...)
+_default = JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
@@ -1,6 +1,11 @@
 from django.urls import path
-from insights.views import CompletePlaceDataAPIView
+from insights.views import CompletePlaceDataAPIView, CompletePlaceDataStreamView
 
 urlpatterns = [
     path("place-data/", CompletePlaceDataAPIView.as_view(), name="complete-place-data"),
+    path(
+        "place-data/stream/",
+        CompletePlaceDataStreamView.as_view(),
+        name="complete-place-data-stream",
+    ),
 ]
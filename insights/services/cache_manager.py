@@ -1,6 +1,12 @@
+import asyncio
+import hashlib
 import logging
 from datetime import datetime, timedelta
+from typing import Callable, Optional
 
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
 from insights.models import (
     DayActivity,
@@ -16,10 +22,45 @@ from insights.models import (
     TouristTrap,
 )
 from insights.scraper.image_service import ImageService
-from insights.services.gemini import Gemini
+from insights.services.gemini import Gemini, _parse_and_validate_gemini_output
+from insights.signals import place_data_replaced
 
 logger = logging.getLogger(__name__)
 
+# Failed generations block retries for the same place for a backoff window
+# that doubles on each consecutive failure, up to the maximum
+GENERATION_FAILURE_BACKOFF_SECONDS = 60
+GENERATION_FAILURE_BACKOFF_MAX_SECONDS = 60 * 30
+
+# Per-place child tables rewritten on every save_generate_data
+RELATED_MODELS = (
+    MostFamousPlace,
+    FamousPlace,
+    FamousActivity,
+    SeasonalInsights,
+    TouristTrap,
+    FoodSpecialty,
+    HiddenGem,
+    DayActivity,
+    ThingToDo,
+)
+
+# In-flight generate-and-save runs keyed by normalized (city, state, country),
+# so concurrent cache misses for the same place share one Gemini call
+_inflight_generations = {}
+
+
+def _place_hash(city: str, state: str, country: str) -> str:
+    place = "|".join(part.strip() for part in (city, state, country))
+    return hashlib.md5(place.encode()).hexdigest()
+
+
+def place_data_cache_key(city: str, state: str, country: str) -> str:
+    """
+    Cache key for the serialized complete place data response.
+    """
+    return f"insights:place-data:{_place_hash(city, state, country)}"
+
 
 async def save_generate_data(place: Place, insights: dict) -> PlaceInsights:
     """
@@ -60,140 +101,271 @@ async def save_generate_data(place: Place, insights: dict) -> PlaceInsights:
         },
     )
 
-    # Delete old related data to avoid duplicates
-    await MostFamousPlace.objects.filter(place=place).adelete()
-    await FamousPlace.objects.filter(place=place).adelete()
-    await FamousActivity.objects.filter(place=place).adelete()
-    await SeasonalInsights.objects.filter(place=place).adelete()
-    await TouristTrap.objects.filter(place=place).adelete()
-    await FoodSpecialty.objects.filter(place=place).adelete()
-    await HiddenGem.objects.filter(place=place).adelete()
-    await DayActivity.objects.filter(place=place).adelete()
-    await ThingToDo.objects.filter(place=place).adelete()
-
-    # Save Most Famous Place
+    # Replace related data in one transaction: one DELETE and one multi-row
+    # INSERT per table instead of a round-trip per row
+    related = _build_related_objects(place, insights)
+    await sync_to_async(_replace_related_data)(place, related)
+
+    logger.info(
+        f"Successfully {'created' if created else 'updated'} insights for Place: {place} (v{new_version})"
+    )
+    # Drop any cached response built from the previous version
+    await cache.adelete(place_data_cache_key(place.city, place.state, place.country))
+
+    # Auto-fetch images for all places (main place, most famous place, famous places)
+    image_service = ImageService()
+
+    try:
+        # 1. Fetch image for main place (city/destination)
+        await image_service.populate_place_image(place)
+
+        # 2. Fetch image for most famous place
+        await image_service.populate_most_famous_place_image(place)
+
+        # 3. Fetch images for famous places (up to 5)
+        images_updated = await image_service.populate_famous_place_images(
+            place, limit=5
+        )
+        logger.info(
+            f"Updated images: main place + most famous + {images_updated} famous places for {place}"
+        )
+    except Exception as e:
+        logger.error(f"Error fetching images for {place}: {e}")
+        # Don't fail the entire operation if image fetching fails
+
+    return place_insights
+
+
+def _build_related_objects(place: Place, insights: dict) -> dict:
+    """
+    Build unsaved related model instances from parsed insights, keyed by model.
+    """
+    related = {model: [] for model in RELATED_MODELS}
+
+    # Most Famous Place
     mfp = insights.get("most_famous_place", {})
     if mfp and mfp.get("name"):
         coords = mfp.get("coordinates", {})
-        await MostFamousPlace.objects.acreate(
-            place=place,
-            name=mfp.get("name", ""),
-            quote=mfp.get("quote", ""),
-            latitude=coords.get("lat", 0.0),
-            longitude=coords.get("lng", 0.0),
-            image="",  # Can be populated later
+        related[MostFamousPlace].append(
+            MostFamousPlace(
+                place=place,
+                name=mfp.get("name", ""),
+                quote=mfp.get("quote", ""),
+                latitude=coords.get("lat", 0.0),
+                longitude=coords.get("lng", 0.0),
+                image="",  # Can be populated later
+            )
         )
 
-    # Save Famous Places
+    # Famous Places
     for fp in insights.get("famous_places", []):
         if fp.get("name"):
             coords = fp.get("coordinates", {})
-            await FamousPlace.objects.acreate(
-                place=place,
-                name=fp.get("name", ""),
-                quote=fp.get("quote", ""),
-                latitude=coords.get("lat", 0.0),
-                longitude=coords.get("lng", 0.0),
-                image="",  # Can be populated later
+            related[FamousPlace].append(
+                FamousPlace(
+                    place=place,
+                    name=fp.get("name", ""),
+                    quote=fp.get("quote", ""),
+                    latitude=coords.get("lat", 0.0),
+                    longitude=coords.get("lng", 0.0),
+                    image="",  # Can be populated later
+                )
             )
 
-    # Save Famous Activities
+    # Famous Activities
     for activity_name, time_of_day in insights.get("famous_activities", {}).items():
-        await FamousActivity.objects.acreate(
-            place=place, name=activity_name, time=time_of_day
+        related[FamousActivity].append(
+            FamousActivity(place=place, name=activity_name, time=time_of_day)
         )
 
-    # Save Seasonal Behavior
-    seasonal = insights.get("seasonal_behavior", {})
-    for season, description in seasonal.items():
+    # Seasonal Behavior
+    for season, description in insights.get("seasonal_behavior", {}).items():
         if description:
-            await SeasonalInsights.objects.acreate(
-                place=place,
-                season=season.capitalize(),
-                description=description,
-                recommended_activities=[],
-                cautions=[],
+            related[SeasonalInsights].append(
+                SeasonalInsights(
+                    place=place,
+                    season=season.capitalize(),
+                    description=description,
+                    recommended_activities=[],
+                    cautions=[],
+                )
             )
 
-    # Save Tourist Traps
+    # Tourist Traps
     for trap in insights.get("tourist_traps", []):
         if trap:
-            await TouristTrap.objects.acreate(
-                place=place,
-                name=trap[:200],  # First 200 chars as name
-                latitude=0.0,  # Default, can be enhanced later
-                longitude=0.0,
-                reason=trap,
+            related[TouristTrap].append(
+                TouristTrap(
+                    place=place,
+                    name=trap[:200],  # First 200 chars as name
+                    latitude=0.0,  # Default, can be enhanced later
+                    longitude=0.0,
+                    reason=trap,
+                )
             )
 
-    # Save Food Specialties
+    # Food Specialties
     for food in insights.get("food_specialties", []):
         if food:
-            await FoodSpecialty.objects.acreate(place=place, name=food)
+            related[FoodSpecialty].append(FoodSpecialty(place=place, name=food))
 
-    # Save Hidden Gems
+    # Hidden Gems
     for gem in insights.get("hidden_gems", []):
         if gem:
-            await HiddenGem.objects.acreate(
-                place=place, name=gem[:200], description=gem
+            related[HiddenGem].append(
+                HiddenGem(place=place, name=gem[:200], description=gem)
             )
 
-    # Save Day Activities
+    # Day Activities
     for activity in insights.get("day_activities", []):
         if activity.get("activity"):
-            await DayActivity.objects.acreate(
-                place=place,
-                activity=activity.get("activity", ""),
-                day_time=activity.get("day_time", ""),
-                time=activity.get("time", ""),
+            related[DayActivity].append(
+                DayActivity(
+                    place=place,
+                    activity=activity.get("activity", ""),
+                    day_time=activity.get("day_time", ""),
+                    time=activity.get("time", ""),
+                )
             )
 
-    # Save Things To Do
+    # Things To Do
     for activity_type, locations in insights.get("things_to_do", {}).items():
         for location_data in locations:
             if location_data.get("location"):
                 coords = location_data.get("coordinates", {})
-                await ThingToDo.objects.acreate(
-                    place=place,
-                    activity_type=activity_type,
-                    location=location_data.get("location", ""),
-                    time=location_data.get("time", ""),
-                    latitude=coords.get("lat"),
-                    longitude=coords.get("lng"),
+                related[ThingToDo].append(
+                    ThingToDo(
+                        place=place,
+                        activity_type=activity_type,
+                        location=location_data.get("location", ""),
+                        time=location_data.get("time", ""),
+                        latitude=coords.get("lat"),
+                        longitude=coords.get("lng"),
+                    )
                 )
 
-    logger.info(
-        f"Successfully {'created' if created else 'updated'} insights for Place: {place} (v{new_version})"
-    )
-    # Auto-fetch images for all places (main place, most famous place, famous places)
-    image_service = ImageService()
+    return related
+
+
+def _replace_related_data(place: Place, related: dict) -> None:
+    """
+    Delete a place's old related rows and bulk-insert the new ones atomically.
+
+    bulk_create sends no post_save, so in-process place caches are told
+    through place_data_replaced, and only once the new rows are committed.
+    """
+    with transaction.atomic():
+        for model, objects in related.items():
+            model.objects.filter(place=place).delete()
+            if objects:
+                model.objects.bulk_create(objects, batch_size=100)
+
+        transaction.on_commit(
+            lambda: place_data_replaced.send(sender=Place, place=place)
+        )
+
+
+async def _generate_insights(
+    place: Place,
+    city: str,
+    state: str,
+    country: str,
+    on_chunk: Optional[Callable[[str], None]] = None,
+):
+    """
+    Generate insights with Gemini unless a recent failure for this place is
+    still within its backoff window. Raises ValueError on failure.
+
+    With on_chunk, the response is streamed and each raw text chunk is
+    passed to it as it arrives.
+    """
+    place_hash = _place_hash(city, state, country)
+    blocked_key = f"insights:generation-blocked:{place_hash}"
+    failures_key = f"insights:generation-failures:{place_hash}"
+
+    if await cache.aget(blocked_key):
+        raise ValueError(
+            f"Insight generation for {place} failed recently - retry later"
+        )
 
     try:
-        # 1. Fetch image for main place (city/destination)
-        await image_service.populate_place_image(place)
+        gemini = Gemini(city, state, country)
+        if on_chunk is None:
+            parsed = await gemini.generate_place_insights()
+        else:
+            chunks = []
+            async for text in gemini.stream_place_insights():
+                chunks.append(text)
+                on_chunk(text)
+            parsed = _parse_and_validate_gemini_output("".join(chunks))
 
-        # 2. Fetch image for most famous place
-        await image_service.populate_most_famous_place_image(place)
+        if parsed is None:
+            raise ValueError(
+                f"Failed to generate insights for {place} - Gemini returned None or invalid data"
+            )
 
-        # 3. Fetch images for famous places (up to 5)
-        images_updated = await image_service.populate_famous_place_images(
-            place, limit=5
+    except ValueError:
+        failures = (await cache.aget(failures_key) or 0) + 1
+        backoff = min(
+            GENERATION_FAILURE_BACKOFF_SECONDS * 2 ** (failures - 1),
+            GENERATION_FAILURE_BACKOFF_MAX_SECONDS,
         )
-        logger.info(
-            f"Updated images: main place + most famous + {images_updated} famous places for {place}"
+        await cache.aset(failures_key, failures, GENERATION_FAILURE_BACKOFF_MAX_SECONDS)
+        await cache.aset(blocked_key, True, backoff)
+        logger.warning(
+            f"Insight generation for {place} failed ({failures}x); blocking retries for {backoff}s"
         )
-    except Exception as e:
-        logger.error(f"Error fetching images for {place}: {e}")
-        # Don't fail the entire operation if image fetching fails
+        raise
 
-    return place_insights
+    await cache.adelete(failures_key)
+    return parsed
+
+
+async def generate_and_save_insights(
+    place: Place,
+    city: str,
+    state: str,
+    country: str,
+    on_chunk: Optional[Callable[[str], None]] = None,
+) -> PlaceInsights:
+    """
+    Generate and persist insights for a place, coalescing concurrent calls
+    for the same place into a single run (singleflight).
+
+    on_chunk receives the raw Gemini text as it streams, but only when this
+    call starts the run; callers joining an in-flight run just get the result.
+    """
+    key = (place.city, place.state, place.country)
+    task = _inflight_generations.get(key)
+
+    # Tasks are bound to their event loop; only join runs on the current one
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+
+        async def run():
+            parsed = await _generate_insights(place, city, state, country, on_chunk)
+            return await save_generate_data(place, parsed)
+
+        task = asyncio.ensure_future(run())
+        _inflight_generations[key] = task
+
+        def release(done):
+            if _inflight_generations.get(key) is done:
+                del _inflight_generations[key]
+
+        task.add_done_callback(release)
+    else:
+        logger.info(f"Joining in-flight insight generation for {place}")
+
+    # Shield so a cancelled caller doesn't cancel the shared generation
+    return await asyncio.shield(task)
 
 
 async def fetch_or_generate_insights(
     city: str, state: str, country: str
 ) -> PlaceInsights:
+    city, state, country = city.strip(), state.strip(), country.strip()
     place, _ = await Place.objects.aget_or_create(
-        city=city.strip(), state=state.strip(), country=country.strip()
+        city=city, state=state, country=country
     )
 
     try:
@@ -202,14 +374,9 @@ async def fetch_or_generate_insights(
         if place_insights.expires_at < timezone.now() or place_insights.is_stale:
             logger.info(f"Insights for {place} are stale or expired. Regenerating...")
 
-            parsed = await Gemini(city, state, country).generate_place_insights()
-
-            if parsed is None:
-                raise ValueError(
-                    f"Failed to generate insights for {place} - Gemini returned None"
-                )
-
-            place_insights = await save_generate_data(place, parsed)
+            place_insights = await generate_and_save_insights(
+                place, city, state, country
+            )
 
         else:
             logger.info(f"Returning cached insights for {place}")
@@ -217,14 +384,7 @@ async def fetch_or_generate_insights(
     except PlaceInsights.DoesNotExist:
         logger.info(f"No insights found for {place}. Generating new AI insights...")
 
-        parsed = await Gemini(city, state, country).generate_place_insights()
-
-        if parsed is None:
-            raise ValueError(
-                f"Failed to generate insights for {place} - Gemini returned None or invalid data"
-            )
-
-        place_insights = await save_generate_data(place, parsed)
+        place_insights = await generate_and_save_insights(place, city, state, country)
 
     if place_insights is None:
         raise ValueError(f"Failed to create or retrieve insights for {place}")
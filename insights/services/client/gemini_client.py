@@ -1,24 +1,63 @@
+import asyncio
+import logging
+import weakref
+
 import google.genai as genai
+import httpx
 from django.conf import settings
-import logging
+from google.genai import types
 
 logger = logging.getLogger(__name__)
 
 class GeminiClient:
     _client = None
-    
+    # Async clients keyed by event loop: the underlying httpx.AsyncClient
+    # pools connections on the loop that opened them, so a client must not
+    # outlive or be shared across loops (async_to_sync, uvicorn --reload).
+    _async_clients: weakref.WeakKeyDictionary[
+        asyncio.AbstractEventLoop, genai.Client
+    ] = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def _create_client(cls, http_options=None):
+        try:
+            api_key = settings.GEMINI_API_KEY
+
+        except AttributeError:
+            raise RuntimeError("GEMINI_API_KEY not found in Django settings.")
+
+        return genai.Client(api_key=api_key, http_options=http_options)
+
     @classmethod
     def get_client(cls):
         """Lazy-load Gemini client instance."""
-        
+
         if cls._client is None:
-            try:
-                api_key = settings.GEMINI_API_KEY
-            
-            except AttributeError:
-                raise RuntimeError("GEMINI_API_KEY not found in Django settings.")
-            
-            cls._client = genai.Client(api_key=api_key)
+            cls._client = cls._create_client()
             logger.info("Gemini client initialized.")
-        
-        return cls._client
\ No newline at end of file
+
+        return cls._client
+
+    @classmethod
+    def get_async_client(cls):
+        """Lazy-load the Gemini client bound to the running event loop."""
+
+        loop = asyncio.get_running_loop()
+        client = cls._async_clients.get(loop)
+
+        if client is None:
+            # The SDK speaks HTTP/1.1, so each in-flight request needs its own
+            # connection; keep one warm per concurrency slot so bursts reuse
+            # connections instead of paying a new TLS handshake.
+            concurrency = settings.GEMINI_MAX_CONCURRENCY
+            limits = httpx.Limits(
+                max_connections=max(100, concurrency),
+                max_keepalive_connections=concurrency,
+            )
+            client = cls._create_client(
+                http_options=types.HttpOptions(async_client_args={"limits": limits})
+            )
+            cls._async_clients[loop] = client
+            logger.info("Gemini async client initialized for event loop.")
+
+        return client
@@ -1,32 +1,48 @@
-import json
+import asyncio
 import logging
+import math
+import re
+import weakref
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Optional
 
+import orjson
 from django.conf import settings
 from google.genai import errors
 from insights.services.client.gemini_client import GeminiClient
 
 logger = logging.getLogger(__name__)
 
-client = GeminiClient.get_client()
+GEMINI_MODEL = "gemini-2.5-flash"
 
+# Configure generation with sufficient output tokens. JSON mode makes the
+# model emit a bare JSON document (no markdown fences or prose).
+GENERATION_CONFIG = {
+    "max_output_tokens": 8192,  # Increase from default to prevent truncation
+    "temperature": 0.7,
+    "response_mime_type": "application/json",
+}
 
-class Gemini:
-    def __init__(self, city: str, state: str, country: str):
-        self.city = city
-        self.state = state
-        self.country = country
+# One semaphore per event loop: asyncio primitives are bound to the loop that
+# first waits on them, and sync callers run each request on a fresh loop.
+_gemini_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
 
-    def build_prompt(self) -> str:
-        """
-        Detailed prompt template for generating place insights using Gemini API.
-        """
-        place_name = (
-            f"{self.city}, {self.state}, {self.country}"
-            if self.state
-            else f"{self.city}, {self.country}"
-        )
 
-        prompt_template = f"""
+def _get_gemini_semaphore() -> asyncio.Semaphore:
+    """
+    Return the semaphore bounding concurrent Gemini calls on the running loop.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _gemini_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+        _gemini_semaphores[loop] = semaphore
+    return semaphore
+
+
+# Prompt pieces are built once at import. Header and tail are str.format
+# templates (literal braces doubled); the JSON schema body is used verbatim.
+_PROMPT_HEADER = """
         You are an expert travel guide with deep cultural, historical, and practical knowledge of travel destinations.
         Your task is to generate comprehensive, accurate, and complete insights about {place_name}.
 
@@ -40,98 +56,133 @@ class Gemini:
         8. You MUST include all major annual festivals, fairs, cultural events, or globally/nationally significant happenings the place is known for.
         9. If information is unavailable, use "N/A", an empty string "", or an empty list [] — do NOT skip known events.
         10. Be concise but informative. Avoid filler.
-        OUTPUT STRICT JSON STRUCTURE: {{
+"""
+
+_PROMPT_BODY = """        OUTPUT STRICT JSON STRUCTURE: {
             "main_quote": "Two words quote",
             "sub_quote": "Four words quote related to main_quote",
 
             "description": "A one-line 15–20 word description of the place.",
             
-            "visual_theme": {{
+            "visual_theme": {
                 "color": "Hex color code representing the city's visual theme (e.g., '#3B82F6' for blue skies, '#F59E0B' for golden/sunset, '#10B981' for nature/green, '#EF4444' for vibrant/red)",
                 "tags": "3-5 visual keywords separated by spaces (e.g., 'mountains sunset nature', 'modern architecture skyline', 'historic heritage golden')"
-            }},
+            },
 
-            "most_famous_place": {{
+            "most_famous_place": {
                 "name": "Landmark name",
                 "quote": "Four to six word quote about the place",
-                "coordinates": {{ "lat": 0.0, "lng": 0.0 }}
-            }},
+                "coordinates": { "lat": 0.0, "lng": 0.0 }
+            },
 
             "famous_places": [
-                {{
+                {
                     "name": "Place name",
                     "quote": "Four–five word quote about the place",
-                    "coordinates": {{ "lat": 0.0, "lng": 0.0 }}
-                }}
+                    "coordinates": { "lat": 0.0, "lng": 0.0 }
+                }
             ],
 
-            "famous_activities": {{
+            "famous_activities": {
                 "Activity name": "Time of day (e.g., Morning / Evening / All Day)"
-            }},
+            },
 
-            "things_to_do": {{
+            "things_to_do": {
                 "One word ActivityName ex. Hiking, Trekking etc": [
-                    {{
+                    {
                         "location": "Location name",
                         "time": "time",
-                        "coordinates": {{ "lat": 0.0, "lng": 0.0 }}
-                    }}
+                        "coordinates": { "lat": 0.0, "lng": 0.0 }
+                    }
                 ]
-            }},
+            },
 
             "food_specialties": ["Local dish name"],
 
             "tourist_traps": ["Description of trap area or situation"],
 
-            "seasonal_behavior": {{
+            "seasonal_behavior": {
                 "season": "Weather pattern or seasonal activity",
-            }},
+            },
 
             "day_activities": [
-                {{
+                {
                     "activity": "Activity name",
                     "day_time": "Specific time",
                     "time": "time range"
-                }}
+                }
             ],
 
             "hidden_gems": ["Lesser-known attraction or experience"],
             
-            "suggestion_pool": {{
-                "time_based": {{
+            "suggestion_pool": {
+                "time_based": {
                     "morning": ["Suggestion text"],
                     "afternoon": ["Suggestion text"],
                     "evening": ["Suggestion text"],
                     "night": ["Suggestion text"]
-                }},
+                },
 
                 "location_based": [
-                    {{
+                    {
                         "context": "Near ghats / landmarks / markets",
                         "suggestions": ["Suggestion text"]
-                    }}
+                    }
                 ],
 
-                "situation_based": {{
+                "situation_based": {
                     "crowded": ["Suggestion text"],
                     "quiet": ["Suggestion text"],
                     "tourist_heavy": ["Suggestion text"],
                     "local_area": ["Suggestion text"]
-                }},
+                },
 
                 "stuck_like_scenarios": [
-                    {{
+                    {
                         "scenario": "User stuck near tourist-heavy area with limited transport",
                         "suggestions": ["Suggestion text"]
-                    }}
+                    }
                 ]
-            }}
-        }}
+            }
+        }
 
-        Now generate the JSON for {place_name}.
+"""
+
+_PROMPT_TAIL = """        Now generate the JSON for {place_name}.
         """
 
-        return prompt_template
+
+@lru_cache(maxsize=1024)
+def _build_prompt(place_name: str) -> str:
+    """
+    Assemble the full prompt; only the head and tail mention the place.
+    """
+    return (
+        _PROMPT_HEADER.format(place_name=place_name)
+        + _PROMPT_BODY
+        + _PROMPT_TAIL.format(place_name=place_name)
+    )
+
+
+class Gemini:
+    __slots__ = ("city", "state", "country")
+
+    def __init__(self, city: str, state: str, country: str) -> None:
+        self.city = city
+        self.state = state
+        self.country = country
+
+    def build_prompt(self) -> str:
+        """
+        Detailed prompt template for generating place insights using Gemini API.
+        """
+        place_name = (
+            f"{self.city}, {self.state}, {self.country}"
+            if self.state
+            else f"{self.city}, {self.country}"
+        )
+
+        return _build_prompt(place_name)
 
     async def generate_place_insights(self) -> dict:
         """
@@ -144,15 +195,12 @@ class Gemini:
         prompt = self.build_prompt()
 
         try:
-            # Configure generation with sufficient output tokens
-            generation_config = {
-                "max_output_tokens": 8192,  # Increase from default to prevent truncation
-                "temperature": 0.7,
-            }
-
-            response = client.models.generate_content(
-                model="gemini-2.5-flash", contents=prompt, config=generation_config
-            )
+            # Bound in-flight requests; each completion frees a slot immediately
+            async with _get_gemini_semaphore():
+                client = GeminiClient.get_async_client()
+                response = await client.aio.models.generate_content(
+                    model=GEMINI_MODEL, contents=prompt, config=GENERATION_CONFIG
+                )
             if response.text:
                 parsed_data = _parse_and_validate_gemini_output(response.text)
                 if parsed_data is None:
@@ -173,7 +221,7 @@ class Gemini:
             )
             raise ValueError(f"Gemini API error: {str(e)}") from e
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"JSON parsing error for {self.city}, {self.country}: {e}")
             raise ValueError(f"Invalid JSON response from Gemini: {str(e)}") from e
 
@@ -185,139 +233,148 @@ class Gemini:
                 f"Unexpected error during insight generation: {str(e)}"
             ) from e
 
+    async def stream_place_insights(self) -> AsyncIterator[str]:
+        """
+        Stream the raw Gemini response text for this place as it is generated.
+        The caller is responsible for parsing the concatenated text.
+        Raises ValueError if the API call fails.
+        """
+        if not settings.GEMINI_API_KEY:
+            raise ValueError("Gemini API key is not configured in Django settings.")
 
-def _parse_and_validate_gemini_output(json_data) -> dict:
+        prompt = self.build_prompt()
+
+        try:
+            async with _get_gemini_semaphore():
+                client = GeminiClient.get_async_client()
+                stream = await client.aio.models.generate_content_stream(
+                    model=GEMINI_MODEL, contents=prompt, config=GENERATION_CONFIG
+                )
+                async for chunk in stream:
+                    if chunk.text:
+                        yield chunk.text
+
+        except errors.APIError as e:
+            logger.error(
+                f"Google API Error during Gemini stream for {self.city}, {self.state}, {self.country}: {e}"
+            )
+            raise ValueError(f"Gemini API error: {str(e)}") from e
+
+        except Exception as e:
+            logger.error(
+                f"An unexpected error occurred during Gemini stream for {self.city}, {self.state}, {self.country}: {e}"
+            )
+            raise ValueError(
+                f"Unexpected error during insight streaming: {str(e)}"
+            ) from e
+
+
+_SEASONS = ("spring", "summer", "autumn", "winter")
+
+# Leading ```json / ``` fence and trailing ``` fence, with surrounding whitespace
+_FENCE_RE = re.compile(r"\A\s*```(?:json)?\s*|\s*```\s*\Z")
+
+
+def _parse_and_validate_gemini_output(json_data: str) -> Optional[dict]:
     """
     Parses and validates Gemini output into a consistent, database-safe structure.
     """
     # Strip markdown code fences if present
-    json_str = json_data.strip()
-    if json_str.startswith("```json"):
-        json_str = json_str[7:]  # Remove ```json
-    if json_str.startswith("```"):
-        json_str = json_str[3:]  # Remove ```
-    if json_str.endswith("```"):
-        json_str = json_str[:-3]  # Remove trailing ```
-    json_str = json_str.strip()
+    json_str = _FENCE_RE.sub("", json_data)
 
     try:
-        data = json.loads(json_str)
-    except json.JSONDecodeError as e:
+        data = orjson.loads(json_str)
+    except orjson.JSONDecodeError as e:
         logger.error(f"JSON parse error: {e} | Raw: {json_str[:400]}")
         return None
 
-    place_data = {
-        "main_quote": "",
-        "sub_quote": "",
-        "description": "",
-        "most_famous_place": {
-            "name": "",
-            "quote": "",
-            "coordinates": {"lat": 0.0, "lng": 0.0},
-        },
-        "famous_places": [],
-        "famous_activities": {},
-        "things_to_do": {},
-        "food_specialties": [],
-        "tourist_traps": [],
-        "seasonal_behavior": {
-            "spring": "",
-            "summer": "",
-            "autumn": "",
-            "winter": "",
-        },
-        "day_activities": [],
-        "hidden_gems": [],
-    }
+    if not isinstance(data, dict):
+        logger.error(f"Unexpected JSON root type: {type(data).__name__}")
+        return None
 
-    place_data["main_quote"] = str(data.get("main_quote", ""))
-    place_data["sub_quote"] = str(data.get("sub_quote", ""))
-    place_data["description"] = str(data.get("description", ""))
+    get = data.get
 
-    mfp = data.get("most_famous_place", {})
+    mfp = get("most_famous_place")
     if isinstance(mfp, dict):
-        place_data["most_famous_place"]["name"] = mfp.get("name", "")
-        place_data["most_famous_place"]["quote"] = mfp.get("quote", "")
-
-        coords = mfp.get("coordinates", {})
-        place_data["most_famous_place"]["coordinates"] = {
-            "lat": float(coords.get("lat", 0.0) or 0.0),
-            "lng": float(coords.get("lng", 0.0) or 0.0),
+        most_famous_place = {
+            "name": mfp.get("name", ""),
+            "quote": mfp.get("quote", ""),
+            "coordinates": _parse_coordinates(mfp.get("coordinates")),
+        }
+    else:
+        most_famous_place = {
+            "name": "",
+            "quote": "",
+            "coordinates": {"lat": 0.0, "lng": 0.0},
         }
 
-    famous_places = []
-    for item in data.get("famous_places", []):
-        if not isinstance(item, dict):
-            continue
-
-        coords = item.get("coordinates", {})
-        famous_places.append(
-            {
-                "name": item.get("name", ""),
-                "quote": item.get("quote", ""),
-                "coordinates": {
-                    "lat": float(coords.get("lat", 0.0) or 0.0),
-                    "lng": float(coords.get("lng", 0.0) or 0.0),
-                },
-            }
-        )
-
-    place_data["famous_places"] = famous_places
-
-    fa = data.get("famous_activities", {})
-    place_data["famous_activities"] = fa if isinstance(fa, dict) else {}
+    famous_places = [
+        {
+            "name": item.get("name", ""),
+            "quote": item.get("quote", ""),
+            "coordinates": _parse_coordinates(item.get("coordinates")),
+        }
+        for item in _as_list(get("famous_places"))
+        if isinstance(item, dict)
+    ]
 
     ttd_clean = {}
-    ttd = data.get("things_to_do", {})
-
+    ttd = get("things_to_do")
     if isinstance(ttd, dict):
         for activity, locations in ttd.items():
-            safe_locations = []
-            if isinstance(locations, list):
-                for loc in locations:
-                    if not isinstance(loc, dict):
-                        continue
-
-                    coords = loc.get("coordinates", {})
-                    safe_locations.append(
-                        {
-                            "location": loc.get("location", ""),
-                            "time": loc.get("time", ""),
-                            "coordinates": {
-                                "lat": float(coords.get("lat", 0.0) or 0.0),
-                                "lng": float(coords.get("lng", 0.0) or 0.0),
-                            },
-                        }
-                    )
-            ttd_clean[activity] = safe_locations
+            ttd_clean[activity] = [
+                {
+                    "location": loc.get("location", ""),
+                    "time": loc.get("time", ""),
+                    "coordinates": _parse_coordinates(loc.get("coordinates")),
+                }
+                for loc in _as_list(locations)
+                if isinstance(loc, dict)
+            ]
+
+    sb = get("seasonal_behavior")
+    if not isinstance(sb, dict):
+        sb = {}
+
+    fa = get("famous_activities")
+
+    return {
+        "main_quote": str(get("main_quote", "")),
+        "sub_quote": str(get("sub_quote", "")),
+        "description": str(get("description", "")),
+        "most_famous_place": most_famous_place,
+        "famous_places": famous_places,
+        "famous_activities": fa if isinstance(fa, dict) else {},
+        "things_to_do": ttd_clean,
+        "food_specialties": _as_list(get("food_specialties")),
+        "tourist_traps": _as_list(get("tourist_traps")),
+        "seasonal_behavior": {season: str(sb.get(season, "")) for season in _SEASONS},
+        "day_activities": [
+            {"activity": entry.get("activity", ""), "time": entry.get("time", "")}
+            for entry in _as_list(get("day_activities"))
+            if isinstance(entry, dict)
+        ],
+        "hidden_gems": _as_list(get("hidden_gems")),
+    }
 
-    place_data["things_to_do"] = ttd_clean
 
-    place_data["food_specialties"] = (
-        data.get("food_specialties", [])
-        if isinstance(data.get("food_specialties"), list)
-        else []
-    )
-    place_data["tourist_traps"] = (
-        data.get("tourist_traps", [])
-        if isinstance(data.get("tourist_traps"), list)
-        else []
-    )
+def _as_list(value: Any) -> list:
+    return value if isinstance(value, list) else []
 
-    sb = data.get("seasonal_behavior", {})
-    for season in ["spring", "summer", "autumn", "winter"]:
-        place_data["seasonal_behavior"][season] = str(sb.get(season, ""))
 
-    day_clean = []
-    for entry in data.get("day_activities", []):
-        if isinstance(entry, dict):
-            day_clean.append(
-                {"activity": entry.get("activity", ""), "time": entry.get("time", "")}
-            )
-    place_data["day_activities"] = day_clean
+def _parse_coordinates(coords: Any) -> Dict[str, float]:
+    if not isinstance(coords, dict):
+        return {"lat": 0.0, "lng": 0.0}
+    return {
+        "lat": _to_float(coords.get("lat")),
+        "lng": _to_float(coords.get("lng")),
+    }
 
-    place_data["hidden_gems"] = (
-        data.get("hidden_gems", []) if isinstance(data.get("hidden_gems"), list) else []
-    )
 
-    return place_data
+def _to_float(value: Any) -> float:
+    # Missing, non-numeric and non-finite values all normalize to 0.0
+    try:
+        number = float(value or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+    return number if math.isfinite(number) else 0.0
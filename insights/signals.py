@@ -0,0 +1,4 @@
+from django.dispatch import Signal
+
+# Sent with the place once its regenerated related rows have been committed
+place_data_replaced = Signal()
@@ -1,7 +1,9 @@
+import asyncio
 import json
 from datetime import timedelta
 from unittest.mock import AsyncMock, Mock, patch
 
+from django.core.cache import cache
 from django.test import TestCase
 from django.utils import timezone
 from insights.models import (
@@ -19,6 +21,8 @@ from insights.models import (
 )
 from insights.services.cache_manager import (
     fetch_or_generate_insights,
+    generate_and_save_insights,
+    place_data_cache_key,
     save_generate_data,
 )
 from insights.services.gemini import Gemini, _parse_and_validate_gemini_output
@@ -101,6 +105,32 @@ class GeminiServiceTests(TestCase):
         self.assertEqual(parsed["main_quote"], "City Light")
         self.assertEqual(len(parsed["food_specialties"]), 3)
 
+    def test_parse_fenced_gemini_output(self):
+        """Test parsing AI response wrapped in markdown code fences"""
+        json_string = "```json\n" + json.dumps(self.sample_ai_response) + "\n```  \n"
+
+        parsed = _parse_and_validate_gemini_output(json_string)
+
+        self.assertIsInstance(parsed, dict)
+        self.assertEqual(parsed["main_quote"], "City Light")
+
+    def test_parse_malformed_coordinates(self):
+        """Test non-numeric coordinates normalize to 0.0 instead of failing"""
+        self.sample_ai_response["most_famous_place"]["coordinates"] = {
+            "lat": "unknown",
+            "lng": None,
+        }
+        self.sample_ai_response["famous_places"][0]["coordinates"] = "N/A"
+
+        parsed = _parse_and_validate_gemini_output(json.dumps(self.sample_ai_response))
+
+        self.assertEqual(
+            parsed["most_famous_place"]["coordinates"], {"lat": 0.0, "lng": 0.0}
+        )
+        self.assertEqual(
+            parsed["famous_places"][0]["coordinates"], {"lat": 0.0, "lng": 0.0}
+        )
+
     def test_parse_invalid_json(self):
         """Test parsing invalid JSON"""
         invalid_json = "{ invalid json here }"
@@ -115,9 +145,12 @@ class GeminiServiceTests(TestCase):
 
         self.assertIsNone(parsed)
 
-    @patch("insights.services.gemini.client.models.generate_content")
-    async def test_generate_place_insights_success(self, mock_generate):
+    @patch("insights.services.gemini.GeminiClient.get_async_client")
+    async def test_generate_place_insights_success(self, mock_get_client):
         """Test successful AI insight generation"""
+        mock_generate = mock_get_client.return_value.aio.models.generate_content = (
+            AsyncMock()
+        )
         mock_response = Mock()
         mock_response.text = json.dumps(self.sample_ai_response)
         mock_generate.return_value = mock_response
@@ -127,11 +160,14 @@ class GeminiServiceTests(TestCase):
         self.assertIsNotNone(result)
         self.assertEqual(result["main_quote"], "City Light")
 
-    @patch("insights.services.gemini.client.models.generate_content")
-    async def test_generate_place_insights_api_error(self, mock_generate):
+    @patch("insights.services.gemini.GeminiClient.get_async_client")
+    async def test_generate_place_insights_api_error(self, mock_get_client):
         """Test AI generation with API error"""
         from google.genai import errors
 
+        mock_generate = mock_get_client.return_value.aio.models.generate_content = (
+            AsyncMock()
+        )
         mock_generate.side_effect = Exception("API Error")
 
         result = await self.gemini.generate_place_insights()
@@ -249,6 +285,13 @@ class CacheManagerTests(TestCase):
         final_count = await FoodSpecialty.objects.filter(place=self.place).acount()
         self.assertEqual(final_count, 2)
 
+    def test_place_data_cache_key(self):
+        """Test cache key ignores surrounding whitespace and is place-specific"""
+        key = place_data_cache_key("Paris", "", "France")
+
+        self.assertEqual(key, place_data_cache_key(" Paris ", "", "France "))
+        self.assertNotEqual(key, place_data_cache_key("Paris", "", "USA"))
+
     async def test_save_generate_data_with_empty_insights(self):
         """Test saving with empty insights data"""
         await self.asyncSetUp()
@@ -303,6 +346,87 @@ class CacheManagerTests(TestCase):
         # Should call AI to generate new data
         mock_generate.assert_called_once()
 
+    @patch("insights.services.gemini.Gemini.generate_place_insights")
+    async def test_fetch_or_generate_backs_off_after_failure(self, mock_generate):
+        """Test a failed generation blocks immediate retries for the same place"""
+        await self.asyncSetUp()
+        await cache.aclear()
+
+        mock_generate.side_effect = ValueError("Gemini API error")
+
+        with self.assertRaises(ValueError):
+            await fetch_or_generate_insights(
+                city=self.place.city, state=self.place.state, country=self.place.country
+            )
+        with self.assertRaises(ValueError):
+            await fetch_or_generate_insights(
+                city=self.place.city, state=self.place.state, country=self.place.country
+            )
+
+        # Second request is rejected without calling Gemini again
+        mock_generate.assert_called_once()
+        await cache.aclear()
+
+    @patch("insights.services.gemini.GeminiClient.get_async_client")
+    async def test_stream_failure_backs_off(self, mock_get_client):
+        """Test an unexpected error mid-stream blocks immediate retries too"""
+        await self.asyncSetUp()
+        await cache.aclear()
+
+        async def broken_stream():
+            yield Mock(text='{"main_quote": ')
+            raise RuntimeError("connection reset")
+
+        mock_stream = (
+            mock_get_client.return_value.aio.models.generate_content_stream
+        ) = AsyncMock()
+        mock_stream.side_effect = lambda **kwargs: broken_stream()
+        chunks = []
+
+        with self.assertRaises(ValueError):
+            await generate_and_save_insights(
+                self.place, "Paris", "", "France", on_chunk=chunks.append
+            )
+        with self.assertRaises(ValueError):
+            await generate_and_save_insights(
+                self.place, "Paris", "", "France", on_chunk=chunks.append
+            )
+
+        # Second request is rejected without opening another stream
+        self.assertEqual(chunks, ['{"main_quote": '])
+        mock_stream.assert_called_once()
+        await cache.aclear()
+
+    @patch("insights.services.cache_manager.save_generate_data")
+    @patch("insights.services.gemini.Gemini.generate_place_insights")
+    async def test_fetch_or_generate_coalesces_concurrent_requests(
+        self, mock_generate, mock_save
+    ):
+        """Test concurrent cache misses for one place share a single generation"""
+        await self.asyncSetUp()
+
+        async def slow_generate():
+            await asyncio.sleep(0.05)
+            return self.insights_data
+
+        mock_generate.side_effect = slow_generate
+        mock_save.return_value = Mock(spec=PlaceInsights)
+
+        results = await asyncio.gather(
+            *[
+                fetch_or_generate_insights(
+                    city=self.place.city,
+                    state=self.place.state,
+                    country=self.place.country,
+                )
+                for _ in range(3)
+            ]
+        )
+
+        mock_generate.assert_called_once()
+        mock_save.assert_called_once()
+        self.assertEqual(len(results), 3)
+
 
 class PlaceModelTests(TestCase):
     """Test suite for Place and related models"""
@@ -373,3 +497,38 @@ class PlaceModelTests(TestCase):
 
         self.assertEqual(insights_count, 0)
         self.assertEqual(food_count, 0)
+
+
+class PlaceDataStreamViewTests(TestCase):
+    """Test suite for the place data SSE endpoint"""
+
+    url = "/api/insights/place-data/stream/?city=Paris&country=France"
+
+    def setUp(self):
+        """Clear cached place data"""
+        cache.clear()
+
+    def test_wsgi_falls_back_to_json(self):
+        """Test a WSGI request gets the JSON endpoint's response"""
+        cache.set(
+            place_data_cache_key("Paris", "", "France"), ('"1-v1"', {"city": "Paris"})
+        )
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(response["ETag"], '"1-v1"')
+        self.assertEqual(response.json(), {"city": "Paris"})
+
+    @patch("insights.views.generate_and_save_insights", new_callable=AsyncMock)
+    async def test_asgi_streams_events(self, mock_generate):
+        """Test an ASGI request is answered with an event stream"""
+        mock_generate.return_value = None
+
+        response = await self.async_client.get(self.url)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertTrue(body.startswith(b"event: error"))
+        mock_generate.assert_awaited_once()
@@ -1,11 +1,38 @@
-from asgiref.sync import async_to_sync
+import asyncio
+import logging
+
+import orjson
+from adrf.views import APIView
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Prefetch
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
-from insights.models import Place, PlaceInsights
+from django.utils import timezone
+from django.utils.cache import parse_etags
+from django.views import View
+from insights.models import MostFamousPlace, Place, PlaceInsights
 from insights.rest.serializers import CompletePlaceDataSerializer
-from insights.services.cache_manager import fetch_or_generate_insights
+from insights.services.cache_manager import (
+    fetch_or_generate_insights,
+    generate_and_save_insights,
+    place_data_cache_key,
+)
 from rest_framework import status
 from rest_framework.response import Response
-from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on how long a serialized response is cached; entries never
+# outlive the underlying PlaceInsights.expires_at
+PLACE_DATA_CACHE_SECONDS = 60 * 60 * 24
+
+# Streaming: upstream chunks longer than STREAM_PIECE_CHARS are re-sent as
+# pieces of that size, at most STREAM_PIECE_DELAY_SECONDS apart and spread
+# over no more than STREAM_MAX_SMOOTHING_SECONDS per upstream chunk
+STREAM_PIECE_CHARS = 32
+STREAM_PIECE_DELAY_SECONDS = 0.02
+STREAM_MAX_SMOOTHING_SECONDS = 0.5
 
 
 class CompletePlaceDataAPIView(APIView):
@@ -24,7 +51,7 @@ class CompletePlaceDataAPIView(APIView):
     GET /api/insights/place-data/?city=Mumbai&state=Maharashtra&country=India
     """
 
-    def get(self, request):
+    async def get(self, request):
         # Get required parameters
         city = request.query_params.get("city")
         country = request.query_params.get("country")
@@ -37,20 +64,44 @@ class CompletePlaceDataAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        cache_key = place_data_cache_key(city, state, country)
+        cached = await cache.aget(cache_key)
+
         # Fetch the complete place data
         try:
-            place_data = async_to_sync(self._get_complete_place_data)(
-                city, state, country
-            )
+            if cached is not None:
+                etag, data = cached
+            else:
+                place_data = await self._get_complete_place_data(city, state, country)
+
+                if not place_data:
+                    return Response(
+                        {"error": "Place data not found or could not be generated."},
+                        status=status.HTTP_404_NOT_FOUND,
+                    )
 
-            if not place_data:
+                data = CompletePlaceDataSerializer(place_data).data
+                insights = place_data["insights"]
+                etag = f'"{insights.id}-v{insights.version}"'
+
+                timeout = min(
+                    PLACE_DATA_CACHE_SECONDS,
+                    (insights.expires_at - timezone.now()).total_seconds(),
+                )
+                if timeout > 0:
+                    await cache.aset(cache_key, (etag, data), int(timeout))
+
+            # If-None-Match uses the weak comparison: W/ prefixes are ignored,
+            # and the header may list several tags or be "*"
+            client_etags = parse_etags(request.headers.get("If-None-Match", ""))
+            if "*" in client_etags or etag in (
+                client_etag.removeprefix("W/") for client_etag in client_etags
+            ):
                 return Response(
-                    {"error": "Place data not found or could not be generated."},
-                    status=status.HTTP_404_NOT_FOUND,
+                    status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
                 )
 
-            serializer = CompletePlaceDataSerializer(place_data)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return Response(data, status=status.HTTP_200_OK, headers={"ETag": etag})
 
         except Exception as e:
             import traceback
@@ -73,39 +124,157 @@ class CompletePlaceDataAPIView(APIView):
         if not insights:
             return None
 
-        # Fetch place with select_related to avoid sync queries
-        insights = await PlaceInsights.objects.select_related("place").aget(
-            id=insights.id
+        return await _load_place_data(insights.id)
+
+
+class CompletePlaceDataStreamView(View):
+    """
+    Server-Sent Events variant of CompletePlaceDataAPIView.
+
+    When insights have to be generated, the raw Gemini output is streamed
+    as `chunk` events while the model is still writing, followed by a
+    `complete` event carrying the same payload as the JSON endpoint.
+    Fresh cached insights are sent as a single `complete` event.
+    Failures are reported as an `error` event.
+
+    Streaming needs the ASGI server (see core/asgi.py). A WSGI server drains
+    the whole event stream before sending it, so there the request is
+    answered by CompletePlaceDataAPIView instead.
+
+    Example:
+    GET /api/insights/place-data/stream/?city=Paris&country=France
+    """
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return await CompletePlaceDataAPIView.as_view()(request)
+
+        city = request.GET.get("city")
+        country = request.GET.get("country")
+        state = request.GET.get("state", "")
+
+        if not city or not country:
+            return JsonResponse(
+                {"error": "Both 'city' and 'country' parameters are required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        city, state, country = city.strip(), state.strip(), country.strip()
+        response = StreamingHttpResponse(
+            self._stream_place_data(city, state, country),
+            content_type="text/event-stream",
         )
-        place = insights.place
-
-        # Fetch all related data
-        most_famous_place = await place.famous_places.afirst()  # MostFamousPlace
-        notable_places = [fp async for fp in place.notable_places.all()]  # FamousPlace
-        famous_activities = [
-            fa async for fa in place.notable_activities.all()
-        ]  # FamousActivity
-        day_activities = [da async for da in place.day_activities.all()]  # DayActivity
-        things_to_do = [ttd async for ttd in place.things_to_do.all()]  # ThingToDo
-        seasonal_insights = [
-            si async for si in place.seasonal_insights.all()
-        ]  # SeasonalInsights
-        tourist_traps = [tt async for tt in place.trap_areas.all()]  # TouristTrap
-        food_specialties = [
-            fs async for fs in place.food_specialties.all()
-        ]  # FoodSpecialty
-        hidden_gems = [hg async for hg in place.hidden_gems.all()]  # HiddenGem
-
-        return {
-            "place": place,
-            "insights": insights,
-            "most_famous_place": most_famous_place,
-            "famous_places": notable_places,
-            "famous_activities": famous_activities,
-            "day_activities": day_activities,
-            "things_to_do": things_to_do,
-            "seasonal_insights": seasonal_insights,
-            "tourist_traps": tourist_traps,
-            "food_specialties": food_specialties,
-            "hidden_gems": hidden_gems,
-        }
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # Disable proxy buffering
+        return response
+
+    async def _stream_place_data(self, city: str, state: str, country: str):
+        try:
+            place, _ = await Place.objects.aget_or_create(
+                city=city, state=state, country=country
+            )
+            insights = await PlaceInsights.objects.filter(
+                place=place, is_stale=False, expires_at__gt=timezone.now()
+            ).afirst()
+
+            if insights is None:
+                # Generate through the shared path, so concurrent requests and
+                # the failure backoff apply here too, and relay its chunks
+                chunks = asyncio.Queue()
+                generation = asyncio.ensure_future(
+                    generate_and_save_insights(
+                        place, city, state, country, on_chunk=chunks.put_nowait
+                    )
+                )
+                generation.add_done_callback(lambda _: chunks.put_nowait(None))
+
+                while (text := await chunks.get()) is not None:
+                    async for piece in _smooth_chunk(text):
+                        yield _sse_event("chunk", piece)
+
+                insights = await generation
+                if insights is None:
+                    raise ValueError(f"Failed to create insights for {place}")
+
+            place_data = await _load_place_data(insights.id)
+            yield _sse_event("complete", CompletePlaceDataSerializer(place_data).data)
+
+        except Exception:
+            logger.exception(f"Error streaming place data for {city}, {country}")
+            yield _sse_event(
+                "error", {"error": "Place data could not be generated right now."}
+            )
+
+
+async def _smooth_chunk(text: str):
+    """
+    Re-chunk an oversized upstream chunk into small, paced pieces so the
+    client renders steadily instead of freezing on one large burst. Pacing
+    per upstream chunk is capped so smoothing never adds much latency.
+    """
+    if len(text) <= STREAM_PIECE_CHARS:
+        yield text
+        return
+
+    pieces = range(0, len(text), STREAM_PIECE_CHARS)
+    delay = min(STREAM_PIECE_DELAY_SECONDS, STREAM_MAX_SMOOTHING_SECONDS / len(pieces))
+    for start in pieces:
+        yield text[start : start + STREAM_PIECE_CHARS]
+        await asyncio.sleep(delay)
+
+
+def _sse_event(event: str, data) -> bytes:
+    # JSON-encoding keeps newlines in the payload from breaking SSE framing
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+async def _load_place_data(insights_id):
+    """
+    Load an insight together with its place and all related collections.
+    """
+    # Fetch place and every related collection up front; prefetch_related
+    # issues one IN query per relation and caches the results on `place`
+    insights = (
+        await PlaceInsights.objects.select_related("place")
+        .prefetch_related(
+            Prefetch(
+                "place__famous_places",
+                queryset=MostFamousPlace.objects.order_by("pk"),
+            ),
+            "place__notable_places",
+            "place__notable_activities",
+            "place__day_activities",
+            "place__things_to_do",
+            "place__seasonal_insights",
+            "place__trap_areas",
+            "place__food_specialties",
+            "place__hidden_gems",
+        )
+        .aget(id=insights_id)
+    )
+    place = insights.place
+
+    # Read related data from the prefetch cache (no further queries)
+    most_famous_place = next(iter(place.famous_places.all()), None)
+    notable_places = list(place.notable_places.all())  # FamousPlace
+    famous_activities = list(place.notable_activities.all())  # FamousActivity
+    day_activities = list(place.day_activities.all())  # DayActivity
+    things_to_do = list(place.things_to_do.all())  # ThingToDo
+    seasonal_insights = list(place.seasonal_insights.all())  # SeasonalInsights
+    tourist_traps = list(place.trap_areas.all())  # TouristTrap
+    food_specialties = list(place.food_specialties.all())  # FoodSpecialty
+    hidden_gems = list(place.hidden_gems.all())  # HiddenGem
+
+    return {
+        "place": place,
+        "insights": insights,
+        "most_famous_place": most_famous_place,
+        "famous_places": notable_places,
+        "famous_activities": famous_activities,
+        "day_activities": day_activities,
+        "things_to_do": things_to_do,
+        "seasonal_insights": seasonal_insights,
+        "tourist_traps": tourist_traps,
+        "food_specialties": food_specialties,
+        "hidden_gems": hidden_gems,
+    }
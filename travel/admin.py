@@ -1,27 +1,54 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 from travel.models import Trip, TripMatch, LocationHistory, TripSuggestion, ActivityHotspot
 
 
+class TripChangeList(ChangeList):
+    """Changelist that only loads the columns the list actually renders"""
+
+    def get_queryset(self, request, exclude_parameters=None):
+        return super().get_queryset(request, exclude_parameters).only(
+            'id', 'origin', 'destination', 'start_date', 'end_date', 'is_active',
+            'privacy', 'created_at', 'user__email', 'user__first_name',
+        )
+
+
 @admin.register(Trip)
 class TripAdmin(admin.ModelAdmin):
     list_display = ['destination', 'user', 'start_date', 'end_date', 'is_active', 'privacy']
     list_filter = ['is_active', 'privacy', 'start_date']
     search_fields = ['destination', 'user__email']
+    list_select_related = ['user']
     readonly_fields = ['id', 'created_at', 'updated_at']
 
+    def get_changelist(self, request, **kwargs):
+        # The change form still uses the full get_queryset()
+        return TripChangeList
+
 
 @admin.register(TripMatch)
 class TripMatchAdmin(admin.ModelAdmin):
     list_display = ['trip', 'matched_user', 'score', 'status', 'current_distance_km', 'is_proximity_expired']
     list_filter = ['status', 'is_proximity_expired']
+    list_select_related = ['trip', 'trip__user', 'matched_user']
     readonly_fields = ['id', 'created_at']
 
+    def get_queryset(self, request):
+        # Rows only render the related trip through __str__, so skip its bulky
+        # columns; list_select_related already joins it in
+        return (
+            super()
+            .get_queryset(request)
+            .defer('trip__route_polyline', 'trip__description', 'trip__interests')
+        )
+
 
 @admin.register(LocationHistory)
 class LocationHistoryAdmin(admin.ModelAdmin):
     list_display = ['user', 'latitude', 'longitude', 'recorded_at', 'trip']
     list_filter = ['recorded_at', 'is_background']
     search_fields = ['user__email']
+    list_select_related = ['user', 'trip', 'trip__user']
     readonly_fields = ['id', 'created_at']
 
 
@@ -30,6 +57,7 @@ class TripSuggestionAdmin(admin.ModelAdmin):
     list_display = ['user', 'suggestion_type', 'title', 'is_read', 'hotspot_user_count', 'created_at']
     list_filter = ['suggestion_type', 'is_read', 'is_acted_upon', 'is_dismissed']
     search_fields = ['user__email', 'title', 'content']
+    list_select_related = ['user', 'trip']
     readonly_fields = ['id', 'created_at', 'updated_at']
 
 
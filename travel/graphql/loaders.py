@@ -0,0 +1,106 @@
+"""
+Per-request loaders for Travel GraphQL types
+Collapse repeated foreign key lookups into one query per related row
+"""
+
+from typing import Dict, Iterable, List, Optional, Set
+
+from django.db import models
+
+
+class ModelLoader:
+    """Identity map that loads rows of one model by primary key in batches"""
+
+    def __init__(self, model: type[models.Model]):
+        self.model = model
+        self._cache: Dict[object, Optional[models.Model]] = {}
+        self._pending: Set[object] = set()
+
+    def prime(self, instance: models.Model) -> None:
+        """Seed the loader with an instance that is already in memory"""
+        self._cache.setdefault(instance.pk, instance)
+
+    def queue(self, pks: Iterable[object]) -> None:
+        """Remember keys that will likely be asked for, to load them together"""
+        self._pending.update(pk for pk in pks if pk not in self._cache)
+
+    def load_many(self, pks: Iterable[object]) -> List[Optional[models.Model]]:
+        """Return instances for the given keys, querying only the unseen ones"""
+        pks = list(pks)
+        missing = {pk for pk in pks if pk not in self._cache}
+
+        if missing:
+            # Queued keys ride along with the first query that has to run
+            missing |= self._pending
+            self._pending.clear()
+            found = self.model._default_manager.in_bulk(missing)
+            for pk in missing:
+                self._cache[pk] = found.get(pk)
+
+        return [self._cache[pk] for pk in pks]
+
+    def load(self, pk: object) -> Optional[models.Model]:
+        """Return the instance for a single key"""
+        return self.load_many([pk])[0]
+
+
+def get_loader(info, model: type[models.Model]) -> ModelLoader:
+    """Return the loader for a model, scoped to the current request"""
+    loaders = getattr(info.context, "_travel_loaders", None)
+    if loaders is None:
+        loaders = {}
+        info.context._travel_loaders = loaders
+
+    if model not in loaders:
+        loaders[model] = ModelLoader(model)
+    return loaders[model]
+
+
+def load_related(info, instance: models.Model, field_name: str):
+    """
+    Resolve a forward foreign key through the request loader
+
+    Relations that the queryset already joined are returned as-is and used to
+    prime the loader, so sibling rows pointing at the same object reuse them.
+    """
+    descriptor = getattr(type(instance), field_name)
+    field = descriptor.field
+    loader = get_loader(info, field.related_model)
+
+    if descriptor.is_cached(instance):
+        related = getattr(instance, field_name)
+        if related is not None:
+            loader.prime(related)
+        return related
+
+    related_id = getattr(instance, field.attname)
+    if related_id is None:
+        return None
+
+    related = loader.load(related_id)
+    # Cache on the instance too so later attribute access stays free
+    descriptor.field.set_cached_value(instance, related)
+    return related
+
+
+def queue_related(info, instances: List[models.Model], *field_names: str):
+    """
+    Queue the foreign keys of a result list with the request loaders
+
+    The first row that resolves one of these relations then loads it for
+    every row in a single query. Returns the instances unchanged.
+    """
+    if not instances:
+        return instances
+
+    model = type(instances[0])
+    for field_name in field_names:
+        field = model._meta.get_field(field_name)
+        get_loader(info, field.related_model).queue(
+            related_id
+            for related_id in (
+                getattr(instance, field.attname) for instance in instances
+            )
+            if related_id is not None
+        )
+    return instances
@@ -4,6 +4,7 @@ GraphQL Types for Travel Location and Tracking
 
 import graphene
 from graphene_django import DjangoObjectType
+from travel.graphql.loaders import load_related
 from travel.models import LocationHistory
 
 
@@ -28,6 +29,12 @@ class LocationHistoryType(DjangoObjectType):
             "created_at",
         )
 
+    def resolve_user(self, info):
+        return load_related(info, self, "user")
+
+    def resolve_trip(self, info):
+        return load_related(info, self, "trip")
+
 
 class LocationPointType(graphene.ObjectType):
     """Simple location point for route display"""
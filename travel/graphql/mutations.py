@@ -3,9 +3,16 @@ GraphQL Mutations for Travel app
 All mutation definitions for trip operations
 """
 
+import functools
+import logging
+
 import graphene
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db import DataError, IntegrityError, transaction
+from django.db.models import F
 from django.utils import timezone
 from graphql_jwt.decorators import login_required
+from travel.graphql.loaders import queue_related
 from travel.graphql.location_types import LocationHistoryType
 from travel.graphql.types import TripMatchType, TripType
 from travel.models import Trip, TripMatch
@@ -15,6 +22,49 @@ from travel.services.matching import find_trip_matches
 from travel.services.proximity_matcher import ProximityMatcher
 from travel.services.suggestion_engine import SuggestionEngine
 
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_LOCATIONS = 1000
+
+
+def mutation_errors(action, not_found=None, **empty_fields):
+    """
+    Report the errors a mutation can hit as an unsuccessful payload
+
+    Args:
+        action: What the mutation was doing, as in "Error creating trip"
+        not_found: Message for a missing or foreign object; without it a
+            missing object is treated as an unexpected error
+        **empty_fields: Payload fields to send back on failure
+
+    Returns:
+        Decorator for a mutate classmethod
+    """
+    not_found_errors = ObjectDoesNotExist if not_found is not None else ()
+
+    def decorator(mutate):
+        @functools.wraps(mutate)
+        def wrapper(cls, root, info, **kwargs):
+            def failure(message):
+                return cls(success=False, message=message, **empty_fields)
+
+            try:
+                return mutate(cls, root, info, **kwargs)
+            except not_found_errors:
+                return failure(not_found)
+            except (DataError, IntegrityError) as e:
+                logger.warning("%s rejected by the database: %s", cls.__name__, e)
+                return failure(f"Error {action}: invalid input.")
+            except ValidationError as e:
+                return failure(f"Error {action}: {'; '.join(e.messages)}")
+            except Exception:
+                logger.exception("%s failed", cls.__name__)
+                return failure(f"Error {action}. Please try again.")
+
+        return wrapper
+
+    return decorator
+
 
 class CreateTripInput(graphene.InputObjectType):
     destination = graphene.String(required=True)
@@ -38,63 +88,47 @@ class CreateTrip(graphene.Mutation):
 
     @classmethod
     @login_required
+    @mutation_errors("creating trip", trip=None)
     def mutate(cls, root, info, input):
-        try:
-            user = info.context.user
-
-            # Validate dates
-            if input.start_date > input.end_date:
-                return CreateTrip(
-                    success=False,
-                    message="Start date must be before end date.",
-                    trip=None,
-                )
-
-            # Auto-set origin from user's current location
-            origin_name = "Current Location"
-            origin_lat = None
-            origin_lng = None
-
-            if (
-                hasattr(user, "profile")
-                and user.profile.latitude
-                and user.profile.longitude
-            ):
-                origin_lat = user.profile.latitude
-                origin_lng = user.profile.longitude
-                # Could reverse geocode here to get location name if needed
-
-            # Create trip
-            trip = Trip.objects.create(
-                user=user,
-                origin=origin_name,
-                destination=input.destination,
-                origin_lat=origin_lat,
-                origin_lng=origin_lng,
-                destination_lat=(
-                    input.destination_lat if hasattr(input, "destination_lat") else None
-                ),
-                destination_lng=(
-                    input.destination_lng if hasattr(input, "destination_lng") else None
-                ),
-                start_date=input.start_date,
-                end_date=input.end_date,
-                interests=input.interests if hasattr(input, "interests") else [],
-                description=input.description if hasattr(input, "description") else "",
-                max_companions=(
-                    input.max_companions if hasattr(input, "max_companions") else 0
-                ),
-                privacy=input.privacy if hasattr(input, "privacy") else "friends_only",
-            )
+        user = info.context.user
 
+        # Validate dates
+        if input.start_date > input.end_date:
             return CreateTrip(
-                success=True, message="Trip created successfully.", trip=trip
+                success=False,
+                message="Start date must be before end date.",
+                trip=None,
             )
 
-        except Exception as e:
-            return CreateTrip(
-                success=False, message=f"Error creating trip: {str(e)}", trip=None
-            )
+        # Auto-set origin from user's current location
+        origin_name = "Current Location"
+        origin_lat = None
+        origin_lng = None
+
+        profile = getattr(user, "profile", None)
+        if profile and profile.latitude and profile.longitude:
+            origin_lat = profile.latitude
+            origin_lng = profile.longitude
+            # Could reverse geocode here to get location name if needed
+
+        # Create trip
+        trip = Trip.objects.create(
+            user=user,
+            origin=origin_name,
+            destination=input.destination,
+            origin_lat=origin_lat,
+            origin_lng=origin_lng,
+            destination_lat=input.destination_lat,
+            destination_lng=input.destination_lng,
+            start_date=input.start_date,
+            end_date=input.end_date,
+            interests=input.interests or [],
+            description=input.description or "",
+            max_companions=input.max_companions or 0,
+            privacy=input.privacy or "friends_only",
+        )
+
+        return CreateTrip(success=True, message="Trip created successfully.", trip=trip)
 
 
 class UpdateTripInput(graphene.InputObjectType):
@@ -113,6 +147,23 @@ class UpdateTripInput(graphene.InputObjectType):
     privacy = graphene.String()
 
 
+UPDATABLE_TRIP_FIELDS = (
+    "origin",
+    "destination",
+    "origin_lat",
+    "origin_lng",
+    "destination_lat",
+    "destination_lng",
+    "start_date",
+    "end_date",
+    "interests",
+    "description",
+    "max_companions",
+    "privacy",
+)
+NON_BLANK_TRIP_FIELDS = ("origin", "destination")
+
+
 class UpdateTrip(graphene.Mutation):
     class Arguments:
         input = UpdateTripInput(required=True)
@@ -123,61 +174,41 @@ class UpdateTrip(graphene.Mutation):
 
     @classmethod
     @login_required
+    @mutation_errors(
+        "updating trip", not_found="Trip not found or unauthorized.", trip=None
+    )
     def mutate(cls, root, info, input):
-        try:
-            user = info.context.user
-
-            # Get trip
-            trip = Trip.objects.get(id=input.trip_id, user=user)
-
-            # Update fields if provided
-            if hasattr(input, "origin") and input.origin:
-                trip.origin = input.origin
-            if hasattr(input, "destination") and input.destination:
-                trip.destination = input.destination
-            if hasattr(input, "origin_lat"):
-                trip.origin_lat = input.origin_lat
-            if hasattr(input, "origin_lng"):
-                trip.origin_lng = input.origin_lng
-            if hasattr(input, "destination_lat"):
-                trip.destination_lat = input.destination_lat
-            if hasattr(input, "destination_lng"):
-                trip.destination_lng = input.destination_lng
-            if hasattr(input, "start_date") and input.start_date:
-                trip.start_date = input.start_date
-            if hasattr(input, "end_date") and input.end_date:
-                trip.end_date = input.end_date
-            if hasattr(input, "interests"):
-                trip.interests = input.interests
-            if hasattr(input, "description"):
-                trip.description = input.description
-            if hasattr(input, "max_companions"):
-                trip.max_companions = input.max_companions
-            if hasattr(input, "privacy"):
-                trip.privacy = input.privacy
-
-            # Validate dates if both are provided
-            if trip.start_date > trip.end_date:
-                return UpdateTrip(
-                    success=False,
-                    message="Start date must be before end date.",
-                    trip=None,
-                )
-
-            trip.save()
-
+        user = info.context.user
+
+        # Get trip
+        trip = Trip.objects.get(id=input.trip_id, user=user)
+
+        # Update fields if provided
+        updated_fields = []
+        for field in UPDATABLE_TRIP_FIELDS:
+            value = getattr(input, field, None)
+            if value is None or (value == "" and field in NON_BLANK_TRIP_FIELDS):
+                continue
+            setattr(trip, field, value)
+            updated_fields.append(field)
+
+        # Validate dates if both are provided
+        if trip.start_date > trip.end_date:
             return UpdateTrip(
-                success=True, message="Trip updated successfully.", trip=trip
+                success=False,
+                message="Start date must be before end date.",
+                trip=None,
             )
 
-        except Trip.DoesNotExist:
-            return UpdateTrip(
-                success=False, message="Trip not found or unauthorized.", trip=None
-            )
-        except Exception as e:
-            return UpdateTrip(
-                success=False, message=f"Error updating trip: {str(e)}", trip=None
-            )
+        if updated_fields:
+            trip.save(update_fields=[*updated_fields, "updated_at"])
+
+        # The database recomputes duration_days, but save() does not
+        # read generated columns back
+        if "start_date" in updated_fields or "end_date" in updated_fields:
+            trip.refresh_from_db(fields=["duration_days"])
+
+        return UpdateTrip(success=True, message="Trip updated successfully.", trip=trip)
 
 
 class DeleteTrip(graphene.Mutation):
@@ -189,20 +220,15 @@ class DeleteTrip(graphene.Mutation):
 
     @classmethod
     @login_required
+    @mutation_errors("deleting trip", not_found="Trip not found or unauthorized.")
     def mutate(cls, root, info, trip_id):
-        try:
-            user = info.context.user
-
-            # Get trip
-            trip = Trip.objects.get(id=trip_id, user=user)
-            trip.delete()
+        user = info.context.user
 
-            return DeleteTrip(success=True, message="Trip deleted successfully.")
+        # Get trip
+        trip = Trip.objects.get(id=trip_id, user=user)
+        trip.delete()
 
-        except Trip.DoesNotExist:
-            return DeleteTrip(success=False, message="Trip not found or unauthorized.")
-        except Exception as e:
-            return DeleteTrip(success=False, message=f"Error deleting trip: {str(e)}")
+        return DeleteTrip(success=True, message="Trip deleted successfully.")
 
 
 # =====================================================
@@ -223,51 +249,42 @@ class StartTrip(graphene.Mutation):
 
     @classmethod
     @login_required
+    @mutation_errors(
+        "starting trip",
+        not_found="Trip not found or unauthorized.",
+        trip=None,
+        matches_found=0,
+    )
     def mutate(cls, root, info, trip_id):
-        try:
-            user = info.context.user
-
-            # Get trip
-            trip = Trip.objects.get(id=trip_id, user=user)
-
-            # Check if already started
-            if trip.is_active:
-                return StartTrip(
-                    success=False,
-                    message="Trip is already active.",
-                    trip=trip,
-                    matches_found=0,
-                )
-
-            # Activate the trip
-            trip.is_active = True
-            trip.save()
+        user = info.context.user
 
-            # Automatically find matches
-            matches = find_trip_matches(trip, limit=20)
+        # Activate the trip in a single conditional UPDATE
+        activated = Trip.objects.filter(id=trip_id, user=user, is_active=False).update(
+            is_active=True, updated_at=timezone.now()
+        )
 
-            return StartTrip(
-                success=True,
-                message=f"Trip started successfully. Found {len(matches)} potential matches.",
-                trip=trip,
-                matches_found=len(matches),
-            )
+        # Get trip
+        trip = Trip.objects.get(id=trip_id, user=user)
 
-        except Trip.DoesNotExist:
-            return StartTrip(
-                success=False,
-                message="Trip not found or unauthorized.",
-                trip=None,
-                matches_found=0,
-            )
-        except Exception as e:
+        # Check if already started
+        if not activated:
             return StartTrip(
                 success=False,
-                message=f"Error starting trip: {str(e)}",
-                trip=None,
+                message="Trip is already active.",
+                trip=trip,
                 matches_found=0,
             )
 
+        # Automatically find matches
+        matches = find_trip_matches(trip, limit=20)
+
+        return StartTrip(
+            success=True,
+            message=f"Trip started successfully. Found {len(matches)} potential matches.",
+            trip=trip,
+            matches_found=len(matches),
+        )
+
 
 class EndTrip(graphene.Mutation):
     """End/deactivate a trip"""
@@ -281,43 +298,33 @@ class EndTrip(graphene.Mutation):
 
     @classmethod
     @login_required
+    @mutation_errors(
+        "ending trip", not_found="Trip not found or unauthorized.", trip=None
+    )
     def mutate(cls, root, info, trip_id):
-        try:
-            user = info.context.user
-
-            # Get trip
-            trip = Trip.objects.get(id=trip_id, user=user)
+        user = info.context.user
 
-            # Check if already ended
-            if not trip.is_active:
-                return EndTrip(
-                    success=False,
-                    message="Trip is already inactive.",
-                    trip=trip,
-                )
+        # Deactivate the trip in a single conditional UPDATE
+        deactivated = Trip.objects.filter(id=trip_id, user=user, is_active=True).update(
+            is_active=False, updated_at=timezone.now()
+        )
 
-            # Deactivate the trip
-            trip.is_active = False
-            trip.save()
+        # Get trip
+        trip = Trip.objects.get(id=trip_id, user=user)
 
+        # Check if already ended
+        if not deactivated:
             return EndTrip(
-                success=True,
-                message="Trip ended successfully.",
+                success=False,
+                message="Trip is already inactive.",
                 trip=trip,
             )
 
-        except Trip.DoesNotExist:
-            return EndTrip(
-                success=False,
-                message="Trip not found or unauthorized.",
-                trip=None,
-            )
-        except Exception as e:
-            return EndTrip(
-                success=False,
-                message=f"Error ending trip: {str(e)}",
-                trip=None,
-            )
+        return EndTrip(
+            success=True,
+            message="Trip ended successfully.",
+            trip=trip,
+        )
 
 
 class FindMatches(graphene.Mutation):
@@ -331,30 +338,23 @@ class FindMatches(graphene.Mutation):
 
     @classmethod
     @login_required
+    @mutation_errors(
+        "finding matches", not_found="Trip not found or unauthorized.", matches=[]
+    )
     def mutate(cls, root, info, trip_id, limit=10):
-        try:
-            user = info.context.user
+        user = info.context.user
 
-            # Get trip
-            trip = Trip.objects.get(id=trip_id, user=user)
+        # Get trip
+        trip = Trip.objects.get(id=trip_id, user=user)
 
-            # Find matches
-            matches = find_trip_matches(trip, limit=limit)
+        # Find matches
+        matches = find_trip_matches(trip, limit=limit)
 
-            return FindMatches(
-                success=True,
-                message=f"Found {len(matches)} matches.",
-                matches=matches,
-            )
-
-        except Trip.DoesNotExist:
-            return FindMatches(
-                success=False, message="Trip not found or unauthorized.", matches=[]
-            )
-        except Exception as e:
-            return FindMatches(
-                success=False, message=f"Error finding matches: {str(e)}", matches=[]
-            )
+        return FindMatches(
+            success=True,
+            message=f"Found {len(matches)} matches.",
+            matches=queue_related(info, matches, "matched_trip"),
+        )
 
 
 class AcceptMatch(graphene.Mutation):
@@ -367,39 +367,38 @@ class AcceptMatch(graphene.Mutation):
 
     @classmethod
     @login_required
+    @mutation_errors(
+        "accepting match",
+        not_found="Match not found or already processed.",
+        match=None,
+    )
     def mutate(cls, root, info, match_id):
-        try:
-            user = info.context.user
+        user = info.context.user
 
-            # Get match
-            match = TripMatch.objects.get(
+        with transaction.atomic():
+            # Lock the pending match so concurrent accepts serialize on it
+            match = TripMatch.objects.select_for_update(of=("self",)).get(
                 id=match_id, trip__user=user, status="pending"
             )
 
-            # Update status
-            match.status = "accepted"
-            match.save()
-
-            # Increment companions count
-            trip = match.trip
-            trip.current_companions += 1
-            trip.save()
-
-            return AcceptMatch(
-                success=True, message="Match accepted successfully.", match=match
+            now = timezone.now()
+            TripMatch.objects.filter(pk=match.pk).update(
+                status="accepted", updated_at=now
             )
 
-        except TripMatch.DoesNotExist:
-            return AcceptMatch(
-                success=False,
-                message="Match not found or already processed.",
-                match=None,
-            )
-        except Exception as e:
-            return AcceptMatch(
-                success=False, message=f"Error accepting match: {str(e)}", match=None
+            # Increment companions count atomically
+            Trip.objects.filter(pk=match.trip_id).update(
+                current_companions=F("current_companions") + 1,
+                updated_at=now,
             )
 
+        match.status = "accepted"
+        match.updated_at = now
+
+        return AcceptMatch(
+            success=True, message="Match accepted successfully.", match=match
+        )
+
 
 class RejectMatch(graphene.Mutation):
     class Arguments:
@@ -410,29 +409,21 @@ class RejectMatch(graphene.Mutation):
 
     @classmethod
     @login_required
+    @mutation_errors(
+        "rejecting match", not_found="Match not found or already processed."
+    )
     def mutate(cls, root, info, match_id):
-        try:
-            user = info.context.user
-
-            # Get match
-            match = TripMatch.objects.get(
-                id=match_id, trip__user=user, status="pending"
-            )
+        user = info.context.user
 
-            # Update status
-            match.status = "rejected"
-            match.save()
+        # Reject the match only if it is still pending
+        rejected = TripMatch.objects.filter(
+            id=match_id, trip__user=user, status="pending"
+        ).update(status="rejected", updated_at=timezone.now())
 
-            return RejectMatch(success=True, message="Match rejected successfully.")
+        if not rejected:
+            raise TripMatch.DoesNotExist
 
-        except TripMatch.DoesNotExist:
-            return RejectMatch(
-                success=False, message="Match not found or already processed."
-            )
-        except Exception as e:
-            return RejectMatch(
-                success=False, message=f"Error rejecting match: {str(e)}"
-            )
+        return RejectMatch(success=True, message="Match rejected successfully.")
 
 
 # =====================================================
@@ -454,6 +445,60 @@ class UpdateLocationInput(graphene.InputObjectType):
     recorded_at = graphene.DateTime()
 
 
+def process_location_update(
+    user, location, latitude, longitude, message="Location recorded successfully."
+):
+    """
+    Run the suggestion, hotspot and proximity checks for a recorded location
+
+    Args:
+        user: User whose location was recorded
+        location: The recorded LocationHistory point
+        latitude: Latitude of the point as float
+        longitude: Longitude of the point as float
+        message: Base response message to extend
+
+    Returns:
+        Response message summarising anything noteworthy
+    """
+    # Check for suggestions if trip is active
+    if location.trip and location.trip.is_active:
+        suggestion_engine = SuggestionEngine()
+        suggestion_engine.check_and_generate_suggestions(
+            user=user,
+            trip=location.trip,
+            latitude=latitude,
+            longitude=longitude,
+        )
+
+    # Check for activity hotspots and notify user
+    hotspot_detector = HotspotDetector(user)
+    # record_location already looked up the active trip, even when there is none
+    hotspot_detector.active_trip = location.trip
+    hotspot_notification = hotspot_detector.detect_and_notify(
+        latitude=latitude,
+        longitude=longitude,
+    )
+
+    # Update proximity for pending matches
+    proximity_stats = ProximityMatcher.update_match_distances(
+        user=user,
+        latitude=latitude,
+        longitude=longitude,
+    )
+
+    # Build response message with proximity info
+    if hotspot_notification:
+        message += " 🔥 Hotspot detected nearby!"
+    if proximity_stats["close_matches"]:
+        close_count = len(proximity_stats["close_matches"])
+        message += f" {close_count} match(es) nearby!"
+    if proximity_stats["expired_count"] > 0:
+        message += f" {proximity_stats['expired_count']} distant match(es) removed."
+
+    return message
+
+
 class UpdateLocation(graphene.Mutation):
     """Record user's current location"""
 
@@ -466,79 +511,108 @@ class UpdateLocation(graphene.Mutation):
 
     @classmethod
     @login_required
+    @mutation_errors("recording location", location=None)
     def mutate(cls, root, info, input):
-        try:
-            user = info.context.user
-
-            # Record location
-            location = LocationTracker.record_location(
-                user=user,
-                latitude=float(input.latitude),
-                longitude=float(input.longitude),
-                accuracy=input.accuracy if hasattr(input, "accuracy") else None,
-                altitude=input.altitude if hasattr(input, "altitude") else None,
-                speed=input.speed if hasattr(input, "speed") else None,
-                heading=input.heading if hasattr(input, "heading") else None,
-                is_background=(
-                    input.is_background if hasattr(input, "is_background") else False
-                ),
-                battery_level=(
-                    input.battery_level if hasattr(input, "battery_level") else None
-                ),
-                recorded_at=(
-                    input.recorded_at if hasattr(input, "recorded_at") else None
-                ),
-            )
+        user = info.context.user
+        latitude = float(input.latitude)
+        longitude = float(input.longitude)
+
+        # Record location
+        location = LocationTracker.record_location(
+            user=user,
+            latitude=latitude,
+            longitude=longitude,
+            accuracy=input.accuracy,
+            altitude=input.altitude,
+            speed=input.speed,
+            heading=input.heading,
+            is_background=input.is_background or False,
+            battery_level=input.battery_level,
+            recorded_at=input.recorded_at,
+        )
+
+        message = process_location_update(user, location, latitude, longitude)
+
+        return UpdateLocation(
+            success=True,
+            message=message,
+            location=location,
+        )
+
+
+class BatchUpdateLocation(graphene.Mutation):
+    """Record a batch of buffered location points in one request"""
 
-            # Check for suggestions if trip is active
-            if location.trip and location.trip.is_active:
-                suggestion_engine = SuggestionEngine()
-                suggestion_engine.check_and_generate_suggestions(
-                    user=user,
-                    trip=location.trip,
-                    latitude=float(input.latitude),
-                    longitude=float(input.longitude),
-                )
-
-            # Check for activity hotspots and notify user
-            hotspot_detector = HotspotDetector(user)
-            hotspot_notification = hotspot_detector.detect_and_notify(
-                latitude=float(input.latitude),
-                longitude=float(input.longitude),
-            )
+    class Arguments:
+        inputs = graphene.List(graphene.NonNull(UpdateLocationInput), required=True)
+
+    success = graphene.Boolean()
+    message = graphene.String()
+    locations = graphene.List(LocationHistoryType)
 
-            # Update proximity for pending matches
-            proximity_stats = ProximityMatcher.update_match_distances(
-                user=user,
-                latitude=float(input.latitude),
-                longitude=float(input.longitude),
+    @classmethod
+    @login_required
+    @mutation_errors("recording locations", locations=[])
+    def mutate(cls, root, info, inputs):
+        user = info.context.user
+
+        if not inputs:
+            return BatchUpdateLocation(
+                success=False, message="No locations provided.", locations=[]
             )
 
-            # Build response message with proximity info
-            message = "Location recorded successfully."
-            if hotspot_notification:
-                message += " 🔥 Hotspot detected nearby!"
-            if proximity_stats["close_matches"]:
-                close_count = len(proximity_stats["close_matches"])
-                message += f" {close_count} match(es) nearby!"
-            if proximity_stats["expired_count"] > 0:
-                message += (
-                    f" {proximity_stats['expired_count']} distant match(es) removed."
-                )
-
-            return UpdateLocation(
-                success=True,
-                message=message,
-                location=location,
+        if len(inputs) > MAX_BATCH_LOCATIONS:
+            return BatchUpdateLocation(
+                success=False,
+                message=f"At most {MAX_BATCH_LOCATIONS} locations can be sent at once.",
+                locations=[],
             )
 
-        except Exception as e:
-            return UpdateLocation(
+        # Buffered points are ordered by when they were taken, so each
+        # one has to say when that was
+        if any(point.recorded_at is None for point in inputs):
+            return BatchUpdateLocation(
                 success=False,
-                message=f"Error recording location: {str(e)}",
-                location=None,
+                message="Every batched location needs recorded_at.",
+                locations=[],
             )
 
+        # Record all points with a single INSERT
+        locations = LocationTracker.record_locations(
+            user=user,
+            points=[
+                {
+                    "latitude": float(point.latitude),
+                    "longitude": float(point.longitude),
+                    "accuracy": point.accuracy,
+                    "altitude": point.altitude,
+                    "speed": point.speed,
+                    "heading": point.heading,
+                    "is_background": point.is_background or False,
+                    "battery_level": point.battery_level,
+                    "recorded_at": point.recorded_at,
+                }
+                for point in inputs
+            ],
+        )
+
+        # Only the latest position matters for the analysis side effects;
+        # record_locations returns the points oldest first
+        latest = locations[-1]
+        message = process_location_update(
+            user,
+            latest,
+            float(latest.latitude),
+            float(latest.longitude),
+            message=f"{len(locations)} locations recorded successfully.",
+        )
+
+        return BatchUpdateLocation(
+            success=True,
+            message=message,
+            locations=locations,
+        )
+
 
 # =====================================================
 # Mutation Collection
@@ -564,3 +638,4 @@ class TravelMutations(graphene.ObjectType):
 
     # Location tracking
     update_location = UpdateLocation.Field()
+    batch_update_location = BatchUpdateLocation.Field()
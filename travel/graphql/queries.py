@@ -4,19 +4,63 @@ All query definitions for trip operations
 """
 
 import graphene
-from django.db.models import Q
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.utils import timezone
+from graphene.utils.str_converters import to_snake_case
+from graphql.language import FieldNode
 from graphql_jwt.decorators import login_required
+from travel.graphql.loaders import get_loader, queue_related
 from travel.graphql.location_types import LocationHistoryType
-from travel.graphql.suggestion_types import ActivityHotspotType, TripSuggestionType
+from travel.graphql.suggestion_types import (
+    ACTIVITY_HOTSPOT_FIELDS,
+    ActivityHotspotType,
+    TripSuggestionType,
+)
 from travel.graphql.types import TripMatchType, TripType
 from travel.models import (
+    HOTSPOT_CACHE_VERSION_KEY,
     ActivityHotspot,
+    HotspotMembership,
     LocationHistory,
     Trip,
     TripMatch,
     TripSuggestion,
+    hotspot_version_keys,
 )
+from travel.services.geo import filter_within_radius
+
+User = get_user_model()
+
+HOTSPOT_CACHE_TIMEOUT = 45  # seconds
+MAX_LOCATION_HISTORY_PAGE = 1000
+
+
+# Bulky Trip columns worth skipping when the client does not ask for them
+HEAVY_TRIP_FIELDS = ("route_polyline", "description", "interests")
+
+
+def _unselected_heavy_trip_fields(info):
+    """Return the heavy Trip columns absent from the current GraphQL selection"""
+    selected = set()
+    for field_node in info.field_nodes:
+        if field_node.selection_set is None:
+            continue
+        for selection in field_node.selection_set.selections:
+            # Fragments would need resolving against the schema; load everything
+            if not isinstance(selection, FieldNode):
+                return ()
+            selected.add(to_snake_case(selection.name.value))
+
+    return tuple(field for field in HEAVY_TRIP_FIELDS if field not in selected)
+
+
+def _user_trips(info, **filters):
+    """Trips owned by the requesting user, loading only the columns queried"""
+    get_loader(info, User).prime(info.context.user)
+    return Trip.objects.filter(user=info.context.user, **filters).defer(
+        *_unselected_heavy_trip_fields(info)
+    )
 
 
 class TravelQueries(graphene.ObjectType):
@@ -70,7 +114,10 @@ class TravelQueries(graphene.ObjectType):
     trip_location_history = graphene.List(
         LocationHistoryType,
         trip_id=graphene.UUID(required=True),
-        description="Get location history for a specific trip",
+        since=graphene.DateTime(),
+        limit=graphene.Int(),
+        offset=graphene.Int(),
+        description="Get location history for a specific trip, oldest first",
     )
 
     # ==================== Trip Resolvers ====================
@@ -78,7 +125,7 @@ class TravelQueries(graphene.ObjectType):
     @login_required
     def resolve_my_trips(self, info):
         """Return all trips for authenticated user"""
-        return Trip.objects.filter(user=info.context.user)
+        return _user_trips(info)
 
     @login_required
     def resolve_trip_by_id(self, info, trip_id):
@@ -92,23 +139,19 @@ class TravelQueries(graphene.ObjectType):
     def resolve_upcoming_trips(self, info):
         """Return upcoming trips (start date in the future)"""
         today = timezone.now().date()
-        return Trip.objects.filter(user=info.context.user, start_date__gt=today)
+        return _user_trips(info, start_date__gt=today)
 
     @login_required
     def resolve_past_trips(self, info):
         """Return past/completed trips"""
         today = timezone.now().date()
-        return Trip.objects.filter(user=info.context.user, end_date__lt=today)
+        return _user_trips(info, end_date__lt=today)
 
     @login_required
     def resolve_active_trips(self, info):
         """Return currently ongoing trips"""
         today = timezone.now().date()
-        return Trip.objects.filter(
-            user=info.context.user,
-            start_date__lte=today,
-            end_date__gte=today,
-        )
+        return _user_trips(info, start_date__lte=today, end_date__gte=today)
 
     # ==================== Match Resolvers ====================
 
@@ -117,12 +160,12 @@ class TravelQueries(graphene.ObjectType):
         """Return matches for a specific trip"""
         try:
             trip = Trip.objects.get(id=trip_id, user=info.context.user)
-            matches = TripMatch.objects.filter(trip=trip)
+            matches = TripMatch.objects.filter(trip=trip).select_related("matched_user")
 
             if status:
                 matches = matches.filter(status=status)
 
-            return matches
+            return queue_related(info, list(matches), "matched_trip")
 
         except Trip.DoesNotExist:
             return []
@@ -130,8 +173,10 @@ class TravelQueries(graphene.ObjectType):
     @login_required
     def resolve_my_pending_matches(self, info):
         """Return all pending matches for user's trips"""
-        user_trips = Trip.objects.filter(user=info.context.user)
-        return TripMatch.objects.filter(trip__in=user_trips, status="pending")
+        matches = TripMatch.objects.filter(
+            trip__user=info.context.user, status="pending"
+        ).select_related("trip", "trip__user", "matched_user")
+        return queue_related(info, list(matches), "matched_trip")
 
     # ==================== Suggestion Resolvers ====================
 
@@ -141,6 +186,7 @@ class TravelQueries(graphene.ObjectType):
     ):
         """Return AI suggestions for user's trips"""
         suggestions = TripSuggestion.objects.filter(user=info.context.user)
+        get_loader(info, User).prime(info.context.user)
 
         if trip_id:
             suggestions = suggestions.filter(trip_id=trip_id)
@@ -151,7 +197,7 @@ class TravelQueries(graphene.ObjectType):
         if unread_only:
             suggestions = suggestions.filter(is_read=False)
 
-        return suggestions.order_by("-created_at")
+        return queue_related(info, list(suggestions.order_by("-created_at")), "trip")
 
     # ==================== Hotspot Resolvers ====================
 
@@ -160,32 +206,70 @@ class TravelQueries(graphene.ObjectType):
         self, info, latitude=None, longitude=None, radius_km=10.0
     ):
         """Return active hotspots, optionally filtered by proximity"""
-        now = timezone.now()
-        hotspots = ActivityHotspot.objects.filter(expires_at__gte=now)
-
-        # If location provided, filter by distance
-        if latitude and longitude:
-            # Simple bounding box filter (good enough for small distances)
-            # 1 degree ≈ 111km
-            lat_delta = radius_km / 111.0
-            lng_delta = radius_km / (111.0 * abs(float(latitude)))
-
-            hotspots = hotspots.filter(
-                latitude__gte=float(latitude) - lat_delta,
-                latitude__lte=float(latitude) + lat_delta,
-                longitude__gte=float(longitude) - lng_delta,
-                longitude__lte=float(longitude) + lng_delta,
+        # Nearby users share a ~110m cell, so they also share the cached result
+        if latitude is not None and longitude is not None:
+            latitude = round(float(latitude), 3)
+            longitude = round(float(longitude), 3)
+            cache_key = f"hotspots:{latitude}:{longitude}:{radius_km:g}"
+            version_keys = hotspot_version_keys(latitude, longitude, radius_km)
+        else:
+            cache_key = "hotspots:all"
+            version_keys = [HOTSPOT_CACHE_VERSION_KEY]
+
+        # A hotspot change only retires lookups whose regions it falls in
+        versions = cache.get_many(version_keys)
+        stamp = tuple(versions.get(key, "0") for key in version_keys)
+
+        cached = cache.get(cache_key)
+        if cached is not None and cached[0] == stamp:
+            hotspots = cached[1]
+        else:
+            hotspots = ActivityHotspot.objects.filter(expires_at__gte=timezone.now())
+
+            # If location provided, filter by distance
+            if latitude is not None and longitude is not None:
+                hotspots = filter_within_radius(
+                    hotspots, latitude, longitude, radius_km
+                )
+
+            hotspots = list(
+                hotspots.order_by("-user_count", "-last_activity").values(
+                    *ACTIVITY_HOTSPOT_FIELDS
+                )
             )
 
-        return hotspots.order_by("-user_count", "-last_activity")
+            # Member ids for every hotspot on the page in one query
+            members = {}
+            for hotspot_id, user_id in HotspotMembership.objects.filter(
+                hotspot_id__in=[hotspot["id"] for hotspot in hotspots]
+            ).values_list("hotspot_id", "user_id"):
+                members.setdefault(hotspot_id, []).append(str(user_id))
+            for hotspot in hotspots:
+                hotspot["active_users"] = members.get(hotspot["id"], [])
+
+            cache.set(cache_key, (stamp, hotspots), HOTSPOT_CACHE_TIMEOUT)
+
+        return hotspots
 
     # ==================== Location History Resolvers ====================
 
     @login_required
-    def resolve_trip_location_history(self, info, trip_id):
-        """Return location history for a specific trip"""
-        try:
-            trip = Trip.objects.get(id=trip_id, user=info.context.user)
-            return LocationHistory.objects.filter(trip=trip).order_by("recorded_at")
-        except Trip.DoesNotExist:
-            return []
+    def resolve_trip_location_history(
+        self, info, trip_id, since=None, limit=None, offset=None
+    ):
+        """Return a page of location history for a specific trip"""
+        points = LocationHistory.objects.filter(
+            trip_id=trip_id, trip__user=info.context.user
+        )
+        if since:
+            points = points.filter(recorded_at__gt=since)
+
+        # Cap the page so long trips never materialize every point at once
+        if limit is None:
+            limit = MAX_LOCATION_HISTORY_PAGE
+        limit = max(0, min(limit, MAX_LOCATION_HISTORY_PAGE))
+        offset = max(0, offset or 0)
+
+        # Every point belongs to the requesting user; serve it without a JOIN
+        get_loader(info, User).prime(info.context.user)
+        return points.order_by("recorded_at")[offset : offset + limit]
@@ -3,8 +3,10 @@ GraphQL Types for Trip Suggestions and Hotspots
 """
 
 import graphene
+from django.utils import timezone
 from graphene_django import DjangoObjectType
-from travel.models import ActivityHotspot, TripSuggestion
+from travel.graphql.loaders import load_related
+from travel.models import TripSuggestion
 
 
 class TripSuggestionType(DjangoObjectType):
@@ -34,26 +36,50 @@ class TripSuggestionType(DjangoObjectType):
             "updated_at",
         )
 
+    def resolve_user(self, info):
+        return load_related(info, self, "user")
 
-class ActivityHotspotType(DjangoObjectType):
-    """Activity hotspot type"""
+    def resolve_trip(self, info):
+        return load_related(info, self, "trip")
 
-    class Meta:
-        model = ActivityHotspot
-        fields = (
-            "id",
-            "latitude",
-            "longitude",
-            "place_name",
-            "related_place_id",
-            "user_count",
-            "active_users",
-            "first_detected",
-            "last_activity",
-            "expires_at",
-        )
 
+# Columns read by ActivityHotspotType; resolvers fetch exactly these via values()
+# and add active_users from the memberships
+ACTIVITY_HOTSPOT_FIELDS = (
+    "id",
+    "latitude",
+    "longitude",
+    "place_name",
+    "related_place_id",
+    "user_count",
+    "first_detected",
+    "last_activity",
+    "expires_at",
+)
+
+
+class ActivityHotspotType(graphene.ObjectType):
+    """Activity hotspot type, resolved from plain values() rows"""
+
+    id = graphene.UUID(required=True)
+    latitude = graphene.Decimal(required=True)
+    longitude = graphene.Decimal(required=True)
+    place_name = graphene.String(
+        required=True, description="Name of the place (matched from insights DB)"
+    )
+    related_place_id = graphene.UUID(
+        description="ID of related place from insights app"
+    )
+    user_count = graphene.Int(required=True)
+    active_users = graphene.JSONString(
+        required=True, description="List of user IDs currently at this location"
+    )
+    first_detected = graphene.DateTime(required=True)
+    last_activity = graphene.DateTime(required=True)
+    expires_at = graphene.DateTime(
+        required=True, description="When this hotspot expires if no activity"
+    )
     is_expired = graphene.Boolean()
 
     def resolve_is_expired(self, info):
-        return self.is_expired
+        return timezone.now() > self["expires_at"]
@@ -4,11 +4,22 @@ All DjangoObjectType definitions
 """
 
 import graphene
+from django.utils import timezone
 from graphene_django import DjangoObjectType
+from travel.graphql.loaders import load_related
 from travel.models import Trip, TripMatch
 from user.graphql.types import UserType
 
 
+def _request_today(info):
+    """Today's date, read from the clock once per request"""
+    today = getattr(info.context, "_travel_today", None)
+    if today is None:
+        today = timezone.now().date()
+        info.context._travel_today = today
+    return today
+
+
 class TripType(DjangoObjectType):
     """Trip type for travel planning"""
 
@@ -39,11 +50,11 @@ class TripType(DjangoObjectType):
     is_upcoming = graphene.Boolean()
     is_active = graphene.Boolean()
 
-    def resolve_duration_days(self, info):
-        return self.duration_days
+    def resolve_user(self, info):
+        return load_related(info, self, "user")
 
     def resolve_is_upcoming(self, info):
-        return self.is_upcoming
+        return self.start_date > _request_today(info)
 
     def resolve_is_active(self, info):
         return self.is_active
@@ -69,5 +80,11 @@ class TripMatchType(DjangoObjectType):
 
     matched_user = graphene.Field(UserType)
 
+    def resolve_trip(self, info):
+        return load_related(info, self, "trip")
+
     def resolve_matched_user(self, info):
-        return self.matched_user
+        return load_related(info, self, "matched_user")
+
+    def resolve_matched_trip(self, info):
+        return load_related(info, self, "matched_trip")
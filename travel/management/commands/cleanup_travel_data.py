@@ -0,0 +1,43 @@
+"""
+Django management command to delete expired travel data
+
+Meant to run from cron or another scheduler, e.g. every 5 minutes, so the
+location update path never has to clean up after itself.
+
+Usage:
+    python manage.py cleanup_travel_data
+    python manage.py cleanup_travel_data --location-days 30
+"""
+
+from django.core.management.base import BaseCommand
+from travel.services.hotspot_detector import HotspotDetector
+from travel.services.location_tracker import LocationTracker
+
+
+class Command(BaseCommand):
+    help = "Delete expired activity hotspots and old location history"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--location-days",
+            type=int,
+            default=90,
+            help="Days of location history to keep",
+        )
+        parser.add_argument(
+            "--hotspots-only",
+            action="store_true",
+            help="Only delete expired hotspots",
+        )
+
+    def handle(self, *args, **options):
+        hotspots = HotspotDetector.cleanup_expired_hotspots()
+        self.stdout.write(self.style.SUCCESS(f"✓ Deleted {hotspots} expired hotspots"))
+
+        if not options["hotspots_only"]:
+            locations = LocationTracker.cleanup_old_locations(
+                days=options["location_days"]
+            )
+            self.stdout.write(
+                self.style.SUCCESS(f"✓ Deleted {locations} old location records")
+            )
@@ -11,9 +11,12 @@ from datetime import timedelta
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from travel.models import Trip
-from travel.services.matching import find_trip_matches
+from travel.services.matching import find_matches_for_trips
 from user.models import User
 
+# Trips buffered before each bulk insert when streaming users
+TRIP_FLUSH_SIZE = 1000
+
 
 class Command(BaseCommand):
     help = "Create test trips for users to test matching and hotspot features"
@@ -64,24 +67,34 @@ class Command(BaseCommand):
         users = []
 
         if options["user_emails"]:
+            users_by_email = {
+                user.email: user
+                for user in User.objects.filter(
+                    email__in=options["user_emails"]
+                ).select_related("profile")
+            }
             for email in options["user_emails"]:
-                try:
-                    user = User.objects.get(email=email)
-                    users.append(user)
-                except User.DoesNotExist:
+                if email in users_by_email:
+                    users.append(users_by_email[email])
+                else:
                     self.stdout.write(self.style.WARNING(f"User not found: {email}"))
+
+            if not users:
+                self.stdout.write(self.style.ERROR("No users found"))
+                return
         elif options["all_users"]:
-            users = User.objects.all()
+            # Stream users with just the columns a trip needs
+            users = (
+                User.objects.select_related("profile")
+                .only("id", "email", "profile__latitude", "profile__longitude")
+                .iterator(chunk_size=2000)
+            )
         else:
             self.stdout.write(
                 self.style.ERROR("Must specify either --user-emails or --all-users")
             )
             return
 
-        if not users:
-            self.stdout.write(self.style.ERROR("No users found"))
-            return
-
         # Set trip dates
         if options["start_now"]:
             start_date = timezone.now().date()
@@ -95,50 +108,64 @@ class Command(BaseCommand):
         )
         self.stdout.write(f"📅 {start_date} → {end_date}\n")
 
+        status = "🟢 ACTIVE" if options["start_now"] else "⏸️  INACTIVE"
         trips_created = 0
+        started_trips = []
+        pending = []
 
         for user in users:
             # Check if user already has profile with location
-            if not hasattr(user, "profile") or not user.profile.latitude:
+            profile = getattr(user, "profile", None)
+            if not profile or not profile.latitude:
                 self.stdout.write(
                     self.style.WARNING(
                         f"⚠️  {user.email}: No profile location (origin will be empty)"
                     )
                 )
 
-            trip = Trip.objects.create(
-                user=user,
-                origin="Current Location",
-                destination=options["destination"],
-                origin_lat=user.profile.latitude if hasattr(user, "profile") else None,
-                origin_lng=user.profile.longitude if hasattr(user, "profile") else None,
-                destination_lat=options["dest_lat"],
-                destination_lng=options["dest_lng"],
-                start_date=start_date,
-                end_date=end_date,
-                interests=["sightseeing", "photography", "food"],
-                description="Test trip for hotspot and matching",
-                max_companions=5,
-                privacy="public",
-                is_active=options["start_now"],
+            pending.append(
+                Trip(
+                    user=user,
+                    origin="Current Location",
+                    destination=options["destination"],
+                    origin_lat=profile.latitude if profile else None,
+                    origin_lng=profile.longitude if profile else None,
+                    destination_lat=options["dest_lat"],
+                    destination_lng=options["dest_lng"],
+                    start_date=start_date,
+                    end_date=end_date,
+                    interests=["sightseeing", "photography", "food"],
+                    description="Test trip for hotspot and matching",
+                    max_companions=5,
+                    privacy="public",
+                    is_active=options["start_now"],
+                )
             )
+            trips_created += 1
+            if len(pending) >= TRIP_FLUSH_SIZE:
+                self._insert_trips(pending, status)
+                if options["start_now"]:
+                    started_trips.extend(pending)
+                pending = []
 
-            status = "🟢 ACTIVE" if options["start_now"] else "⏸️  INACTIVE"
-            self.stdout.write(
-                self.style.SUCCESS(f"✓ {user.email}: Trip created {status}")
-            )
+        self._insert_trips(pending, status)
+        if options["start_now"]:
+            started_trips.extend(pending)
 
-            # If started, find matches
-            if options["start_now"]:
-                matches = find_trip_matches(trip, limit=20)
-                if matches:
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f"  └─ Found {len(matches)} potential matches"
-                        )
-                    )
+        if not trips_created:
+            self.stdout.write(self.style.ERROR("No users found"))
+            return
 
-            trips_created += 1
+        # If started, find matches for all test trips in one batch
+        matches_by_trip = find_matches_for_trips(started_trips, limit=20)
+        for trip in started_trips:
+            matches = matches_by_trip[trip.pk]
+            if matches:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"  └─ {trip.user.email}: Found {len(matches)} potential matches"
+                    )
+                )
 
         self.stdout.write(
             self.style.SUCCESS(f"\n✅ Successfully created {trips_created} trips!")
@@ -150,3 +177,11 @@ class Command(BaseCommand):
                     "\n💡 Trips are ACTIVE! Update locations to test proximity and hotspots.\n"
                 )
             )
+
+    def _insert_trips(self, trips, status):
+        """Insert a chunk of trips in batched INSERTs and report them"""
+        Trip.objects.bulk_create(trips, batch_size=500)
+        for trip in trips:
+            self.stdout.write(
+                self.style.SUCCESS(f"✓ {trip.user.email}: Trip created {status}")
+            )
@@ -4,17 +4,29 @@ Django management command to simulate location data for testing
 Usage:
     python manage.py simulate_hotspot --user-emails email1 email2 email3 --lat 48.8584 --lng 2.2945
     python manage.py simulate_hotspot --count 5 --lat 48.8584 --lng 2.2945
+    python manage.py simulate_hotspot --count 500 --lat 48.8584 --lng 2.2945 --bulk
 """
 
 import random
 from datetime import timedelta
-from decimal import Decimal
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 from travel.models import LocationHistory, Trip
+from travel.services.geo import geohash_encode, to_coordinate
 from travel.services.location_tracker import LocationTracker
-from user.models import User
+from user.models import Profile, User
+
+# User and profile columns the simulation reads or writes
+SIMULATED_USER_FIELDS = (
+    "id",
+    "email",
+    "profile__id",
+    "profile__latitude",
+    "profile__longitude",
+    "profile__last_location_update",
+)
 
 
 class Command(BaseCommand):
@@ -55,6 +67,11 @@ class Command(BaseCommand):
             action="store_true",
             help="Only simulate for users with active trips",
         )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Insert all locations with one bulk insert instead of per user",
+        )
 
     def handle(self, *args, **options):
         lat = options["lat"]
@@ -78,16 +95,15 @@ class Command(BaseCommand):
         elif options["count"]:
             # Get random existing users with active trips
             if options["active_trips_only"]:
-                today = timezone.now().date()
-                active_trips = Trip.objects.filter(
-                    is_active=True,
-                    start_date__lte=today,
-                    end_date__gte=today,
+                users = (
+                    User.objects.filter(id__in=Trip.active_qs().values("user_id"))
+                    .select_related("profile")
+                    .only(*SIMULATED_USER_FIELDS)[: options["count"]]
                 )
-                user_ids = active_trips.values_list("user_id", flat=True).distinct()
-                users = User.objects.filter(id__in=user_ids)[: options["count"]]
             else:
-                users = User.objects.all()[: options["count"]]
+                users = User.objects.select_related("profile").only(
+                    *SIMULATED_USER_FIELDS
+                )[: options["count"]]
 
         else:
             self.stdout.write(
@@ -95,6 +111,7 @@ class Command(BaseCommand):
             )
             return
 
+        users = list(users)
         if not users:
             self.stdout.write(self.style.ERROR("No users found to simulate"))
             return
@@ -105,25 +122,33 @@ class Command(BaseCommand):
             )
         )
 
-        for user in users:
-            # Add small random variation to make it realistic
-            random_lat = lat + random.uniform(-radius_degrees, radius_degrees)
-            random_lng = lng + random.uniform(-radius_degrees, radius_degrees)
-
-            # Record location
-            location = LocationTracker.record_location(
-                user=user,
-                latitude=random_lat,
-                longitude=random_lng,
-                accuracy=random.uniform(5, 15),
-                is_background=False,
-            )
+        # Add small random variation to make it realistic
+        positions = self._random_positions(len(users), lat, lng, radius_degrees)
 
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f"✓ {user.email}: ({random_lat:.6f}, {random_lng:.6f})"
-                )
-            )
+        # Latest active trip per user, as LocationTracker.record_location picks
+        active_trips = self._active_trips_by_user(users)
+
+        if options["bulk"]:
+            self._simulate_bulk(users, positions, active_trips)
+        else:
+            # One commit for the whole run instead of one per user
+            with transaction.atomic():
+                for user, (random_lat, random_lng, accuracy) in zip(users, positions):
+                    # Record location
+                    location = LocationTracker.record_location(
+                        user=user,
+                        latitude=random_lat,
+                        longitude=random_lng,
+                        accuracy=accuracy,
+                        is_background=False,
+                        active_trip=active_trips.get(user.id),
+                    )
+
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f"✓ {user.email}: ({random_lat:.6f}, {random_lng:.6f})"
+                        )
+                    )
 
         self.stdout.write(
             self.style.SUCCESS(f"\n✅ Successfully simulated {len(users)} users!")
@@ -133,3 +158,64 @@ class Command(BaseCommand):
                 "\n💡 Now update location for any user to trigger hotspot detection!\n"
             )
         )
+
+    def _random_positions(self, count, lat, lng, radius_degrees):
+        """Draw (latitude, longitude, accuracy) for every simulated user at once"""
+        uniform = random.Random().uniform
+        return [
+            (
+                lat + uniform(-radius_degrees, radius_degrees),
+                lng + uniform(-radius_degrees, radius_degrees),
+                uniform(5, 15),
+            )
+            for _ in range(count)
+        ]
+
+    def _active_trips_by_user(self, users):
+        """Map user ids to their active trip with one query"""
+        active_trips = {}
+        for trip in Trip.active_qs().filter(user__in=users):
+            active_trips.setdefault(trip.user_id, trip)
+        return active_trips
+
+    def _simulate_bulk(self, users, positions, active_trips):
+        """Record one location per user with a single bulk insert"""
+        now = timezone.now()
+
+        locations = []
+        for user, (random_lat, random_lng, accuracy) in zip(users, positions):
+            locations.append(
+                LocationHistory(
+                    user=user,
+                    trip=active_trips.get(user.id),
+                    latitude=to_coordinate(random_lat),
+                    longitude=to_coordinate(random_lng),
+                    geohash7=geohash_encode(random_lat, random_lng),
+                    accuracy=accuracy,
+                    is_background=False,
+                    recorded_at=now,
+                )
+            )
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"✓ {user.email}: ({random_lat:.6f}, {random_lng:.6f})"
+                )
+            )
+
+        positions = {
+            location.user_id: (location.latitude, location.longitude)
+            for location in locations
+        }
+        profiles = list(Profile.objects.filter(user__in=users))
+        for profile in profiles:
+            profile.latitude, profile.longitude = positions[profile.user_id]
+            profile.last_location_update = now
+
+        with transaction.atomic():
+            LocationHistory.objects.bulk_create(locations, batch_size=1000)
+            Profile.objects.bulk_update(
+                profiles,
+                ["latitude", "longitude", "last_location_update"],
+                batch_size=1000,
+            )
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-15 23:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("travel", "0007_tripsuggestion_hotspot_friend_names_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(
+                fields=["user", "start_date"], name="travel_trip_user_id_2a7cc0_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(
+                fields=["user", "end_date"], name="travel_trip_user_id_fc97dc_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(
+                fields=["user", "is_active"], name="travel_trip_user_id_093252_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-15 23:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("travel", "0008_trip_user_date_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="activityhotspot",
+            name="geohash7",
+            field=models.CharField(
+                blank=True,
+                help_text="Geohash cell (~150m) containing the coordinates",
+                max_length=7,
+            ),
+        ),
+        migrations.AddField(
+            model_name="locationhistory",
+            name="geohash7",
+            field=models.CharField(
+                blank=True,
+                help_text="Geohash cell (~150m) containing the coordinates",
+                max_length=7,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="activityhotspot",
+            index=models.Index(
+                fields=["geohash7"], name="travel_acti_geohash_456f09_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="locationhistory",
+            index=models.Index(
+                fields=["geohash7"], name="travel_loca_geohash_3c3076_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-15 23:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("travel", "0009_geohash7"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["start_date", "end_date"],
+                include=("user",),
+                name="trip_active_dates_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.6 on 2026-10-15 23:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_active_users(apps, schema_editor):
+    """Turn the active_users JSON lists into membership rows"""
+    ActivityHotspot = apps.get_model("travel", "ActivityHotspot")
+    HotspotMembership = apps.get_model("travel", "HotspotMembership")
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+
+    memberships = []
+    for hotspot in ActivityHotspot.objects.exclude(active_users=[]).iterator():
+        user_ids = {str(user_id) for user_id in hotspot.active_users}
+        existing = User.objects.filter(id__in=user_ids).values_list("id", flat=True)
+        memberships.extend(
+            HotspotMembership(hotspot_id=hotspot.id, user_id=user_id)
+            for user_id in existing
+        )
+
+    HotspotMembership.objects.bulk_create(
+        memberships, batch_size=500, ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("travel", "0010_trip_active_dates_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="activityhotspot",
+            name="user_count",
+            field=models.IntegerField(
+                default=0,
+                help_text="Number of members, kept in step with the memberships",
+            ),
+        ),
+        migrations.CreateModel(
+            name="HotspotMembership",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("joined_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "hotspot",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="memberships",
+                        to="travel.activityhotspot",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="hotspot_memberships",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Hotspot Membership",
+                "verbose_name_plural": "Hotspot Memberships",
+                "unique_together": {("hotspot", "user")},
+            },
+        ),
+        migrations.AddField(
+            model_name="activityhotspot",
+            name="members",
+            field=models.ManyToManyField(
+                blank=True,
+                help_text="Users currently at this location",
+                related_name="activity_hotspots",
+                through="travel.HotspotMembership",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(copy_active_users, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="activityhotspot",
+            name="active_users",
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-15 23:35
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("travel", "0011_hotspot_membership"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="locationhistory",
+            name="travel_loca_latitud_a2b7dc_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="tripsuggestion",
+            name="travel_trip_latitud_64cc4c_idx",
+        ),
+    ]
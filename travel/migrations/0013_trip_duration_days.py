@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-15 23:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("travel", "0012_drop_point_latlng_indexes"),
+    ]
+
+    # The generated expression relies on Postgres date subtraction, like the
+    # ArrayField columns the insights app already requires
+    operations = [
+        migrations.AddField(
+            model_name="trip",
+            name="duration_days",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=models.Func(
+                    models.F("end_date"),
+                    models.F("start_date"),
+                    arg_joiner=" - ",
+                    template="(%(expressions)s + 1)",
+                ),
+                output_field=models.IntegerField(),
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-15 23:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("travel", "0013_trip_duration_days"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["user", "start_date", "end_date"],
+                name="trip_user_active_dates_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-15 23:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("travel", "0014_trip_user_active_dates_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="tripsuggestion",
+            index=models.Index(
+                fields=["user", "trip", "suggestion_type", "-created_at"],
+                name="travel_trip_user_id_81772b_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-16 01:04
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("travel", "0015_suggestion_type_recent_idx"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="trip",
+            name="travel_trip_user_id_1e3a10_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="trip",
+            name="travel_trip_user_id_093252_idx",
+        ),
+    ]
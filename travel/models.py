@@ -1,7 +1,11 @@
+import math
 import uuid
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 
 # Create your models here.
@@ -65,6 +69,21 @@ class Trip(models.Model):
         max_length=20, choices=PRIVACY_CHOICES, default="friends_only"
     )
 
+    # Derived
+    duration_days = models.GeneratedField(
+        # date - date is a day count in Postgres, inclusive of both ends here.
+        # Like the ArrayFields in insights, this needs Postgres. Saves do not
+        # read it back, so refresh_from_db() after changing the dates.
+        expression=models.Func(
+            models.F("end_date"),
+            models.F("start_date"),
+            arg_joiner=" - ",
+            template="(%(expressions)s + 1)",
+        ),
+        output_field=models.IntegerField(),
+        db_persist=True,
+    )
+
     # Timestamps
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -74,16 +93,42 @@ class Trip(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        # The user foreign key has its own index, and user + is_active
+        # lookups are served by trip_user_active_dates_idx
         indexes = [
-            models.Index(fields=["user"]),
+            models.Index(fields=["user", "start_date"]),
+            models.Index(fields=["user", "end_date"]),
             models.Index(fields=["start_date", "end_date"]),
+            # Covers the "who is travelling right now" lookups (hotspots,
+            # simulate_hotspot) while only holding started trips
+            models.Index(
+                fields=["start_date", "end_date"],
+                include=["user"],
+                condition=models.Q(is_active=True),
+                name="trip_active_dates_idx",
+            ),
+            # A user's own active trip, looked up on every location update
+            models.Index(
+                fields=["user", "start_date", "end_date"],
+                condition=models.Q(is_active=True),
+                name="trip_user_active_dates_idx",
+            ),
             models.Index(fields=["destination"]),
         ]
 
-    @property
-    def duration_days(self):
-        """Calculate trip duration in days"""
-        return (self.end_date - self.start_date).days + 1
+    @classmethod
+    def active_qs(cls, today=None):
+        """
+        Started trips whose dates include today
+
+        The date is taken once per call and compared in the database, where
+        trip_active_dates_idx covers the lookup.
+        """
+        if today is None:
+            today = timezone.now().date()
+        return cls.objects.filter(
+            is_active=True, start_date__lte=today, end_date__gte=today
+        )
 
     @property
     def is_upcoming(self):
@@ -182,6 +227,11 @@ class LocationHistory(models.Model):
     # Location data
     latitude = models.DecimalField(max_digits=9, decimal_places=6)
     longitude = models.DecimalField(max_digits=9, decimal_places=6)
+    geohash7 = models.CharField(
+        max_length=7,
+        blank=True,
+        help_text="Geohash cell (~150m) containing the coordinates",
+    )
     accuracy = models.FloatField(
         null=True,
         blank=True,
@@ -227,7 +277,7 @@ class LocationHistory(models.Model):
         indexes = [
             models.Index(fields=["user", "-recorded_at"]),
             models.Index(fields=["trip", "-recorded_at"]),
-            models.Index(fields=["latitude", "longitude"]),
+            models.Index(fields=["geohash7"]),
             models.Index(fields=["recorded_at"]),
         ]
         verbose_name = "Location History"
@@ -318,9 +368,10 @@ class TripSuggestion(models.Model):
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["user", "trip", "-created_at"]),
+            # Recent suggestions of one kind, checked before notifying again
+            models.Index(fields=["user", "trip", "suggestion_type", "-created_at"]),
             models.Index(fields=["trip", "is_read"]),
             models.Index(fields=["suggestion_type"]),
-            models.Index(fields=["latitude", "longitude"]),
         ]
         verbose_name = "Trip Suggestion"
         verbose_name_plural = "Trip Suggestions"
@@ -337,6 +388,11 @@ class ActivityHotspot(models.Model):
     # Location
     latitude = models.DecimalField(max_digits=9, decimal_places=6)
     longitude = models.DecimalField(max_digits=9, decimal_places=6)
+    geohash7 = models.CharField(
+        max_length=7,
+        blank=True,
+        help_text="Geohash cell (~150m) containing the coordinates",
+    )
     place_name = models.CharField(
         max_length=255,
         blank=True,
@@ -349,10 +405,16 @@ class ActivityHotspot(models.Model):
     )
 
     # Hotspot metadata
-    user_count = models.IntegerField(default=0)
-    active_users = models.JSONField(
-        default=list,
-        help_text="List of user IDs currently at this location",
+    user_count = models.IntegerField(
+        default=0,
+        help_text="Number of members, kept in step with the memberships",
+    )
+    members = models.ManyToManyField(
+        settings.AUTH_USER_MODEL,
+        through="HotspotMembership",
+        related_name="activity_hotspots",
+        blank=True,
+        help_text="Users currently at this location",
     )
 
     # Timestamps
@@ -366,6 +428,7 @@ class ActivityHotspot(models.Model):
         ordering = ["-last_activity"]
         indexes = [
             models.Index(fields=["latitude", "longitude"]),
+            models.Index(fields=["geohash7"]),
             models.Index(fields=["-last_activity"]),
             models.Index(fields=["expires_at"]),
             models.Index(fields=["user_count"]),
@@ -380,3 +443,90 @@ class ActivityHotspot(models.Model):
     def is_expired(self):
         """Check if hotspot has expired"""
         return timezone.now() > self.expires_at
+
+
+class HotspotMembership(models.Model):
+    """A user currently counted in an activity hotspot"""
+
+    hotspot = models.ForeignKey(
+        ActivityHotspot,
+        on_delete=models.CASCADE,
+        related_name="memberships",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="hotspot_memberships",
+    )
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("hotspot", "user")
+        verbose_name = "Hotspot Membership"
+        verbose_name_plural = "Hotspot Memberships"
+
+    def __str__(self):
+        return f"{self.user_id} @ {self.hotspot_id}"
+
+
+HOTSPOT_CACHE_VERSION_KEY = "hotspots:version"
+HOTSPOT_CACHE_REGION_DEGREES = 0.1  # roughly 11km x 11km at the equator
+HOTSPOT_CACHE_MAX_REGIONS = 64
+
+# Saves touching only these leave cached lookups to expire on their own
+HOTSPOT_BOOKKEEPING_FIELDS = frozenset({"user_count", "last_activity", "expires_at"})
+
+
+def hotspot_region_version_key(latitude, longitude):
+    """Cache key holding the version of the region containing a point"""
+    lat_cell = math.floor(float(latitude) / HOTSPOT_CACHE_REGION_DEGREES)
+    lng_cell = math.floor(float(longitude) / HOTSPOT_CACHE_REGION_DEGREES)
+    return f"{HOTSPOT_CACHE_VERSION_KEY}:{lat_cell}:{lng_cell}"
+
+
+def hotspot_version_keys(latitude, longitude, radius_km):
+    """
+    Version keys of every region a radius lookup can see
+
+    Returns:
+        List of region keys, or the global key alone when the radius spans
+        more than HOTSPOT_CACHE_MAX_REGIONS regions
+    """
+    lat_delta = radius_km / 110.574
+    cos_lat = math.cos(math.radians(latitude))
+    lng_delta = lat_delta / cos_lat if cos_lat > 1e-6 else 180.0
+
+    step = HOTSPOT_CACHE_REGION_DEGREES
+    lat_cells = range(
+        math.floor((latitude - lat_delta) / step),
+        math.floor((latitude + lat_delta) / step) + 1,
+    )
+    lng_cells = range(
+        math.floor((longitude - lng_delta) / step),
+        math.floor((longitude + lng_delta) / step) + 1,
+    )
+    if len(lat_cells) * len(lng_cells) > HOTSPOT_CACHE_MAX_REGIONS:
+        return [HOTSPOT_CACHE_VERSION_KEY]
+
+    return [
+        f"{HOTSPOT_CACHE_VERSION_KEY}:{lat_cell}:{lng_cell}"
+        for lat_cell in lat_cells
+        for lng_cell in lng_cells
+    ]
+
+
+@receiver([post_save, post_delete], sender=ActivityHotspot)
+def invalidate_hotspot_cache(sender, instance, update_fields=None, **kwargs):
+    """Retire the cached lookups that can see a new, changed or deleted hotspot."""
+    if update_fields and HOTSPOT_BOOKKEEPING_FIELDS.issuperset(update_fields):
+        return
+
+    # The global version covers unfiltered listings and very wide radii
+    version = uuid.uuid4().hex
+    cache.set_many(
+        {
+            HOTSPOT_CACHE_VERSION_KEY: version,
+            hotspot_region_version_key(instance.latitude, instance.longitude): version,
+        },
+        None,
+    )
@@ -6,6 +6,7 @@ Combines queries and mutations
 import graphene
 from travel.graphql.mutations import (
     AcceptMatch,
+    BatchUpdateLocation,
     CreateTrip,
     DeleteTrip,
     EndTrip,
@@ -43,3 +44,4 @@ class Mutation(graphene.ObjectType):
 
     # Location Tracking
     update_location = UpdateLocation.Field()
+    batch_update_location = BatchUpdateLocation.Field()
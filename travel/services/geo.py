@@ -0,0 +1,280 @@
+"""
+Geographic helpers shared by the travel services
+"""
+
+import math
+from decimal import Decimal
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+from django.db.models import FloatField
+from django.db.models.functions import Cast, Cos, Power, Radians, Sin
+
+EARTH_RADIUS_KM = 6371.0
+# Kilometers per degree of latitude are fewest at the equator, so this keeps
+# bounding boxes on the generous side everywhere
+DEGREES_PER_KM = 1 / 110.574
+
+# Past this the equirectangular approximation is replaced by the haversine
+EQUIRECTANGULAR_MAX_KM = 50.0
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 7  # cells of roughly 150m x 150m at the equator
+
+# Every latitude/longitude DecimalField is stored with 6 decimal places
+COORDINATE_DECIMAL_PLACES = 6
+_COORDINATE_SCALE = 10**COORDINATE_DECIMAL_PLACES
+
+
+def to_coordinate(value) -> Decimal:
+    """
+    Convert a float coordinate to the Decimal kept in lat/lng columns
+
+    Rounding to whole micro-degrees and scaling the integer is cheaper than
+    Decimal(str(value)), and the instance ends up holding exactly what the
+    column will store.
+    """
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(round(value * _COORDINATE_SCALE)).scaleb(-COORDINATE_DECIMAL_PLACES)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Calculate the great circle distance between two points
+    on the earth (specified in decimal degrees)
+
+    Returns:
+        Distance in kilometers
+    """
+    lat1 = math.radians(lat1)
+    lat2 = math.radians(lat2)
+    half_dlat = math.sin((lat2 - lat1) / 2)
+    half_dlon = math.sin(math.radians(lon2 - lon1) / 2)
+
+    # Squares as plain multiplies, which are cheaper than ** on floats
+    a = half_dlat * half_dlat + math.cos(lat1) * math.cos(lat2) * half_dlon * half_dlon
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def haversine_km_many(
+    lat: float,
+    lon: float,
+    points: Iterable[Tuple[float, float]],
+    max_km: Optional[float] = None,
+) -> List[float]:
+    """
+    Great circle distances in kilometers from one point to many
+
+    The origin's radians and cosine are computed once for the whole batch
+    instead of once per pair, and the loop runs on local names so each
+    iteration skips the module attribute lookups.
+
+    With max_km, points further than that in latitude alone are reported as
+    infinitely far without any trigonometry. The distance is never shorter
+    than the latitude difference, so no point within max_km is affected.
+    """
+    sin, cos, asin, sqrt = math.sin, math.cos, math.asin, math.sqrt
+    to_radians = math.pi / 180
+    diameter = 2 * EARTH_RADIUS_KM
+    max_dlat = math.inf if max_km is None else max_km / EARTH_RADIUS_KM
+    inf = math.inf
+
+    lat1 = lat * to_radians
+    lon1 = lon * to_radians
+    cos_lat1 = cos(lat1)
+
+    distances = []
+    append = distances.append
+    for lat2, lon2 in points:
+        lat2 *= to_radians
+        dlat = lat2 - lat1
+        if dlat > max_dlat or -dlat > max_dlat:
+            append(inf)
+            continue
+        half_dlat = sin(dlat / 2)
+        half_dlon = sin((lon2 * to_radians - lon1) / 2)
+        a = half_dlat * half_dlat + cos_lat1 * cos(lat2) * half_dlon * half_dlon
+        append(diameter * asin(sqrt(a)))
+
+    return distances
+
+
+def short_distance_km_many(
+    lat: float, lon: float, points: Iterable[Tuple[float, float]]
+) -> List[float]:
+    """
+    Distances in kilometers from one point to many, tuned for short ranges
+
+    Uses the equirectangular projection around each pair's mean latitude,
+    which stays within a fraction of a percent of the haversine over tens of
+    kilometers and costs one cosine and one square root per point. Points
+    that come out further than EQUIRECTANGULAR_MAX_KM, where the projection
+    starts to drift, are measured again with the haversine.
+    """
+    cos, sqrt = math.cos, math.sqrt
+    to_radians = math.pi / 180
+
+    lat1 = lat * to_radians
+    lon1 = lon * to_radians
+
+    distances = []
+    append = distances.append
+    for lat2, lon2 in points:
+        lat2 *= to_radians
+        dlon = lon2 * to_radians - lon1
+        # Take the short way around the antimeridian
+        if dlon > math.pi:
+            dlon -= 2 * math.pi
+        elif dlon < -math.pi:
+            dlon += 2 * math.pi
+        x = dlon * cos((lat1 + lat2) / 2)
+        y = lat2 - lat1
+        distance = EARTH_RADIUS_KM * sqrt(x * x + y * y)
+        if distance > EQUIRECTANGULAR_MAX_KM:
+            distance = haversine_km(lat, lon, lat2 / to_radians, lon2)
+        append(distance)
+
+    return distances
+
+
+@lru_cache(maxsize=4096)
+def _radius_bounds(latitude, longitude, radius_km):
+    """
+    Precompute the scalar parts of a radius query
+
+    Hotspot lookups arrive on a quantized grid, so the same few cells and
+    radii repeat and the trigonometry is served from the cache.
+
+    Returns:
+        Tuple of (lat_min, lat_max, lng_min, lng_max, lat_rad, lng_rad,
+        cos_lat, max_haversine)
+    """
+    lat_rad = math.radians(latitude)
+    cos_lat = math.cos(lat_rad)
+    lat_delta = radius_km * DEGREES_PER_KM
+    lng_delta = lat_delta / cos_lat if cos_lat > 1e-6 else 180.0
+    max_haversine = math.sin(min(radius_km / EARTH_RADIUS_KM, math.pi) / 2) ** 2
+
+    return (
+        latitude - lat_delta,
+        latitude + lat_delta,
+        longitude - lng_delta,
+        longitude + lng_delta,
+        lat_rad,
+        math.radians(longitude),
+        cos_lat,
+        max_haversine,
+    )
+
+
+def filter_within_radius(queryset, latitude, longitude, radius_km):
+    """
+    Restrict a queryset with latitude/longitude columns to a radius in km
+
+    The result can be ordered by the "haversine" alias to get the closest
+    rows first.
+    """
+    (
+        lat_min,
+        lat_max,
+        lng_min,
+        lng_max,
+        origin_lat_rad,
+        origin_lng_rad,
+        cos_lat,
+        max_haversine,
+    ) = _radius_bounds(latitude, longitude, radius_km)
+
+    # Bounding box first so the (latitude, longitude) index can narrow the scan
+    queryset = queryset.filter(
+        latitude__gte=lat_min,
+        latitude__lte=lat_max,
+        longitude__gte=lng_min,
+        longitude__lte=lng_max,
+    )
+
+    # Then the exact haversine check on the remaining rows, compared on the
+    # squared half-chord so the database never has to take asin/sqrt
+    lat_rad = Radians(Cast("latitude", FloatField()))
+    lng_rad = Radians(Cast("longitude", FloatField()))
+    dlat_term = Power(Sin((lat_rad - origin_lat_rad) / 2), 2)
+    dlng_term = Power(Sin((lng_rad - origin_lng_rad) / 2), 2)
+    haversine = dlat_term + cos_lat * Cos(lat_rad) * dlng_term
+
+    return queryset.alias(haversine=haversine).filter(haversine__lte=max_haversine)
+
+
+def geohash_encode(
+    latitude: float, longitude: float, precision: int = GEOHASH_PRECISION
+) -> str:
+    """Encode a coordinate as a geohash string of the given length"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # geohash interleaves bits starting with longitude
+
+    while len(chars) < precision:
+        value, value_range = (longitude, lng_range) if even else (latitude, lat_range)
+        mid = (value_range[0] + value_range[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            value_range[0] = mid
+        else:
+            bits <<= 1
+            value_range[1] = mid
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int = GEOHASH_PRECISION) -> Tuple[float, float]:
+    """Return the (latitude, longitude) size in degrees of a geohash cell"""
+    total_bits = precision * 5
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / 2**lat_bits, 360.0 / 2**lng_bits
+
+
+def geohash_cells_around(
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    precision: int = GEOHASH_PRECISION,
+    max_cells: int = 64,
+) -> Optional[List[str]]:
+    """
+    Geohash cells that together cover a radius around a point
+
+    For radii smaller than a cell this is the point's cell and its eight
+    neighbours; larger radii, or cells narrowed by a high latitude, pull in
+    more rings as needed.
+
+    Returns:
+        Sorted list of cells, or None when more than max_cells would be
+        needed and the caller should fall back to filter_within_radius
+    """
+    bounds = _radius_bounds(latitude, longitude, radius_km)
+    lat_min, lat_max = max(bounds[0], -90.0), min(bounds[1], 90.0)
+    lng_min, lng_max = max(bounds[2], -180.0), min(bounds[3], 180.0)
+    lat_step, lng_step = geohash_cell_size(precision)
+
+    lat_count = int((lat_max - lat_min) / lat_step) + 2
+    lng_count = int((lng_max - lng_min) / lng_step) + 2
+    if lat_count * lng_count > max_cells:
+        return None
+
+    # Sampling the box at cell-sized steps, capped at its far edges, visits
+    # every cell the box overlaps
+    lats = [min(lat_min + i * lat_step, lat_max) for i in range(lat_count)]
+    lngs = [min(lng_min + i * lng_step, lng_max) for i in range(lng_count)]
+
+    return sorted({geohash_encode(lat, lng, precision) for lat in lats for lng in lngs})
@@ -5,16 +5,32 @@ Detects when multiple iTravelSolo users cluster at a location,
 creating real-time activity notifications for nearby travelers.
 """
 
-import math
 from datetime import timedelta
-from decimal import Decimal
 from typing import Dict, List, Optional, Tuple
 
 from django.conf import settings
-from django.db.models import Count, Q
+from django.db import transaction
+from django.db.models import Count, FloatField
+from django.db.models.functions import Cast
 from django.utils import timezone
-from travel.models import ActivityHotspot, LocationHistory, Trip, TripSuggestion
-from user.models import Profile, User
+from django.utils.functional import cached_property
+from travel.models import (
+    ActivityHotspot,
+    HotspotMembership,
+    LocationHistory,
+    Trip,
+    TripSuggestion,
+)
+from travel.services.geo import (
+    filter_within_radius,
+    geohash_cells_around,
+    geohash_encode,
+    haversine_km,
+    haversine_km_many,
+    to_coordinate,
+)
+from travel.services.place_index import place_index
+from user.models import User
 
 
 class HotspotDetector:
@@ -27,9 +43,14 @@ class HotspotDetector:
     ACTIVITY_WINDOW_MINUTES = getattr(settings, "HOTSPOT_ACTIVITY_WINDOW_MINUTES", 30)
     HOTSPOT_EXPIRY_MINUTES = getattr(settings, "HOTSPOT_EXPIRY_MINUTES", 60)
 
-    def __init__(self, user: User):
+    def __init__(self, user: User, active_trip: Optional[Trip] = None):
         self.user = user
+        if active_trip is not None:
+            self.active_trip = active_trip
         self.now = timezone.now()
+        # Unexpired hotspots, loaded on first use (see _load_active_hotspots)
+        self._active_hotspots: Optional[List[ActivityHotspot]] = None
+        self._hotspot_buckets: Dict[str, List[ActivityHotspot]] = {}
 
     def detect_and_notify(
         self, latitude: float, longitude: float
@@ -44,10 +65,8 @@ class HotspotDetector:
         Returns:
             TripSuggestion if a hotspot notification was created, None otherwise
         """
-        # First, cleanup expired hotspots
-        self._cleanup_expired_hotspots()
-
-        # Update or create hotspots based on recent activity
+        # Update or create hotspots based on recent activity. Expired ones are
+        # skipped here and deleted by the cleanup_travel_data command
         self._update_hotspots()
 
         # Check if user is on an active trip
@@ -60,11 +79,8 @@ class HotspotDetector:
 
         if nearby_hotspot:
             # Check if user is already AT the hotspot (too close)
-            distance_to_hotspot = self._calculate_distance(
-                latitude,
-                longitude,
-                float(nearby_hotspot.latitude),
-                float(nearby_hotspot.longitude),
+            distance_to_hotspot = haversine_km(
+                latitude, longitude, nearby_hotspot.lat, nearby_hotspot.lng
             )
 
             # Don't notify if user is already at the hotspot
@@ -78,9 +94,19 @@ class HotspotDetector:
 
         return None
 
-    def _cleanup_expired_hotspots(self):
-        """Remove expired hotspots"""
-        ActivityHotspot.objects.filter(expires_at__lt=self.now).delete()
+    @staticmethod
+    def cleanup_expired_hotspots() -> int:
+        """
+        Remove expired hotspots
+
+        Returns:
+            Number of hotspots deleted
+        """
+        _, deleted = ActivityHotspot.objects.filter(
+            expires_at__lt=timezone.now()
+        ).delete()
+        # The total also counts cascaded memberships
+        return deleted.get(ActivityHotspot._meta.label, 0)
 
     def _update_hotspots(self):
         """Scan recent location history and update/create hotspots"""
@@ -88,67 +114,91 @@ class HotspotDetector:
         recent_time = self.now - timedelta(minutes=self.ACTIVITY_WINDOW_MINUTES)
 
         # Get users on active trips
-        active_trip_users = Trip.objects.filter(
-            is_active=True,
-            start_date__lte=self.now.date(),
-            end_date__gte=self.now.date(),
-        ).values_list("user_id", flat=True)
-
-        # Get their recent locations (most recent per user)
-        recent_locations = (
+        active_trip_users = Trip.active_qs(self.now.date()).values_list(
+            "user_id", flat=True
+        )
+
+        # Get their recent locations (most recent per user), cast to float in
+        # the database so clustering never builds Decimal objects
+        recent_locations = list(
             LocationHistory.objects.filter(
                 user_id__in=active_trip_users, recorded_at__gte=recent_time
             )
             .order_by("user_id", "-recorded_at")
             .distinct("user_id")
+            .annotate(
+                lat=Cast("latitude", FloatField()),
+                lng=Cast("longitude", FloatField()),
+            )
+            .values_list("user_id", "lat", "lng", "geohash7")
         )
 
         # Group locations into clusters
         clusters = self._cluster_locations(recent_locations)
 
         # Update or create hotspots for significant clusters
+        if clusters:
+            self._load_active_hotspots()
         for cluster in clusters:
             if cluster["user_count"] >= self.MIN_USERS_FOR_HOTSPOT:
                 self._update_or_create_hotspot(cluster)
 
-    def _cluster_locations(self, locations: List[LocationHistory]) -> List[Dict]:
+    def _cluster_locations(
+        self, locations: List[Tuple[int, float, float, str]]
+    ) -> List[Dict]:
         """
         Group locations into clusters based on proximity
 
         Args:
-            locations: List of LocationHistory objects
+            locations: List of (user_id, latitude, longitude, geohash7) tuples
 
         Returns:
             List of clusters with metadata
         """
+        # Bucket by geohash cell so each location is only compared with the
+        # ones in the cells around it
+        buckets = {}
+        for location in locations:
+            cell = location[3] or geohash_encode(location[1], location[2])
+            buckets.setdefault(cell, []).append(location)
+
         clusters = []
         processed_users = set()
 
-        for location in locations:
-            if location.user_id in processed_users:
+        for user_id, latitude, longitude, _ in locations:
+            if user_id in processed_users:
                 continue
 
-            # Find all nearby locations (within cluster radius)
-            nearby = []
-            for other_location in locations:
-                if other_location.user_id in processed_users:
-                    continue
-
-                distance = self._calculate_distance(
-                    float(location.latitude),
-                    float(location.longitude),
-                    float(other_location.latitude),
-                    float(other_location.longitude),
-                )
-
-                if distance <= self.CLUSTER_RADIUS_KM:
-                    nearby.append(other_location)
-                    processed_users.add(other_location.user_id)
+            cells = geohash_cells_around(latitude, longitude, self.CLUSTER_RADIUS_KM)
+            if cells is None:
+                candidates = locations
+            else:
+                candidates = [
+                    other for cell in cells for other in buckets.get(cell, ())
+                ]
+
+            # Find all nearby locations (within cluster radius), measuring
+            # the seed against every unprocessed candidate in one pass
+            candidates = [
+                other for other in candidates if other[0] not in processed_users
+            ]
+            distances = haversine_km_many(
+                latitude,
+                longitude,
+                ((other[1], other[2]) for other in candidates),
+                max_km=self.CLUSTER_RADIUS_KM,
+            )
+            nearby = [
+                other
+                for other, distance in zip(candidates, distances)
+                if distance <= self.CLUSTER_RADIUS_KM
+            ]
+            processed_users.update(other[0] for other in nearby)
 
             if len(nearby) >= self.MIN_USERS_FOR_HOTSPOT:
                 # Calculate cluster center (average position)
-                avg_lat = sum(float(loc.latitude) for loc in nearby) / len(nearby)
-                avg_lng = sum(float(loc.longitude) for loc in nearby) / len(nearby)
+                avg_lat = sum(loc[1] for loc in nearby) / len(nearby)
+                avg_lng = sum(loc[2] for loc in nearby) / len(nearby)
 
                 # Try to match with a known place
                 place_name, place_id = self._match_place(avg_lat, avg_lng)
@@ -158,7 +208,7 @@ class HotspotDetector:
                         "latitude": avg_lat,
                         "longitude": avg_lng,
                         "user_count": len(nearby),
-                        "user_ids": [loc.user_id for loc in nearby],
+                        "user_ids": [loc[0] for loc in nearby],
                         "place_name": place_name,
                         "place_id": place_id,
                     }
@@ -179,83 +229,129 @@ class HotspotDetector:
         Returns:
             Tuple of (place_name, place_id)
         """
-        # Try to import insights models (may not exist in all environments)
+        # Search for nearby places (within 200m) in the in-process index;
+        # insights may not exist in all environments
+        search_radius = 0.2  # km
         try:
-            from insights.models import (
-                HiddenGem,
-                MostFamousPlace,
-                ThingToDo,
-                TouristTrap,
-            )
-
-            # Search for nearby places (within 200m)
-            search_radius = 0.2  # km
-
-            # Check each place type
-            for model in [MostFamousPlace, HiddenGem, TouristTrap, ThingToDo]:
-                places = model.objects.all()
-                for place in places:
-                    if hasattr(place, "latitude") and hasattr(place, "longitude"):
-                        distance = self._calculate_distance(
-                            latitude,
-                            longitude,
-                            float(place.latitude),
-                            float(place.longitude),
-                        )
-                        if distance <= search_radius:
-                            return (place.name, str(place.id))
-
+            match = place_index.nearest(latitude, longitude, search_radius)
         except ImportError:
-            pass
+            match = None
+
+        if match:
+            return match
 
         return ("", None)
 
+    def _load_active_hotspots(self) -> List[ActivityHotspot]:
+        """
+        Load unexpired hotspots once per detector run
+
+        Coordinates are cast to float in the database and kept on each
+        hotspot as lat/lng, and hotspots are bucketed by geohash cell, so
+        merging clusters and finding the nearest hotspot neither query again
+        nor convert Decimals.
+        """
+        if self._active_hotspots is None:
+            self._active_hotspots = []
+            self._hotspot_buckets = {}
+            for hotspot in ActivityHotspot.objects.filter(
+                expires_at__gte=self.now
+            ).annotate(
+                lat=Cast("latitude", FloatField()),
+                lng=Cast("longitude", FloatField()),
+            ):
+                self._remember_hotspot(hotspot)
+
+        return self._active_hotspots
+
+    def _remember_hotspot(self, hotspot: ActivityHotspot) -> None:
+        """Add a hotspot with float lat/lng set to the loaded hotspots"""
+        self._active_hotspots.append(hotspot)
+        # Hotspots from before geohash7 existed have it blank
+        cell = hotspot.geohash7 or geohash_encode(hotspot.lat, hotspot.lng)
+        self._hotspot_buckets.setdefault(cell, []).append(hotspot)
+
     def _update_or_create_hotspot(self, cluster: Dict):
         """Update existing hotspot or create new one"""
         # Check if there's an existing hotspot nearby
-        existing_hotspots = ActivityHotspot.objects.filter(expires_at__gte=self.now)
-
-        for hotspot in existing_hotspots:
-            distance = self._calculate_distance(
-                cluster["latitude"],
-                cluster["longitude"],
-                float(hotspot.latitude),
-                float(hotspot.longitude),
-            )
+        self._load_active_hotspots()
+        cells = geohash_cells_around(
+            cluster["latitude"], cluster["longitude"], self.CLUSTER_RADIUS_KM
+        )
+        if cells is None:
+            existing_hotspots = self._active_hotspots
+        else:
+            existing_hotspots = [
+                hotspot
+                for cell in cells
+                for hotspot in self._hotspot_buckets.get(cell, ())
+            ]
+
+        distances = haversine_km_many(
+            cluster["latitude"],
+            cluster["longitude"],
+            ((hotspot.lat, hotspot.lng) for hotspot in existing_hotspots),
+            max_km=self.CLUSTER_RADIUS_KM,
+        )
 
+        for hotspot, distance in zip(existing_hotspots, distances):
             # If within cluster radius, update existing hotspot
             if distance <= self.CLUSTER_RADIUS_KM:
+                self._set_members(hotspot, cluster["user_ids"])
                 hotspot.user_count = cluster["user_count"]
-                hotspot.active_users = cluster["user_ids"]
                 hotspot.last_activity = self.now
                 hotspot.expires_at = self.now + timedelta(
                     minutes=self.HOTSPOT_EXPIRY_MINUTES
                 )
-                if cluster["place_name"]:
+                update_fields = ["user_count", "last_activity", "expires_at"]
+                if cluster["place_name"] and (
+                    hotspot.place_name != cluster["place_name"]
+                    or str(hotspot.related_place_id) != str(cluster["place_id"])
+                ):
                     hotspot.place_name = cluster["place_name"]
                     hotspot.related_place_id = cluster["place_id"]
-                hotspot.save()
+                    update_fields += ["place_name", "related_place_id"]
+                hotspot.save(update_fields=update_fields)
                 return
 
         # Create new hotspot
-        ActivityHotspot.objects.create(
-            latitude=Decimal(str(cluster["latitude"])),
-            longitude=Decimal(str(cluster["longitude"])),
-            place_name=cluster["place_name"],
-            related_place_id=cluster["place_id"],
-            user_count=cluster["user_count"],
-            active_users=cluster["user_ids"],
-            expires_at=self.now + timedelta(minutes=self.HOTSPOT_EXPIRY_MINUTES),
+        with transaction.atomic():
+            hotspot = ActivityHotspot.objects.create(
+                latitude=to_coordinate(cluster["latitude"]),
+                longitude=to_coordinate(cluster["longitude"]),
+                geohash7=geohash_encode(cluster["latitude"], cluster["longitude"]),
+                place_name=cluster["place_name"],
+                related_place_id=cluster["place_id"],
+                user_count=cluster["user_count"],
+                expires_at=self.now + timedelta(minutes=self.HOTSPOT_EXPIRY_MINUTES),
+            )
+            self._set_members(hotspot, cluster["user_ids"])
+
+        hotspot.lat = cluster["latitude"]
+        hotspot.lng = cluster["longitude"]
+        self._remember_hotspot(hotspot)
+
+    def _set_members(self, hotspot: ActivityHotspot, user_ids: List) -> None:
+        """Replace a hotspot's memberships with the given users"""
+        HotspotMembership.objects.filter(hotspot=hotspot).exclude(
+            user_id__in=user_ids
+        ).delete()
+        HotspotMembership.objects.bulk_create(
+            [
+                HotspotMembership(hotspot=hotspot, user_id=user_id)
+                for user_id in user_ids
+            ],
+            ignore_conflicts=True,
         )
 
+    @cached_property
+    def active_trip(self) -> Optional[Trip]:
+        """User's active trip if any, looked up once per detector"""
+        return Trip.active_qs(self.now.date()).filter(user=self.user).first()
+
     def _get_active_trip(self) -> Optional[Trip]:
         """Get user's active trip if any"""
-        return Trip.objects.filter(
-            user=self.user,
-            is_active=True,
-            start_date__lte=self.now.date(),
-            end_date__gte=self.now.date(),
-        ).first()
+        return self.active_trip
 
     def _find_nearby_hotspot(
         self, latitude: float, longitude: float
@@ -270,21 +366,43 @@ class HotspotDetector:
         Returns:
             Closest hotspot within notification radius, or None
         """
-        active_hotspots = ActivityHotspot.objects.filter(
-            expires_at__gte=self.now, user_count__gte=self.MIN_USERS_FOR_HOTSPOT
+        if self._active_hotspots is None:
+            # Let the database pick the closest one
+            return (
+                filter_within_radius(
+                    ActivityHotspot.objects.filter(
+                        expires_at__gte=self.now,
+                        user_count__gte=self.MIN_USERS_FOR_HOTSPOT,
+                    ),
+                    latitude,
+                    longitude,
+                    self.NOTIFICATION_RADIUS_KM,
+                )
+                .annotate(
+                    lat=Cast("latitude", FloatField()),
+                    lng=Cast("longitude", FloatField()),
+                )
+                .order_by("haversine")
+                .first()
+            )
+
+        # Already loaded (and kept current) while updating hotspots
+        active_hotspots = [
+            hotspot
+            for hotspot in self._active_hotspots
+            if hotspot.user_count >= self.MIN_USERS_FOR_HOTSPOT
+        ]
+        distances = haversine_km_many(
+            latitude,
+            longitude,
+            ((hotspot.lat, hotspot.lng) for hotspot in active_hotspots),
+            max_km=self.NOTIFICATION_RADIUS_KM,
         )
 
         closest_hotspot = None
         min_distance = float("inf")
 
-        for hotspot in active_hotspots:
-            distance = self._calculate_distance(
-                latitude,
-                longitude,
-                float(hotspot.latitude),
-                float(hotspot.longitude),
-            )
-
+        for hotspot, distance in zip(active_hotspots, distances):
             if distance <= self.NOTIFICATION_RADIUS_KM and distance < min_distance:
                 min_distance = distance
                 closest_hotspot = hotspot
@@ -363,8 +481,8 @@ class HotspotDetector:
             suggestion_type="activity_hotspot",
             title=title,
             content=content,
-            latitude=Decimal(str(hotspot.latitude)),
-            longitude=Decimal(str(hotspot.longitude)),
+            latitude=hotspot.latitude,
+            longitude=hotspot.longitude,
             location_name=hotspot.place_name,
             related_place_id=hotspot.related_place_id,
             hotspot_user_count=hotspot.user_count,
@@ -383,54 +501,10 @@ class HotspotDetector:
         Returns:
             List of friend names
         """
-        # Get user's friends
-        try:
-            user_profile = Profile.objects.get(user=self.user)
-            friend_ids = user_profile.friends.values_list("id", flat=True)
-        except Profile.DoesNotExist:
-            return []
-
-        # Check which friends are in the hotspot
-        friend_names = []
-        for user_id in hotspot.active_users:
-            if user_id in friend_ids:
-                try:
-                    friend_profile = Profile.objects.get(user_id=user_id)
-                    name = (
-                        friend_profile.name or friend_profile.user.email.split("@")[0]
-                    )
-                    friend_names.append(name)
-                except Profile.DoesNotExist:
-                    continue
-
-        return friend_names
-
-    def _calculate_distance(
-        self, lat1: float, lng1: float, lat2: float, lng2: float
-    ) -> float:
-        """
-        Calculate distance between two coordinates using Haversine formula
-
-        Args:
-            lat1, lng1: First coordinate
-            lat2, lng2: Second coordinate
-
-        Returns:
-            Distance in kilometers
-        """
-        R = 6371  # Earth's radius in kilometers
-
-        # Convert to radians
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        dlat = math.radians(lat2 - lat1)
-        dlng = math.radians(lng2 - lng1)
-
-        # Haversine formula
-        a = (
-            math.sin(dlat / 2) ** 2
-            + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlng / 2) ** 2
-        )
-        c = 2 * math.asin(math.sqrt(a))
+        # Members of the hotspot that are in the user's friends list
+        friends = User.objects.filter(
+            hotspot_memberships__hotspot=hotspot,
+            friend_of__user=self.user,
+        ).only("email", "first_name")
 
-        return R * c
+        return [friend.first_name or friend.email.split("@")[0] for friend in friends]
@@ -2,12 +2,13 @@
 Location tracking service for recording user locations during trips
 """
 
-from decimal import Decimal
-from typing import Optional
+from typing import List, Optional
 
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.utils import timezone
 from travel.models import LocationHistory, Trip
+from travel.services.geo import geohash_encode, to_coordinate
 
 User = get_user_model()
 
@@ -27,6 +28,7 @@ class LocationTracker:
         is_background: bool = False,
         battery_level: Optional[int] = None,
         recorded_at: Optional[timezone.datetime] = None,
+        active_trip: Optional[Trip] = None,
     ) -> LocationHistory:
         """
         Record a location point for a user
@@ -42,6 +44,7 @@ class LocationTracker:
             is_background: Whether recorded in background
             battery_level: Device battery level (0-100)
             recorded_at: When location was recorded (defaults to now)
+            active_trip: User's active trip, when the caller already has it
 
         Returns:
             LocationHistory object
@@ -50,39 +53,96 @@ class LocationTracker:
             recorded_at = timezone.now()
 
         # Find active trip if any
-        active_trip = Trip.objects.filter(
-            user=user,
-            is_active=True,
-            start_date__lte=timezone.now().date(),
-            end_date__gte=timezone.now().date(),
-        ).first()
-
-        # Create location record
-        location = LocationHistory.objects.create(
-            user=user,
-            trip=active_trip,
-            latitude=Decimal(str(latitude)),
-            longitude=Decimal(str(longitude)),
-            accuracy=accuracy,
-            altitude=altitude,
-            speed=speed,
-            heading=heading,
-            is_background=is_background,
-            battery_level=battery_level,
-            recorded_at=recorded_at,
-        )
-
-        # Update user's current location in profile
-        if hasattr(user, "profile"):
-            user.profile.latitude = Decimal(str(latitude))
-            user.profile.longitude = Decimal(str(longitude))
-            user.profile.last_location_update = recorded_at
-            user.profile.save(
-                update_fields=["latitude", "longitude", "last_location_update"]
+        if active_trip is None:
+            active_trip = Trip.active_qs().filter(user=user).first()
+
+        # Insert the point and move the profile location in one transaction
+        with transaction.atomic():
+            # Create location record
+            location = LocationHistory.objects.create(
+                user=user,
+                trip=active_trip,
+                latitude=to_coordinate(latitude),
+                longitude=to_coordinate(longitude),
+                geohash7=geohash_encode(float(latitude), float(longitude)),
+                accuracy=accuracy,
+                altitude=altitude,
+                speed=speed,
+                heading=heading,
+                is_background=is_background,
+                battery_level=battery_level,
+                recorded_at=recorded_at,
             )
 
+            # Update user's current location in profile
+            if hasattr(user, "profile"):
+                user.profile.latitude = to_coordinate(latitude)
+                user.profile.longitude = to_coordinate(longitude)
+                user.profile.last_location_update = recorded_at
+                user.profile.save(
+                    update_fields=["latitude", "longitude", "last_location_update"]
+                )
+
         return location
 
+    @staticmethod
+    def record_locations(user: User, points: List[dict]) -> List[LocationHistory]:
+        """
+        Record a batch of buffered location points for a user
+
+        Args:
+            user: User object
+            points: List of dicts with the same keys as record_location's
+                keyword arguments (latitude and longitude are required)
+
+        Returns:
+            List of created LocationHistory objects, oldest first
+        """
+        now = timezone.now()
+
+        # Find active trip once for the whole batch
+        active_trip = Trip.active_qs(now.date()).filter(user=user).first()
+
+        locations = sorted(
+            (
+                LocationHistory(
+                    user=user,
+                    trip=active_trip,
+                    latitude=to_coordinate(point["latitude"]),
+                    longitude=to_coordinate(point["longitude"]),
+                    geohash7=geohash_encode(
+                        float(point["latitude"]), float(point["longitude"])
+                    ),
+                    accuracy=point.get("accuracy"),
+                    altitude=point.get("altitude"),
+                    speed=point.get("speed"),
+                    heading=point.get("heading"),
+                    is_background=point.get("is_background") or False,
+                    battery_level=point.get("battery_level"),
+                    recorded_at=point.get("recorded_at") or now,
+                )
+                for point in points
+            ),
+            key=lambda location: location.recorded_at,
+        )
+        if not locations:
+            return []
+
+        latest = locations[-1]
+        with transaction.atomic():
+            LocationHistory.objects.bulk_create(locations, batch_size=500)
+
+            # Update user's current location in profile from the latest point
+            if hasattr(user, "profile"):
+                user.profile.latitude = latest.latitude
+                user.profile.longitude = latest.longitude
+                user.profile.last_location_update = latest.recorded_at
+                user.profile.save(
+                    update_fields=["latitude", "longitude", "last_location_update"]
+                )
+
+        return locations
+
     @staticmethod
     def get_recent_locations(user: User, trip: Optional[Trip] = None, limit: int = 100):
         """
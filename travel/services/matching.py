@@ -2,36 +2,36 @@
 Matching service for finding compatible trip companions
 """
 
-import math
-from typing import List, Tuple
+import heapq
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 from django.db.models import Q
 from django.utils import timezone
 from travel.models import Trip, TripMatch
-
-
-def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """
-    Calculate the great circle distance between two points
-    on the earth (specified in decimal degrees)
-    Returns distance in kilometers
-    """
-    # Convert decimal degrees to radians
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-
-    # Haversine formula
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = (
-        math.sin(dlat / 2) ** 2
-        + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
-    )
-    c = 2 * math.asin(math.sqrt(a))
-
-    # Radius of earth in kilometers
-    r = 6371
-
-    return c * r
+from travel.services.geo import haversine_km, haversine_km_many
+from user.models import Social
+
+# Trip columns that candidate scoring reads
+MATCH_CANDIDATE_FIELDS = (
+    "id",
+    "user",
+    "destination",
+    "destination_lat",
+    "destination_lng",
+    "start_date",
+    "end_date",
+    "duration_days",
+    "interests",
+    "privacy",
+)
+
+# Points each part of a match score is worth, out of 100
+DATE_OVERLAP_WEIGHT = 50
+DISTANCE_WEIGHT = 30
+INTEREST_WEIGHT = 20
+
+# Matches scoring below this are not created
+MATCH_SCORE_THRESHOLD = 30
 
 
 def calculate_date_overlap(trip1: Trip, trip2: Trip) -> int:
@@ -62,6 +62,32 @@ def calculate_interest_match(interests1: list, interests2: list) -> Tuple[list,
     return common, match_percentage
 
 
+def _date_score(overlap_days: int, max_trip_duration: int) -> float:
+    """Score the share of the longer trip the two trips overlap"""
+    return (overlap_days / max_trip_duration) * DATE_OVERLAP_WEIGHT
+
+
+def _distance_score(
+    distance: Optional[float], same_destination: bool, max_distance_km: float
+) -> float:
+    """
+    Score how close the destinations are
+
+    Closer is better, out to max_distance_km. Without coordinates
+    (distance is None) the destination names must match instead.
+    """
+    if distance is None:
+        return DISTANCE_WEIGHT if same_destination else 0
+    if distance > max_distance_km:
+        return 0
+    return ((max_distance_km - distance) / max_distance_km) * DISTANCE_WEIGHT
+
+
+def _interest_score(interest_percentage: float) -> float:
+    """Score the share of interests the two trips have in common"""
+    return (interest_percentage / 100) * INTEREST_WEIGHT
+
+
 def calculate_match_score(
     trip: Trip, candidate_trip: Trip, max_distance_km: float = 5
 ) -> Tuple[float, dict]:
@@ -89,17 +115,18 @@ def calculate_match_score(
     if overlap_days == 0:
         return 0.0, details  # No overlap = no match
 
-    date_score = (overlap_days / max_trip_duration) * 50
+    date_score = _date_score(overlap_days, max_trip_duration)
     details["date_overlap_days"] = overlap_days
 
     # 2. Distance score (30 points max)
+    distance = None
     if (
         trip.destination_lat
         and trip.destination_lng
         and candidate_trip.destination_lat
         and candidate_trip.destination_lng
     ):
-        distance = haversine_distance(
+        distance = haversine_km(
             float(trip.destination_lat),
             float(trip.destination_lng),
             float(candidate_trip.destination_lat),
@@ -107,25 +134,18 @@ def calculate_match_score(
         )
         details["distance_km"] = round(distance, 2)
 
-        # Closer is better, max distance is max_distance_km
-        if distance > max_distance_km:
-            distance_score = 0
-        else:
-            distance_score = ((max_distance_km - distance) / max_distance_km) * 30
-    else:
-        # No coordinates, use destination name match
-        if trip.destination.lower() == candidate_trip.destination.lower():
-            distance_score = 30
-        else:
-            distance_score = 0
-
+    distance_score = _distance_score(
+        distance,
+        trip.destination.lower() == candidate_trip.destination.lower(),
+        max_distance_km,
+    )
     details["distance_score"] = round(distance_score, 2)
 
     # 3. Interest match (20 points max)
     common_interests, interest_percentage = calculate_interest_match(
         trip.interests, candidate_trip.interests
     )
-    interest_score = (interest_percentage / 100) * 20
+    interest_score = _interest_score(interest_percentage)
     details["interest_score"] = round(interest_score, 2)
     details["common_interests"] = common_interests
 
@@ -135,51 +155,285 @@ def calculate_match_score(
     return round(total_score, 2), details
 
 
-def find_trip_matches(trip: Trip, limit: int = 10) -> List[TripMatch]:
+def _friend_ids_by_user(user_ids) -> Dict[object, Set[object]]:
+    """Map each user id to the ids of their friends, in one query"""
+    friend_ids = {user_id: set() for user_id in user_ids}
+    for user_id, friend_id in Social.friends.through.objects.filter(
+        social__user_id__in=friend_ids
+    ).values_list("social__user_id", "user_id"):
+        friend_ids[user_id].add(friend_id)
+    return friend_ids
+
+
+def _overlapping_candidates(
+    trips: List[Trip], candidates: List[Trip]
+) -> Iterator[Tuple[Trip, List[Trip]]]:
+    """
+    Pair each trip with the candidates whose dates overlap it
+
+    Trips are visited in start_date order. Candidates enter a heap keyed on
+    end_date once they start before the trip ends, and leave it for good once
+    they end before the trip starts, since later trips start no earlier.
+    """
+    candidates = sorted(candidates, key=lambda candidate: candidate.start_date)
+    active = []  # (end_date, position, candidate)
+    position = 0
+
+    for trip in sorted(trips, key=lambda trip: trip.start_date):
+        while (
+            position < len(candidates)
+            and candidates[position].start_date <= trip.end_date
+        ):
+            candidate = candidates[position]
+            heapq.heappush(active, (candidate.end_date, position, candidate))
+            position += 1
+
+        while active and active[0][0] < trip.start_date:
+            heapq.heappop(active)
+
+        yield trip, [
+            candidate
+            for _, _, candidate in active
+            if candidate.start_date <= trip.end_date
+        ]
+
+
+class _InterestMasks:
+    """
+    Interest lists as integer bitmasks, one bit per distinct interest
+
+    Bits are handed out as interests are first seen, and each trip's mask is
+    built once, so comparing two trips is an AND, an OR and two bit counts
+    instead of building and intersecting sets.
     """
-    Find and create matches for a trip
+
+    def __init__(self):
+        self.bits: Dict[str, int] = {}
+        self._masks: Dict[object, int] = {}
+
+    def of(self, trip: Trip) -> int:
+        """Return the mask for a trip's interests"""
+        mask = self._masks.get(trip.pk)
+        if mask is None:
+            mask = 0
+            for interest in trip.interests or ():
+                bit = self.bits.get(interest)
+                if bit is None:
+                    bit = self.bits[interest] = 1 << len(self.bits)
+                mask |= bit
+            self._masks[trip.pk] = mask
+        return mask
+
+
+def _score_candidates(
+    trip: Trip,
+    candidates: List[Trip],
+    max_distance_km: float = 5,
+    interest_masks: Optional[_InterestMasks] = None,
+) -> Iterator[Tuple[float, dict, Trip]]:
+    """
+    Score many candidates against one trip, as calculate_match_score does
+
+    Everything that depends only on the trip (its dates, duration, interest
+    mask and destination) is worked out once for the batch, and destination
+    distances come from a single haversine_km_many pass. Passing the same
+    interest_masks for several trips reuses each candidate's mask.
+
+    Yields:
+        (score, details, candidate_trip) for candidates whose dates overlap
+    """
+    trip_located = bool(trip.destination_lat and trip.destination_lng)
+    trip_destination = trip.destination.lower()
+    if interest_masks is None:
+        interest_masks = _InterestMasks()
+    trip_mask = interest_masks.of(trip)
+
+    # Destination distances for every candidate with coordinates in one pass
+    distances = {}
+    if trip_located:
+        located = [
+            candidate
+            for candidate in candidates
+            if candidate.destination_lat and candidate.destination_lng
+        ]
+        distances = dict(
+            zip(
+                (candidate.pk for candidate in located),
+                haversine_km_many(
+                    float(trip.destination_lat),
+                    float(trip.destination_lng),
+                    (
+                        (
+                            float(candidate.destination_lat),
+                            float(candidate.destination_lng),
+                        )
+                        for candidate in located
+                    ),
+                ),
+            )
+        )
+
+    for candidate_trip in candidates:
+        # 1. Date overlap (50 points max)
+        overlap_days = (
+            min(trip.end_date, candidate_trip.end_date)
+            - max(trip.start_date, candidate_trip.start_date)
+        ).days + 1
+        if overlap_days <= 0:
+            continue  # No overlap = no match
+
+        date_score = _date_score(
+            overlap_days, max(trip.duration_days, candidate_trip.duration_days)
+        )
+
+        # 2. Distance score (30 points max)
+        distance = distances.get(candidate_trip.pk)
+        distance_km = round(distance, 2) if distance is not None else None
+        distance_score = _distance_score(
+            distance,
+            trip_destination == candidate_trip.destination.lower(),
+            max_distance_km,
+        )
+
+        # 3. Interest match (20 points max)
+        common_interests = []
+        interest_score = 0.0
+        candidate_mask = interest_masks.of(candidate_trip) if trip_mask else 0
+        if candidate_mask:
+            common = trip_mask & candidate_mask
+            if common:
+                common_interests = [
+                    interest
+                    for interest in dict.fromkeys(trip.interests)
+                    if interest_masks.bits[interest] & common
+                ]
+            total_unique = (trip_mask | candidate_mask).bit_count()
+            interest_score = _interest_score((common.bit_count() / total_unique) * 100)
+
+        details = {
+            "date_overlap_days": overlap_days,
+            "distance_score": round(distance_score, 2),
+            "interest_score": round(interest_score, 2),
+            "common_interests": common_interests,
+            "distance_km": distance_km,
+        }
+        score = round(date_score + distance_score + interest_score, 2)
+        yield score, details, candidate_trip
+
+
+def _build_matches(
+    trip: Trip,
+    candidates: List[Trip],
+    interest_masks: Optional[_InterestMasks] = None,
+) -> List[TripMatch]:
+    """Score candidates for one trip and build unsaved matches above the threshold"""
+    # Best scoring trip per user, since a trip is matched once per user
+    best = {}
+    for score, details, candidate_trip in _score_candidates(
+        trip, candidates, interest_masks=interest_masks
+    ):
+        # Only create match if score is above threshold
+        if score >= MATCH_SCORE_THRESHOLD:
+            current = best.get(candidate_trip.user_id)
+            if current is None or score > current[0]:
+                best[candidate_trip.user_id] = (score, details, candidate_trip)
+
+    matches = [
+        TripMatch(
+            trip=trip,
+            matched_user_id=candidate_trip.user_id,
+            # By id, so callers never see the partially loaded candidate
+            matched_trip_id=candidate_trip.pk,
+            score=score,
+            common_interests=details["common_interests"],
+            distance_km=details["distance_km"],
+            status="pending",
+        )
+        for score, details, candidate_trip in best.values()
+    ]
+
+    # Sort by score
+    matches.sort(key=lambda x: x.score, reverse=True)
+    return matches
+
+
+def find_matches_for_trips(
+    trips: List[Trip], limit: int = 10
+) -> Dict[object, List[TripMatch]]:
+    """
+    Find and create matches for several trips at once
+
+    Candidates for every trip are fetched with one query over the combined
+    date window, then paired with the trips by a sweep over start dates. All
+    new matches are saved with batched INSERTs.
 
     Args:
-        trip: The trip to find matches for
-        limit: Maximum number of matches to return
+        trips: The trips to find matches for
+        limit: Maximum number of matches to return per trip
 
     Returns:
-        List of TripMatch objects (saved to database)
+        Dict mapping trip id to its TripMatch objects (saved to database)
     """
-    # Delete existing pending matches
-    TripMatch.objects.filter(trip=trip, status="pending").delete()
+    trips = list(trips)
+    if not trips:
+        return {}
+
+    # Delete existing pending matches; users with an accepted or rejected
+    # match on a trip are not offered again
+    TripMatch.objects.filter(trip__in=trips, status="pending").delete()
+    decided = {trip.pk: set() for trip in trips}
+    for trip_id, user_id in TripMatch.objects.filter(trip__in=trips).values_list(
+        "trip_id", "matched_user_id"
+    ):
+        decided[trip_id].add(user_id)
 
-    # Find candidate trips
-    candidates = (
+    friend_ids = _friend_ids_by_user({trip.user_id for trip in trips})
+    all_friend_ids = set().union(*friend_ids.values())
+
+    # Find candidate trips for the whole batch
+    candidates = list(
         Trip.objects.filter(
-            Q(privacy="public")
-            | Q(privacy="friends_only", user__in=trip.user.social.friends.all())
-        )
-        .exclude(user=trip.user)  # Exclude own trips
-        .filter(
-            start_date__lte=trip.end_date,  # Trip starts before our trip ends
-            end_date__gte=trip.start_date,  # Trip ends after our trip starts
-        )
+            Q(privacy="public") | Q(privacy="friends_only", user__in=all_friend_ids),
+            start_date__lte=max(trip.end_date for trip in trips),
+            end_date__gte=min(trip.start_date for trip in trips),
+        ).only(*MATCH_CANDIDATE_FIELDS)
     )
 
-    matches = []
-    for candidate_trip in candidates:
-        # Calculate match score
-        score, details = calculate_match_score(trip, candidate_trip)
-
-        # Only create match if score is above threshold (e.g., 30%)
-        if score >= 30:
-            match = TripMatch.objects.create(
-                trip=trip,
-                matched_user=candidate_trip.user,
-                matched_trip=candidate_trip,
-                score=score,
-                common_interests=details["common_interests"],
-                distance_km=details["distance_km"],
-                status="pending",
+    # Shared across the batch so each candidate's interests are encoded once
+    interest_masks = _InterestMasks()
+
+    matches = {}
+    for trip, overlapping in _overlapping_candidates(trips, candidates):
+        visible = [
+            candidate
+            for candidate in overlapping
+            if candidate.user_id != trip.user_id  # Exclude own trips
+            and candidate.user_id not in decided[trip.pk]
+            and (
+                candidate.privacy == "public"
+                or candidate.user_id in friend_ids[trip.user_id]
             )
-            matches.append(match)
+        ]
+        matches[trip.pk] = _build_matches(trip, visible, interest_masks)
 
-    # Sort by score and return top N
-    matches.sort(key=lambda x: x.score, reverse=True)
-    return matches[:limit]
+    TripMatch.objects.bulk_create(
+        [match for trip_matches in matches.values() for match in trip_matches],
+        batch_size=500,
+    )
+
+    # Return top N per trip
+    return {trip_id: trip_matches[:limit] for trip_id, trip_matches in matches.items()}
+
+
+def find_trip_matches(trip: Trip, limit: int = 10) -> List[TripMatch]:
+    """
+    Find and create matches for a trip
+
+    Args:
+        trip: The trip to find matches for
+        limit: Maximum number of matches to return
+
+    Returns:
+        List of TripMatch objects (saved to database)
+    """
+    return find_matches_for_trips([trip], limit=limit)[trip.pk]
@@ -0,0 +1,135 @@
+"""
+In-process spatial index of insights places
+
+Hotspot detection matches every cluster against the insights place tables.
+Those tables change rarely, so they are read once per process into geohash
+buckets and searched in memory until a place's data is regenerated or the
+index ages out.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from insights.signals import place_data_replaced
+from travel.services.geo import (
+    geohash_cells_around,
+    geohash_encode,
+    haversine_km_many,
+)
+
+# Other workers and manual place edits are only seen once the index ages out
+PLACE_INDEX_TTL_SECONDS = 300
+# Cells of roughly 1.2km x 0.6km, a few per search radius
+PLACE_INDEX_PRECISION = 6
+PLACE_INDEX_CHUNK_SIZE = 2000
+
+
+def _place_models() -> List[Tuple[type, str]]:
+    """Place models in match priority order, with the field holding the name"""
+    from insights.models import HiddenGem, MostFamousPlace, ThingToDo, TouristTrap
+
+    # ThingToDo has no name, only a location
+    return [
+        (MostFamousPlace, "name"),
+        (HiddenGem, "name"),
+        (TouristTrap, "name"),
+        (ThingToDo, "location"),
+    ]
+
+
+class PlaceIndex:
+    """Insights places bucketed by geohash cell, rebuilt lazily"""
+
+    def __init__(self):
+        # cell -> [(priority, latitude, longitude, name, place_id)]
+        self._buckets: Optional[Dict[str, List[Tuple]]] = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+        self._connected = False
+
+    def invalidate(self, **kwargs) -> None:
+        """Drop the index so the next lookup rebuilds it"""
+        self._buckets = None
+
+    def _build(self) -> Dict[str, List[Tuple]]:
+        if not self._connected:
+            place_data_replaced.connect(self.invalidate, weak=False)
+            self._connected = True
+
+        buckets = {}
+        for priority, (model, name_field) in enumerate(_place_models()):
+            # Rows are streamed into the buckets rather than cached twice
+            rows = (
+                model.objects.filter(latitude__isnull=False, longitude__isnull=False)
+                .values_list("id", name_field, "latitude", "longitude")
+                .iterator(chunk_size=PLACE_INDEX_CHUNK_SIZE)
+            )
+            for place_id, name, latitude, longitude in rows:
+                cell = geohash_encode(latitude, longitude, PLACE_INDEX_PRECISION)
+                buckets.setdefault(cell, []).append(
+                    (priority, latitude, longitude, name, str(place_id))
+                )
+
+        return buckets
+
+    def _is_current(self, buckets) -> bool:
+        return (
+            buckets is not None
+            and time.monotonic() - self._built_at <= PLACE_INDEX_TTL_SECONDS
+        )
+
+    def _get_buckets(self) -> Dict[str, List[Tuple]]:
+        buckets = self._buckets
+        if not self._is_current(buckets):
+            with self._lock:
+                buckets = self._buckets
+                if not self._is_current(buckets):
+                    buckets = self._build()
+                    self._buckets = buckets
+                    self._built_at = time.monotonic()
+        return buckets
+
+    def nearest(
+        self, latitude: float, longitude: float, radius_km: float
+    ) -> Optional[Tuple[str, str]]:
+        """
+        Find the place to label a location with
+
+        Args:
+            latitude: Location latitude
+            longitude: Location longitude
+            radius_km: Search radius in km
+
+        Returns:
+            (name, place_id) of the closest place within the radius from the
+            first place model that has one, or None
+        """
+        buckets = self._get_buckets()
+        cells = geohash_cells_around(
+            latitude, longitude, radius_km, precision=PLACE_INDEX_PRECISION
+        )
+        if cells is None:
+            candidates = [place for bucket in buckets.values() for place in bucket]
+        else:
+            candidates = [place for cell in cells for place in buckets.get(cell, ())]
+
+        distances = haversine_km_many(
+            latitude,
+            longitude,
+            ((place[1], place[2]) for place in candidates),
+            max_km=radius_km,
+        )
+        within = [
+            (place[0], distance, place)
+            for place, distance in zip(candidates, distances)
+            if distance <= radius_km
+        ]
+        if not within:
+            return None
+
+        _, _, place = min(within, key=lambda item: item[:2])
+        return place[3], place[4]
+
+
+place_index = PlaceIndex()
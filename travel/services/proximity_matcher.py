@@ -4,44 +4,18 @@ Tracks distance between matched users and auto-expires distant matches
 """
 
 from decimal import Decimal
-from math import atan2, cos, radians, sin, sqrt
 from typing import List
 
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
 from travel.models import Trip, TripMatch
+from travel.services.geo import short_distance_km_many
 
 User = get_user_model()
 
 
-def calculate_distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """
-    Calculate distance between two points in kilometers using Haversine formula
-
-    Args:
-        lat1, lon1: First point coordinates
-        lat2, lon2: Second point coordinates
-
-    Returns:
-        Distance in kilometers
-    """
-    R = 6371  # Earth radius in kilometers
-
-    lat1_rad = radians(lat1)
-    lat2_rad = radians(lat2)
-    delta_lat = radians(lat2 - lat1)
-    delta_lon = radians(lon2 - lon1)
-
-    a = (
-        sin(delta_lat / 2) ** 2
-        + cos(lat1_rad) * cos(lat2_rad) * sin(delta_lon / 2) ** 2
-    )
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-
-    return R * c
-
-
 class ProximityMatcher:
     """Manages real-time proximity tracking for trip matches"""
 
@@ -51,9 +25,11 @@ class ProximityMatcher:
     AUTO_EXPIRE_KM = 5.0  # 5km - auto-expire when users separate beyond this distance
 
     @staticmethod
+    @transaction.atomic
     def update_match_distances(user: User, latitude: float, longitude: float) -> dict:
         """
         Update distances for all pending matches involving this user
+        Runs in one transaction that holds the match row locks until commit
 
         Args:
             user: User whose location updated
@@ -69,34 +45,51 @@ class ProximityMatcher:
             "close_matches": [],
         }
 
-        # Find all pending matches where this user is involved
-        pending_matches = TripMatch.objects.filter(
-            Q(trip__user=user) | Q(matched_user=user),
-            status="pending",
-            is_proximity_expired=False,
+        # Find all pending matches where this user is involved, with both
+        # users' profiles joined in. Matches another ping is already
+        # refreshing are skipped rather than waited on, and only the match
+        # rows themselves are locked.
+        pending_matches = (
+            TripMatch.objects.filter(
+                Q(trip__user=user) | Q(matched_user=user),
+                status="pending",
+                is_proximity_expired=False,
+            )
+            .select_related("trip__user__profile", "matched_user__profile")
+            .select_for_update(skip_locked=True, of=("self",))
         )
 
+        # Pair each match with the other user's position, then measure them
+        # all in one batch
+        located = []
         for match in pending_matches:
             # Determine the other user
             other_user = (
-                match.matched_user if match.trip.user == user else match.trip.user
+                match.matched_user if match.trip.user_id == user.pk else match.trip.user
             )
 
             # Get other user's current location
-            if not hasattr(other_user, "profile") or not other_user.profile.latitude:
+            profile = getattr(other_user, "profile", None)
+            if profile is None or not profile.latitude:
                 continue
 
-            other_lat = float(other_user.profile.latitude)
-            other_lng = float(other_user.profile.longitude)
+            located.append(
+                (match, other_user, float(profile.latitude), float(profile.longitude))
+            )
 
-            # Calculate current distance
-            distance = calculate_distance_km(latitude, longitude, other_lat, other_lng)
+        # Every threshold here is a few km, where the equirectangular
+        # shortcut matches the haversine
+        distances = short_distance_km_many(
+            latitude, longitude, ((item[2], item[3]) for item in located)
+        )
 
+        now = timezone.now()
+        updated = []
+        for (match, other_user, _, _), distance in zip(located, distances):
             # Update match
             match.current_distance_km = distance
-            match.last_distance_update = timezone.now()
-            match.save(update_fields=["current_distance_km", "last_distance_update"])
-            stats["updated_count"] += 1
+            match.last_distance_update = now
+            updated.append(match)
 
             # Check if very close
             if distance <= ProximityMatcher.CLOSE_PROXIMITY_KM:
@@ -112,9 +105,21 @@ class ProximityMatcher:
             if ProximityMatcher._should_expire(match, distance):
                 match.is_proximity_expired = True
                 match.status = "rejected"  # Auto-reject distant matches
-                match.save(update_fields=["is_proximity_expired", "status"])
                 stats["expired_count"] += 1
 
+        # Write every refreshed match back in one statement
+        TripMatch.objects.bulk_update(
+            updated,
+            [
+                "current_distance_km",
+                "last_distance_update",
+                "is_proximity_expired",
+                "status",
+            ],
+            batch_size=500,
+        )
+        stats["updated_count"] = len(updated)
+
         return stats
 
     @staticmethod
@@ -152,13 +157,17 @@ class ProximityMatcher:
         Returns:
             List of TripMatch objects sorted by distance
         """
-        pending_matches = TripMatch.objects.filter(
-            Q(trip__user=user) | Q(matched_user=user),
-            status="pending",
-            is_proximity_expired=False,
-            current_distance_km__lte=max_distance_km,
-            current_distance_km__isnull=False,
-        ).order_by("current_distance_km")
+        pending_matches = (
+            TripMatch.objects.filter(
+                Q(trip__user=user) | Q(matched_user=user),
+                status="pending",
+                is_proximity_expired=False,
+                current_distance_km__lte=max_distance_km,
+                current_distance_km__isnull=False,
+            )
+            .select_related("trip__user", "matched_user")
+            .order_by("current_distance_km")
+        )
 
         return list(pending_matches)
 
@@ -173,18 +182,22 @@ class ProximityMatcher:
         Returns:
             List of dicts with match info for close proximity
         """
-        close_matches = TripMatch.objects.filter(
-            Q(trip__user=user) | Q(matched_user=user),
-            status="pending",
-            is_proximity_expired=False,
-            current_distance_km__lte=ProximityMatcher.CLOSE_PROXIMITY_KM,
-            current_distance_km__isnull=False,
-        ).order_by("current_distance_km")
+        close_matches = (
+            TripMatch.objects.filter(
+                Q(trip__user=user) | Q(matched_user=user),
+                status="pending",
+                is_proximity_expired=False,
+                current_distance_km__lte=ProximityMatcher.CLOSE_PROXIMITY_KM,
+                current_distance_km__isnull=False,
+            )
+            .select_related("trip__user", "matched_user")
+            .order_by("current_distance_km")
+        )
 
         alerts = []
         for match in close_matches:
             other_user = (
-                match.matched_user if match.trip.user == user else match.trip.user
+                match.matched_user if match.trip.user_id == user.pk else match.trip.user
             )
             alerts.append(
                 {
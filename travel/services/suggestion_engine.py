@@ -3,26 +3,43 @@ AI-powered suggestion engine for contextual travel tips
 Generates suggestions when users are near significant places
 """
 
-from decimal import Decimal
-from math import atan2, cos, radians, sin, sqrt
+import math
+import time
+from functools import lru_cache
 from typing import Dict, List, Optional
 
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.db.models import CharField, F, IntegerField, Q, TextField, Value
+from django.db.models.functions import Cast
+from django.dispatch import receiver
 from django.utils import timezone
 from insights.models import (
     FamousPlace,
     HiddenGem,
     MostFamousPlace,
-    Place,
     ThingToDo,
     TouristTrap,
 )
 from insights.services.client.gemini_client import GeminiClient
+from insights.signals import place_data_replaced
 from travel.models import LocationHistory, Trip, TripSuggestion
+from travel.services.geo import (
+    DEGREES_PER_KM,
+    filter_within_radius,
+    haversine_km,
+    to_coordinate,
+)
 
 User = get_user_model()
 
+# Nearby places are looked up once per grid cell of this size and shared by
+# every location in it. Other workers and manual place edits are seen once the
+# TTL rolls over.
+NEARBY_CELL_DEGREES = 0.001
+NEARBY_CACHE_TTL_SECONDS = 300
+# Farthest a location can be from its cell's center, in meters
+NEARBY_CELL_MARGIN = NEARBY_CELL_DEGREES / 2 * math.sqrt(2) / DEGREES_PER_KM * 1000
+
 
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
@@ -35,20 +52,164 @@ def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     Returns:
         Distance in meters
     """
-    R = 6371000  # Earth radius in meters
+    # Shares the tuned haversine in geo rather than keeping a second copy
+    return haversine_km(lat1, lon1, lat2, lon2) * 1000
+
+
+# Columns every branch of the nearby places union selects, in order
+_NEARBY_PLACE_COLUMNS = (
+    "place_type",
+    "radius",
+    "row_id",
+    "place_name",
+    "place_text",
+    "place_time",
+    "place_lat",
+    "place_lng",
+    "city",
+)
 
-    lat1_rad = radians(lat1)
-    lat2_rad = radians(lat2)
-    delta_lat = radians(lat2 - lat1)
-    delta_lon = radians(lon2 - lon1)
 
-    a = (
-        sin(delta_lat / 2) ** 2
-        + cos(lat1_rad) * cos(lat2_rad) * sin(delta_lon / 2) ** 2
-    )
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+def _nearby_place_sources() -> List[tuple]:
+    """
+    Place models with their suggestion type, radius in meters and the
+    fields holding the name, the description and the time of day
+    """
+    return [
+        (
+            MostFamousPlace,
+            "famous_place",
+            SuggestionEngine.FAMOUS_PLACE_RADIUS,
+            "name",
+            "quote",
+            None,
+        ),
+        (
+            FamousPlace,
+            "famous_place",
+            SuggestionEngine.FAMOUS_PLACE_RADIUS,
+            "name",
+            "quote",
+            None,
+        ),
+        (
+            HiddenGem,
+            "hidden_gem",
+            SuggestionEngine.HIDDEN_GEM_RADIUS,
+            "name",
+            "description",
+            None,
+        ),
+        (
+            TouristTrap,
+            "tourist_trap",
+            SuggestionEngine.TOURIST_TRAP_RADIUS,
+            "name",
+            "reason",
+            None,
+        ),
+        # Activities are named by their location and described by their type
+        (
+            ThingToDo,
+            "activity",
+            SuggestionEngine.ACTIVITY_LOCATION_RADIUS,
+            "location",
+            "activity_type",
+            "time",
+        ),
+    ]
+
+
+def _describe_place(
+    place_type: str,
+    place_id,
+    name: str,
+    text: str,
+    time_of_day: Optional[str],
+    city: str,
+) -> Dict:
+    """Build the place info dict a suggestion prompt is written from"""
+    if place_type == "activity":
+        return {
+            "type": place_type,
+            "name": f"{text} at {name}",
+            "activity_type": text,
+            "location": name,
+            "time": time_of_day or "Anytime",
+            "place_id": place_id,
+            "city": city,
+        }
+
+    text_key = "quote" if place_type == "famous_place" else "description"
+    return {
+        "type": place_type,
+        "name": name,
+        text_key: text,
+        "place_id": place_id,
+        "city": city,
+    }
 
-    return R * c
+
+@lru_cache(maxsize=4096)
+def _nearby_place_candidates(lat_cell: int, lng_cell: int, ttl_epoch: int) -> tuple:
+    """
+    Places that may be in range of some location in a grid cell
+
+    Each radius is widened by the cell margin around the cell's center, so
+    every place in range of any point in the cell is included. All place
+    tables are searched in a single UNION ALL query.
+
+    Returns:
+        Tuple of (radius in meters, latitude, longitude, place info dict)
+    """
+    latitude = lat_cell * NEARBY_CELL_DEGREES
+    longitude = lng_cell * NEARBY_CELL_DEGREES
+
+    branches = []
+    for source in _nearby_place_sources():
+        model, place_type, radius, name_field, text_field, time_field = source
+        places = filter_within_radius(
+            model.objects.all(),
+            latitude,
+            longitude,
+            (radius + NEARBY_CELL_MARGIN) / 1000,
+        )
+        branches.append(
+            places.annotate(
+                place_type=Value(place_type, output_field=CharField()),
+                radius=Value(radius, output_field=IntegerField()),
+                row_id=F("id"),
+                place_name=F(name_field),
+                place_text=Cast(text_field, TextField()),
+                place_time=(
+                    F(time_field)
+                    if time_field
+                    else Value(None, output_field=CharField())
+                ),
+                place_lat=F("latitude"),
+                place_lng=F("longitude"),
+                city=F("place__city"),
+            ).values_list(*_NEARBY_PLACE_COLUMNS)
+        )
+
+    candidates = []
+    for row in branches[0].union(*branches[1:], all=True):
+        place_type, radius, place_id, name, text, time_of_day, lat, lng, city = row
+        candidates.append(
+            (
+                radius,
+                lat,
+                lng,
+                _describe_place(place_type, place_id, name, text, time_of_day, city),
+            )
+        )
+    return tuple(candidates)
+
+
+@receiver(place_data_replaced)
+def invalidate_nearby_places(sender, **kwargs):
+    """Drop every cached nearby place lookup once regenerated places commit"""
+    _nearby_place_candidates.cache_clear()
 
 
 class SuggestionEngine:
@@ -126,17 +287,11 @@ class SuggestionEngine:
             created_at__gte=timezone.now() - timezone.timedelta(hours=2),
         )
 
-        for suggestion in recent_suggestions:
-            distance = calculate_distance(
-                float(suggestion.latitude),
-                float(suggestion.longitude),
-                latitude,
-                longitude,
-            )
-            if distance < radius:
-                return True
-
-        return False
+        # The (user, trip, created_at) index finds the recent rows and the
+        # radius filter drops distant ones, so nothing is read back
+        return filter_within_radius(
+            recent_suggestions, latitude, longitude, radius / 1000
+        ).exists()
 
     def _find_nearby_places(
         self,
@@ -148,105 +303,18 @@ class SuggestionEngine:
 
         Returns list of dicts with place info and type
         """
-        nearby = []
-
-        # Check famous places
-        famous_places = MostFamousPlace.objects.all()
-        for place in famous_places:
-            distance = calculate_distance(
-                latitude, longitude, place.latitude, place.longitude
-            )
-            if distance <= self.FAMOUS_PLACE_RADIUS:
-                nearby.append(
-                    {
-                        "type": "famous_place",
-                        "name": place.name,
-                        "quote": place.quote,
-                        "distance": distance,
-                        "place_id": place.id,
-                        "city": place.place.city,
-                    }
-                )
-
-        # Check other famous places
-        other_famous = FamousPlace.objects.all()
-        for place in other_famous:
-            distance = calculate_distance(
-                latitude, longitude, place.latitude, place.longitude
-            )
-            if distance <= self.FAMOUS_PLACE_RADIUS:
-                nearby.append(
-                    {
-                        "type": "famous_place",
-                        "name": place.name,
-                        "quote": place.reason,
-                        "distance": distance,
-                        "place_id": place.id,
-                        "city": place.place.city,
-                    }
-                )
-
-        # Check hidden gems
-        hidden_gems = HiddenGem.objects.exclude(
-            latitude__isnull=True, longitude__isnull=True
-        )
-        for gem in hidden_gems:
-            distance = calculate_distance(
-                latitude, longitude, gem.latitude, gem.longitude
-            )
-            if distance <= self.HIDDEN_GEM_RADIUS:
-                nearby.append(
-                    {
-                        "type": "hidden_gem",
-                        "name": gem.name,
-                        "description": gem.description,
-                        "distance": distance,
-                        "place_id": gem.id,
-                        "city": gem.place.city,
-                    }
-                )
-
-        # Check tourist traps
-        tourist_traps = TouristTrap.objects.exclude(
-            latitude__isnull=True, longitude__isnull=True
-        )
-        for trap in tourist_traps:
-            distance = calculate_distance(
-                latitude, longitude, trap.latitude, trap.longitude
-            )
-            if distance <= self.TOURIST_TRAP_RADIUS:
-                nearby.append(
-                    {
-                        "type": "tourist_trap",
-                        "name": trap.name,
-                        "description": trap.reason,
-                        "distance": distance,
-                        "place_id": trap.id,
-                        "city": trap.place.city,
-                    }
-                )
-
-        # Check activity locations
-        activities = ThingToDo.objects.exclude(
-            latitude__isnull=True, longitude__isnull=True
+        candidates = _nearby_place_candidates(
+            round(latitude / NEARBY_CELL_DEGREES),
+            round(longitude / NEARBY_CELL_DEGREES),
+            int(time.monotonic() // NEARBY_CACHE_TTL_SECONDS),
         )
-        for activity in activities:
-            distance = calculate_distance(
-                latitude, longitude, activity.latitude, activity.longitude
-            )
-            if distance <= self.ACTIVITY_LOCATION_RADIUS:
-                nearby.append(
-                    {
-                        "type": "activity",
-                        "name": f"{activity.activity_type} at {activity.location}",
-                        "activity_type": activity.activity_type,
-                        "location": activity.location,
-                        "time": activity.time or "Anytime",
-                        "distance": distance,
-                        "place_id": activity.id,
-                        "city": activity.place.city,
-                    }
-                )
+
+        # Only the exact distance check is specific to this location
+        nearby = []
+        for radius, place_lat, place_lng, place_info in candidates:
+            distance = calculate_distance(latitude, longitude, place_lat, place_lng)
+            if distance <= radius:
+                nearby.append({**place_info, "distance": distance})
 
         return nearby
 
@@ -279,8 +347,8 @@ class SuggestionEngine:
                 suggestion_type=suggestion_type,
                 content=suggestion_text,
                 title=place_info["name"],
-                latitude=Decimal(str(latitude)),
-                longitude=Decimal(str(longitude)),
+                latitude=to_coordinate(latitude),
+                longitude=to_coordinate(longitude),
                 location_name=place_info.get("city", ""),
                 related_place_id=place_info.get("place_id"),
             )
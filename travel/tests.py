@@ -1,3 +1,776 @@
-from django.test import TestCase
+import random
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
 
-# Create your tests here.
+from core.schema import schema
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from insights.models import (
+    FamousPlace,
+    HiddenGem,
+    MostFamousPlace,
+    Place,
+    ThingToDo,
+    TouristTrap,
+)
+from insights.services.cache_manager import _replace_related_data
+from travel.models import ActivityHotspot, LocationHistory, Trip, TripMatch
+from travel.services.geo import (
+    filter_within_radius,
+    geohash_cells_around,
+    geohash_encode,
+    haversine_km,
+    haversine_km_many,
+    short_distance_km_many,
+)
+from travel.services.location_tracker import LocationTracker
+from travel.services.matching import (
+    _InterestMasks,
+    _overlapping_candidates,
+    _score_candidates,
+    calculate_date_overlap,
+    calculate_match_score,
+)
+from travel.services.place_index import PlaceIndex
+from travel.services.suggestion_engine import (
+    SuggestionEngine,
+    _nearby_place_candidates,
+    calculate_distance,
+)
+
+User = get_user_model()
+
+
+def execute(query, user, **variables):
+    """Run a GraphQL operation as the given user and return its data"""
+    request = RequestFactory().post("/graphql/")
+    request.user = user
+    result = schema.execute(query, context_value=request, variable_values=variables)
+    assert not result.errors, result.errors
+    return result.data
+
+
+class TripLifecycleMutationTests(TestCase):
+    """Test suite for the conditional trip and match state transitions"""
+
+    START_TRIP = "mutation($id: UUID!) { startTrip(tripId: $id) { success } }"
+    END_TRIP = "mutation($id: UUID!) { endTrip(tripId: $id) { success } }"
+    ACCEPT_MATCH = "mutation($id: UUID!) { acceptMatch(matchId: $id) { success } }"
+    REJECT_MATCH = "mutation($id: UUID!) { rejectMatch(matchId: $id) { success } }"
+
+    def setUp(self):
+        """Set up two users, each with a trip, and a pending match between them"""
+        self.user = User.objects.create_user(email="owner@example.com", password="pass")
+        self.other = User.objects.create_user(
+            email="other@example.com", password="pass"
+        )
+        self.trip = Trip.objects.create(
+            user=self.user,
+            origin="Bengaluru",
+            destination="Goa",
+            start_date=date(2030, 1, 10),
+            end_date=date(2030, 1, 15),
+        )
+        other_trip = Trip.objects.create(
+            user=self.other,
+            origin="Mumbai",
+            destination="Goa",
+            start_date=date(2030, 1, 10),
+            end_date=date(2030, 1, 15),
+        )
+        self.match = TripMatch.objects.create(
+            trip=self.trip,
+            matched_user=self.other,
+            matched_trip=other_trip,
+            score=80,
+        )
+
+    def test_start_trip_only_once(self):
+        """Test a trip starts once and a second start changes nothing"""
+        data = execute(self.START_TRIP, self.user, id=str(self.trip.id))
+        self.assertTrue(data["startTrip"]["success"])
+
+        data = execute(self.START_TRIP, self.user, id=str(self.trip.id))
+        self.assertFalse(data["startTrip"]["success"])
+
+        self.trip.refresh_from_db()
+        self.assertTrue(self.trip.is_active)
+
+    def test_start_trip_of_another_user(self):
+        """Test another user's trip is neither started nor reported as started"""
+        data = execute(self.START_TRIP, self.other, id=str(self.trip.id))
+
+        self.assertFalse(data["startTrip"]["success"])
+        self.trip.refresh_from_db()
+        self.assertFalse(self.trip.is_active)
+
+    def test_end_trip_only_when_active(self):
+        """Test only an active trip can be ended"""
+        data = execute(self.END_TRIP, self.user, id=str(self.trip.id))
+        self.assertFalse(data["endTrip"]["success"])
+
+        Trip.objects.filter(id=self.trip.id).update(is_active=True)
+        data = execute(self.END_TRIP, self.user, id=str(self.trip.id))
+        self.assertTrue(data["endTrip"]["success"])
+
+        self.trip.refresh_from_db()
+        self.assertFalse(self.trip.is_active)
+
+    def test_accept_match_counts_companion_once(self):
+        """Test accepting twice adds a single companion"""
+        data = execute(self.ACCEPT_MATCH, self.user, id=str(self.match.id))
+        self.assertTrue(data["acceptMatch"]["success"])
+
+        data = execute(self.ACCEPT_MATCH, self.user, id=str(self.match.id))
+        self.assertFalse(data["acceptMatch"]["success"])
+
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.current_companions, 1)
+
+    def test_reject_match_only_when_pending(self):
+        """Test a match is rejected once and only by the trip owner"""
+        data = execute(self.REJECT_MATCH, self.other, id=str(self.match.id))
+        self.assertFalse(data["rejectMatch"]["success"])
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.status, "pending")
+
+        data = execute(self.REJECT_MATCH, self.user, id=str(self.match.id))
+        self.assertTrue(data["rejectMatch"]["success"])
+
+        data = execute(self.REJECT_MATCH, self.user, id=str(self.match.id))
+        self.assertFalse(data["rejectMatch"]["success"])
+
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.status, "rejected")
+
+
+class MutationErrorTests(TestCase):
+    """Test suite for the shared mutation error payloads"""
+
+    def setUp(self):
+        """Set up a user"""
+        self.user = User.objects.create_user(
+            email="errors@example.com", password="pass"
+        )
+
+    def test_missing_object_reported_as_not_found(self):
+        """Test a missing trip gets the not found message and empty fields"""
+        data = execute(
+            "mutation($id: UUID!) { startTrip(tripId: $id) { success message trip { id } matchesFound } }",
+            self.user,
+            id="00000000-0000-0000-0000-000000000000",
+        )
+
+        self.assertEqual(
+            data["startTrip"],
+            {
+                "success": False,
+                "message": "Trip not found or unauthorized.",
+                "trip": None,
+                "matchesFound": 0,
+            },
+        )
+
+    def test_database_error_reported_as_invalid_input(self):
+        """Test a value the database rejects is reported without its details"""
+        data = execute(
+            """
+            mutation($destination: String!) {
+                createTrip(input: {
+                    destination: $destination, startDate: "2030-01-10", endDate: "2030-01-15"
+                }) { success message trip { id } }
+            }
+            """,
+            self.user,
+            destination="x" * 300,
+        )
+
+        self.assertEqual(
+            data["createTrip"],
+            {
+                "success": False,
+                "message": "Error creating trip: invalid input.",
+                "trip": None,
+            },
+        )
+
+
+class HotspotCacheTests(TestCase):
+    """Test suite for the cached active_hotspots lookups"""
+
+    QUERY = """
+        query($lat: Decimal, $lng: Decimal) {
+            activeHotspots(latitude: $lat, longitude: $lng) { id }
+        }
+    """
+
+    def setUp(self):
+        """Set up a user and an empty cache"""
+        cache.clear()
+        self.user = User.objects.create_user(email="spot@example.com", password="pass")
+        self.expires_at = timezone.now() + timedelta(hours=1)
+
+    def hotspot_ids(self, latitude, longitude):
+        data = execute(self.QUERY, self.user, lat=latitude, lng=longitude)
+        return [hotspot["id"] for hotspot in data["activeHotspots"]]
+
+    def test_lookups_in_one_cell_share_the_cache(self):
+        """Test a second lookup from the same ~110m cell runs no queries"""
+        hotspot = ActivityHotspot.objects.create(
+            latitude="12.971600", longitude="77.594600", expires_at=self.expires_at
+        )
+        self.assertEqual(self.hotspot_ids("12.9716", "77.5946"), [str(hotspot.id)])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.hotspot_ids("12.97162", "77.59458"), [str(hotspot.id)]
+            )
+
+    def test_hotspot_changes_invalidate_the_cache(self):
+        """Test new and deleted hotspots show up in cached cells"""
+        self.assertEqual(self.hotspot_ids("12.9716", "77.5946"), [])
+
+        hotspot = ActivityHotspot.objects.create(
+            latitude="12.972000", longitude="77.594600", expires_at=self.expires_at
+        )
+        self.assertEqual(self.hotspot_ids("12.9716", "77.5946"), [str(hotspot.id)])
+
+        hotspot.delete()
+        self.assertEqual(self.hotspot_ids("12.9716", "77.5946"), [])
+
+    def test_bookkeeping_saves_keep_the_cache(self):
+        """Test refreshing a hotspot's counters leaves cached lookups alone"""
+        hotspot = ActivityHotspot.objects.create(
+            latitude="12.971600", longitude="77.594600", expires_at=self.expires_at
+        )
+        self.hotspot_ids("12.9716", "77.5946")
+
+        hotspot.user_count = 4
+        hotspot.save(update_fields=["user_count", "last_activity", "expires_at"])
+
+        with self.assertNumQueries(0):
+            self.hotspot_ids("12.9716", "77.5946")
+
+    def test_distant_hotspots_keep_the_cache(self):
+        """Test a hotspot outside every region a lookup covers leaves it cached"""
+        self.hotspot_ids("12.9716", "77.5946")
+
+        ActivityHotspot.objects.create(
+            latitude="28.613900", longitude="77.209000", expires_at=self.expires_at
+        )
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.hotspot_ids("12.9716", "77.5946"), [])
+
+
+class GeoHelperTests(TestCase):
+    """Test suite for the geo helpers against the plain haversine"""
+
+    def setUp(self):
+        """Set up a spread of points around Bengaluru and the antimeridian"""
+        rng = random.Random(42)
+        self.origin = (12.9716, 77.5946)
+        self.near = [
+            (
+                self.origin[0] + rng.uniform(-0.3, 0.3),
+                self.origin[1] + rng.uniform(-0.3, 0.3),
+            )
+            for _ in range(50)
+        ]
+        self.far = [(rng.uniform(-80, 80), rng.uniform(-180, 180)) for _ in range(50)]
+
+    def test_haversine_km_known_distance(self):
+        """Test Paris to London comes out at about 344km"""
+        self.assertAlmostEqual(
+            haversine_km(48.8566, 2.3522, 51.5074, -0.1278), 343.5, delta=1
+        )
+
+    def test_haversine_km_many_matches_haversine(self):
+        """Test batch distances equal the pairwise haversine"""
+        points = self.near + self.far
+
+        distances = haversine_km_many(*self.origin, points)
+
+        for point, distance in zip(points, distances):
+            self.assertAlmostEqual(
+                distance, haversine_km(*self.origin, *point), places=6
+            )
+
+    def test_haversine_km_many_max_km(self):
+        """Test points past max_km by latitude alone are reported as infinite"""
+        distances = haversine_km_many(*self.origin, self.near + self.far, max_km=100)
+
+        for point, distance in zip(self.near + self.far, distances):
+            exact = haversine_km(*self.origin, *point)
+            if exact <= 100:
+                self.assertAlmostEqual(distance, exact, places=6)
+            else:
+                self.assertGreater(distance, 100)
+
+    def test_short_distance_km_many_close_to_haversine(self):
+        """Test the equirectangular shortcut stays within 0.5% of the haversine"""
+        distances = short_distance_km_many(*self.origin, self.near)
+
+        for point, distance in zip(self.near, distances):
+            exact = haversine_km(*self.origin, *point)
+            self.assertAlmostEqual(distance, exact, delta=exact * 0.005 + 1e-9)
+
+    def test_short_distance_km_many_far_points_use_haversine(self):
+        """Test points beyond the equirectangular range fall back to the haversine"""
+        distances = short_distance_km_many(*self.origin, self.far)
+
+        for point, distance in zip(self.far, distances):
+            self.assertAlmostEqual(
+                distance, haversine_km(*self.origin, *point), places=6
+            )
+
+    def test_short_distance_km_many_across_antimeridian(self):
+        """Test points either side of the antimeridian are measured the short way"""
+        (distance,) = short_distance_km_many(0.0, 179.99, [(0.0, -179.99)])
+
+        self.assertAlmostEqual(
+            distance, haversine_km(0.0, 179.99, 0.0, -179.99), delta=0.01
+        )
+        self.assertLess(distance, 3)
+
+    def test_filter_within_radius_matches_haversine(self):
+        """Test the database radius filter keeps exactly the points the haversine does"""
+        user = User.objects.create_user(email="geo@example.com", password="pass")
+        recorded_at = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        LocationHistory.objects.bulk_create(
+            LocationHistory(
+                user=user,
+                latitude=round(lat, 6),
+                longitude=round(lng, 6),
+                recorded_at=recorded_at,
+            )
+            for lat, lng in self.near
+        )
+
+        for radius_km in (1, 10, 25):
+            expected = {
+                (round(lat, 6), round(lng, 6))
+                for lat, lng in self.near
+                if haversine_km(*self.origin, round(lat, 6), round(lng, 6)) <= radius_km
+            }
+            found = {
+                (float(lat), float(lng))
+                for lat, lng in filter_within_radius(
+                    LocationHistory.objects.all(), *self.origin, radius_km
+                ).values_list("latitude", "longitude")
+            }
+            self.assertEqual(found, expected)
+
+    def test_geohash_encode_known_cell(self):
+        """Test a well known coordinate encodes to its published geohash"""
+        self.assertEqual(geohash_encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+        self.assertEqual(geohash_encode(57.64911, 10.40744), "u4pruyd")
+
+    def test_geohash_cells_around_cover_radius(self):
+        """Test every point within the radius falls in one of the returned cells"""
+        radius_km = 0.3
+        cells = geohash_cells_around(*self.origin, radius_km)
+
+        self.assertIsNotNone(cells)
+        self.assertIn(geohash_encode(*self.origin), cells)
+        rng = random.Random(7)
+        for _ in range(200):
+            point = (
+                self.origin[0] + rng.uniform(-0.003, 0.003),
+                self.origin[1] + rng.uniform(-0.003, 0.003),
+            )
+            if haversine_km(*self.origin, *point) <= radius_km:
+                self.assertIn(geohash_encode(*point), cells)
+
+    def test_geohash_cells_around_too_many_cells(self):
+        """Test a radius needing more than max_cells asks for the fallback"""
+        self.assertIsNone(geohash_cells_around(*self.origin, 50))
+
+
+class MatchingTests(TestCase):
+    """Test suite for batch match scoring against calculate_match_score"""
+
+    def setUp(self):
+        """Set up a trip and candidates with varied dates, places and interests"""
+        self.user = User.objects.create_user(email="trip@example.com", password="pass")
+        self.other = User.objects.create_user(
+            email="other@example.com", password="pass"
+        )
+        self.trip = Trip.objects.create(
+            user=self.user,
+            origin="Bengaluru",
+            destination="Goa",
+            destination_lat=15.4909,
+            destination_lng=73.8278,
+            start_date=date(2030, 1, 10),
+            end_date=date(2030, 1, 15),
+            interests=["beach", "food", "music"],
+        )
+
+        rng = random.Random(3)
+        interests = ["beach", "food", "music", "hiking", "history"]
+        self.candidates = []
+        for i in range(40):
+            start = date(2030, 1, 1) + timedelta(days=rng.randint(0, 25))
+            located = i % 3 != 0
+            self.candidates.append(
+                Trip.objects.create(
+                    user=self.other,
+                    origin="Mumbai",
+                    destination=rng.choice(["Goa", "goa", "Pune"]),
+                    destination_lat=(
+                        round(15.4909 + rng.uniform(-0.05, 0.05), 6)
+                        if located
+                        else None
+                    ),
+                    destination_lng=(
+                        round(73.8278 + rng.uniform(-0.05, 0.05), 6)
+                        if located
+                        else None
+                    ),
+                    start_date=start,
+                    end_date=start + timedelta(days=rng.randint(0, 8)),
+                    interests=rng.sample(interests, rng.randint(0, 4)),
+                )
+            )
+        # Read back so coordinates are Decimals, as they are when matching
+        self.trip.refresh_from_db()
+        self.candidates = list(Trip.objects.filter(user=self.other))
+
+    def test_overlapping_candidates_match_date_overlap(self):
+        """Test the sweep pairs each trip with exactly the overlapping candidates"""
+        trips = [self.trip] + self.candidates[:10]
+
+        for trip, overlapping in _overlapping_candidates(trips, self.candidates):
+            expected = {
+                candidate.pk
+                for candidate in self.candidates
+                if calculate_date_overlap(trip, candidate) > 0
+            }
+            self.assertEqual({candidate.pk for candidate in overlapping}, expected)
+
+    def test_score_candidates_match_calculate_match_score(self):
+        """Test batch scores and details equal the pairwise calculation"""
+        scored = {
+            candidate.pk: (score, details)
+            for score, details, candidate in _score_candidates(
+                self.trip, self.candidates
+            )
+        }
+
+        for candidate in self.candidates:
+            score, details = calculate_match_score(self.trip, candidate)
+            if details["date_overlap_days"] == 0:
+                self.assertNotIn(candidate.pk, scored)
+                continue
+
+            batch_score, batch_details = scored[candidate.pk]
+            self.assertEqual(batch_score, score)
+            self.assertEqual(batch_details["distance_km"], details["distance_km"])
+            self.assertEqual(batch_details["distance_score"], details["distance_score"])
+            self.assertEqual(batch_details["interest_score"], details["interest_score"])
+            self.assertEqual(
+                sorted(batch_details["common_interests"]),
+                sorted(details["common_interests"]),
+            )
+
+    def test_score_candidates_shared_interest_masks(self):
+        """Test reusing interest masks across trips does not change scores"""
+        masks = _InterestMasks()
+        first = list(
+            _score_candidates(self.trip, self.candidates, interest_masks=masks)
+        )
+        second = list(
+            _score_candidates(self.trip, self.candidates, interest_masks=masks)
+        )
+
+        self.assertEqual(
+            [(score, details) for score, details, _ in first],
+            [(score, details) for score, details, _ in second],
+        )
+
+
+class LocationTrackerTests(TestCase):
+    """Test suite for batched location recording"""
+
+    def setUp(self):
+        """Set up a user"""
+        self.user = User.objects.create_user(email="loc@example.com", password="pass")
+
+    def test_record_locations_bulk(self):
+        """Test a batch is saved in one go, oldest first, and the profile follows the latest"""
+        base = datetime(2026, 1, 1, 10, tzinfo=dt_timezone.utc)
+        points = [
+            {
+                "latitude": 12.9,
+                "longitude": 77.6,
+                "recorded_at": base + timedelta(minutes=5),
+            },
+            {"latitude": 12.8, "longitude": 77.5, "recorded_at": base},
+            {
+                "latitude": 12.95,
+                "longitude": 77.65,
+                "recorded_at": base + timedelta(minutes=2),
+                "speed": 3.5,
+            },
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            locations = LocationTracker.record_locations(user=self.user, points=points)
+
+        inserts = [q for q in queries if q["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 1)
+
+        self.assertEqual(
+            [location.recorded_at for location in locations],
+            [base, base + timedelta(minutes=2), base + timedelta(minutes=5)],
+        )
+        self.assertEqual(LocationHistory.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(
+            LocationHistory.objects.get(user=self.user, speed=3.5).geohash7,
+            geohash_encode(12.95, 77.65),
+        )
+
+        self.user.profile.refresh_from_db()
+        self.assertEqual(float(self.user.profile.latitude), 12.9)
+        self.assertEqual(
+            self.user.profile.last_location_update, base + timedelta(minutes=5)
+        )
+
+    def test_record_locations_empty(self):
+        """Test an empty batch writes nothing"""
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                LocationTracker.record_locations(user=self.user, points=[]), []
+            )
+
+        self.assertFalse(LocationHistory.objects.filter(user=self.user).exists())
+
+
+class PlaceIndexTests(TestCase):
+    """Test suite for the in-process insights place index"""
+
+    def setUp(self):
+        """Set up a place and a fresh index"""
+        self.place = Place.objects.create(city="Paris", state="", country="France")
+        self.index = PlaceIndex()
+
+    def test_nearest_prefers_place_priority(self):
+        """Test a famous place in range wins over a closer hidden gem"""
+        famous = MostFamousPlace.objects.create(
+            place=self.place,
+            name="Eiffel Tower",
+            quote="Iconic landmark",
+            latitude=48.8584,
+            longitude=2.2945,
+            image="https://example.com/tower.jpg",
+        )
+        HiddenGem.objects.create(
+            place=self.place,
+            name="Quiet Garden",
+            description="Shady benches",
+            latitude=48.8580,
+            longitude=2.2940,
+        )
+
+        self.assertEqual(
+            self.index.nearest(48.8581, 2.2941, 0.2), ("Eiffel Tower", str(famous.id))
+        )
+        self.assertIsNone(self.index.nearest(48.87, 2.2941, 0.2))
+
+    def test_replaced_place_data_invalidates_index(self):
+        """Test regenerated places are seen once the replacement commits"""
+        HiddenGem.objects.create(
+            place=self.place,
+            name="Old Garden",
+            description="Shady benches",
+            latitude=48.8580,
+            longitude=2.2940,
+        )
+        self.assertEqual(self.index.nearest(48.8581, 2.2941, 0.2)[0], "Old Garden")
+
+        new_gem = HiddenGem(
+            place=self.place,
+            name="New Garden",
+            description="Fresh benches",
+            latitude=48.8580,
+            longitude=2.2940,
+        )
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            _replace_related_data(self.place, {HiddenGem: [new_gem]})
+
+            # Nothing is committed yet, so lookups keep the old index
+            self.assertEqual(self.index.nearest(48.8581, 2.2941, 0.2)[0], "Old Garden")
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(
+            self.index.nearest(48.8581, 2.2941, 0.2), ("New Garden", str(new_gem.id))
+        )
+
+
+class NearbyPlaceTests(TestCase):
+    """Test suite for the per-cell nearby place lookups behind suggestions"""
+
+    def setUp(self):
+        """Set up a place with one of each kind of significant place"""
+        _nearby_place_candidates.cache_clear()
+        self.place = Place.objects.create(city="Paris", state="", country="France")
+        self.tower = FamousPlace.objects.create(
+            place=self.place,
+            name="Tower",
+            quote="Iron lattice",
+            latitude=48.8500,
+            longitude=2.2900,
+            image="https://example.com/tower.jpg",
+        )
+        self.trap = TouristTrap.objects.create(
+            place=self.place,
+            name="Trap",
+            reason="Overpriced",
+            latitude=48.8510,
+            longitude=2.2900,
+        )
+        self.walk = ThingToDo.objects.create(
+            place=self.place,
+            activity_type="Walk",
+            location="Quay",
+            latitude=48.8500,
+            longitude=2.2910,
+        )
+        self.engine = SuggestionEngine()
+        # name, latitude, longitude, radius in meters
+        self.expected = [
+            ("Tower", 48.8500, 2.2900, SuggestionEngine.FAMOUS_PLACE_RADIUS),
+            ("Trap", 48.8510, 2.2900, SuggestionEngine.TOURIST_TRAP_RADIUS),
+            (
+                "Walk at Quay",
+                48.8500,
+                2.2910,
+                SuggestionEngine.ACTIVITY_LOCATION_RADIUS,
+            ),
+        ]
+
+    def test_find_nearby_places_matches_exact_distances(self):
+        """Test every cell position sees exactly the places within their radius"""
+        rng = random.Random(1)
+        for _ in range(200):
+            latitude = 48.85 + rng.uniform(-0.003, 0.003)
+            longitude = 2.29 + rng.uniform(-0.004, 0.004)
+
+            found = sorted(
+                place["name"]
+                for place in self.engine._find_nearby_places(latitude, longitude)
+            )
+            expected = sorted(
+                name
+                for name, place_lat, place_lng, radius in self.expected
+                if calculate_distance(latitude, longitude, place_lat, place_lng)
+                <= radius
+            )
+            self.assertEqual(found, expected)
+
+    def test_nearby_places_cached_per_cell(self):
+        """Test a second lookup in the same cell runs no queries"""
+        first = self.engine._find_nearby_places(48.8503, 2.2900)
+
+        with self.assertNumQueries(0):
+            second = self.engine._find_nearby_places(48.85032, 2.29004)
+
+        self.assertEqual(
+            sorted(place["name"] for place in first),
+            sorted(place["name"] for place in second),
+        )
+
+    def test_replaced_place_data_clears_the_cache(self):
+        """Test regenerated places are seen once the replacement commits"""
+        self.engine._find_nearby_places(48.8503, 2.2900)
+
+        gem = HiddenGem(
+            place=self.place,
+            name="Gem",
+            description="Quiet courtyard",
+            latitude=48.85035,
+            longitude=2.2900,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            _replace_related_data(self.place, {HiddenGem: [gem]})
+
+        self.assertIn(
+            "Gem",
+            [
+                place["name"]
+                for place in self.engine._find_nearby_places(48.85032, 2.29004)
+            ],
+        )
+
+    def test_nearby_places_in_one_query(self):
+        """Test all place tables are searched with a single query"""
+        with self.assertNumQueries(1):
+            nearby = self.engine._find_nearby_places(48.8503, 2.2900)
+
+        places = {place["name"]: place for place in nearby}
+        self.assertEqual(set(places), {"Tower", "Trap", "Walk at Quay"})
+        self.assertEqual(places["Tower"]["type"], "famous_place")
+        self.assertEqual(places["Tower"]["quote"], "Iron lattice")
+        self.assertEqual(places["Tower"]["place_id"], self.tower.id)
+        self.assertEqual(places["Trap"]["description"], "Overpriced")
+        self.assertEqual(places["Trap"]["city"], "Paris")
+        self.assertEqual(places["Walk at Quay"]["activity_type"], "Walk")
+        self.assertEqual(places["Walk at Quay"]["time"], "Anytime")
+        self.assertEqual(places["Walk at Quay"]["place_id"], self.walk.id)
+        self.assertAlmostEqual(places["Tower"]["distance"], 33.4, delta=0.5)
+
+
+class HotspotMembershipMigrationTests(TransactionTestCase):
+    """Test suite for the active_users to HotspotMembership data migration"""
+
+    migrate_from = [("travel", "0010_trip_active_dates_idx")]
+    migrate_to = [("travel", "0011_hotspot_membership")]
+
+    def setUp(self):
+        """Roll the travel app back to before the membership table"""
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        self.old_apps = executor.loader.project_state(self.migrate_from).apps
+
+    def tearDown(self):
+        """Bring every app forward to its latest migration again"""
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_active_users_become_memberships(self):
+        """Test each known user in active_users gets one membership row"""
+        first = User.objects.create_user(email="first@example.com", password="pass")
+        second = User.objects.create_user(email="second@example.com", password="pass")
+        ActivityHotspot = self.old_apps.get_model("travel", "ActivityHotspot")
+        expires_at = timezone.now() + timedelta(hours=1)
+        busy = ActivityHotspot.objects.create(
+            latitude=1,
+            longitude=1,
+            expires_at=expires_at,
+            active_users=[
+                str(first.id),
+                str(second.id),
+                str(first.id),
+                "00000000-0000-0000-0000-000000000000",
+            ],
+        )
+        ActivityHotspot.objects.create(latitude=2, longitude=2, expires_at=expires_at)
+        quiet = ActivityHotspot.objects.create(
+            latitude=3, longitude=3, expires_at=expires_at, active_users=[str(first.id)]
+        )
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        new_apps = executor.loader.project_state(self.migrate_to).apps
+        HotspotMembership = new_apps.get_model("travel", "HotspotMembership")
+
+        self.assertEqual(
+            set(HotspotMembership.objects.values_list("hotspot_id", "user_id")),
+            {(busy.id, first.id), (busy.id, second.id), (quiet.id, first.id)},
+        )